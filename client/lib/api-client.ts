@@ -1629,6 +1629,15 @@ export async function updateFieldSetting(
   });
 }
 
+export async function bulkUpdateFieldSettings(
+  changes: Array<Partial<FieldSetting> & { id: string }>
+): Promise<{ fields_updated: number; options_updated: number; options_created: number }> {
+  return apiFetch(`/system/field-settings/bulk-update/`, {
+    method: "PUT",
+    body: JSON.stringify(changes),
+  });
+}
+
 export async function fetchServiceSettings(): Promise<ServiceSetting[]> {
   return apiFetch<ServiceSetting[]>("/system/service-settings/list/");
 }
@@ -1679,7 +1688,7 @@ export async function fetchDashboardStats(): Promise<DashboardStats> {
     ).length;
     
     const inventoryAlerts = inventoryArray.filter((item: InventoryItem) => 
-      item.current_quantity <= (item.min_quantity || 0)
+      item.status === "critical" || item.status === "warning"
     ).length;
     
     return {
@@ -1765,6 +1774,76 @@ export async function fetchAuditLogs(params?: {
   }
 }
 
+// Exports API (streamed CSV / XLSX with the same filters as the list endpoints)
+export type ExportFormat = "csv" | "xlsx";
+
+export async function downloadExport(
+  resource: "orders" | "design-orders" | "print-orders" | "inventory/logs" | "system/audit-log",
+  fileFormat: ExportFormat = "csv",
+  params?: Record<string, string | undefined>
+): Promise<void> {
+  const queryParams = new URLSearchParams({ file_format: fileFormat });
+  if (params) {
+    Object.entries(params).forEach(([key, value]) => {
+      if (value) queryParams.append(key, value);
+    });
+  }
+  const response = await fetch(`${API_BASE_URL}/${resource}/export/?${queryParams}`, {
+    method: "GET",
+    headers: getAuthHeaders(),
+  });
+  if (!response.ok) {
+    if (response.status === 401) {
+      throw new Error("غير مصرح لك بالوصول. يرجى تسجيل الدخول مرة أخرى.");
+    }
+    throw new Error(`فشل التصدير: ${response.statusText}`);
+  }
+
+  const disposition = response.headers.get("Content-Disposition") || "";
+  const match = disposition.match(/filename="([^"]+)"/);
+  const blob = await response.blob();
+  const url = window.URL.createObjectURL(blob);
+  const link = document.createElement("a");
+  link.href = url;
+  link.download = match ? match[1] : `export.${fileFormat}`;
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+  window.URL.revokeObjectURL(url);
+}
+
+// Report Jobs API (heavy reports computed in the background)
+export interface ReportJob {
+  id: string;
+  kind: "orders" | "productivity" | "roi";
+  params: { start_date: string; end_date: string; filters: Record<string, string> };
+  status: "pending" | "running" | "completed" | "failed";
+  progress: number;
+  processed_chunks: number;
+  total_chunks: number;
+  row_count: number;
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  expires_at: string | null;
+  download_url: string | null;
+}
+
+export async function requestReportJob(
+  kind: ReportJob["kind"],
+  params: { start_date: string; end_date: string } & Record<string, string | undefined>
+): Promise<ReportJob> {
+  return apiFetch<ReportJob>("/admin/report-jobs/", {
+    method: "POST",
+    body: JSON.stringify({ kind, ...params }),
+  });
+}
+
+export async function fetchReportJob(id: string): Promise<ReportJob> {
+  return apiFetch<ReportJob>(`/admin/report-jobs/${id}/`);
+}
+
 // Approval Policy API
 export interface ApprovalPolicy {
   mode: "all" | "selective" | "none";
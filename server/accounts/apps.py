@@ -6,3 +6,6 @@ class AccountsConfig(AppConfig):
   name = "accounts"
   verbose_name = "إدارة المستخدمين"
 
+  def ready(self):
+    from accounts import signals  # noqa: F401
+
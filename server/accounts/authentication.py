@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.models import ClaimsUser, User
+from accounts.tokens import (
+    ENTITY_CLAIM,
+    PERMISSIONS_VERSION_TIMEOUT,
+    ROLE_CLAIM,
+    SUPERUSER_CLAIM,
+    VERSION_CLAIM,
+    permissions_version_key,
+)
+
+# قيمة تُخزن للمستخدم المحذوف أو غير المفعل (لا تطابق أي إصدار)
+REVOKED = -1
+
+
+def current_permissions_version(user_id) -> int:
+    """رقم إصدار صلاحيات المستخدم من الكاش، أو من قاعدة البيانات عند عدم وجوده"""
+    key = permissions_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id, is_active=True)
+            .values_list("permissions_version", flat=True)
+            .first()
+        )
+        if version is None:
+            version = REVOKED
+        cache.set(key, version, PERMISSIONS_VERSION_TIMEOUT)
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    مصادقة JWT دون تحميل المستخدم: يُبنى ClaimsUser من بيانات الرمز ويُتحقق
+    فقط من رقم إصدار الصلاحيات (من الكاش). الرموز القديمة التي لا تحمل هذه
+    البيانات، أو عند تعطيل JWT_STATELESS_AUTH، تُعامل بالطريقة المعتادة.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS_AUTH or VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+            entity_id = validated_token[ENTITY_CLAIM]
+            user = ClaimsUser.from_claims(
+                user_id=user_id,
+                role=validated_token[ROLE_CLAIM],
+                entity_id=User._meta.get_field("entity").to_python(entity_id),
+                is_superuser=validated_token[SUPERUSER_CLAIM],
+                permissions_version=validated_token[VERSION_CLAIM],
+            )
+        except (KeyError, ValueError, TypeError):
+            raise InvalidToken("الرمز لا يحتوي على بيانات مستخدم صالحة.")
+
+        if current_permissions_version(user_id) != user.permissions_version:
+            raise AuthenticationFailed(
+                "تغيرت صلاحيات الحساب، يرجى تسجيل الدخول مجدداً.", code="token_revoked"
+            )
+        return user
@@ -0,0 +1,103 @@
+"""
+سياق الصلاحيات لكل طلب (PermissionContext)
+
+يُحسب مرة واحدة لكل طلب ويُخزن على HttpRequest: مجموعة أدوار المستخدم
+(is_admin, is_print_manager, ...) ونطاق الجهة وشروط تصفية الـ QuerySet حسب
+الدور. تستخدمه فئات الصلاحيات في accounts/permissions.py والـ ViewSets، ويُحصي
+عدد عمليات التحقق في الطلب لأغراض القياس (ترويسة X-Permission-Evaluations).
+"""
+from collections import Counter
+from functools import cached_property
+
+from django.db.models import Q
+
+# الصلاحيات المشتقة من خصائص User (is_<name>)
+CAPABILITIES = (
+    "admin",
+    "print_manager",
+    "dept_manager",
+    "dept_employee",
+    "consumer",
+    "training_supervisor",
+    "approver",
+)
+
+CONTEXT_ATTR = "_permission_context"
+
+
+class PermissionContext:
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.user_id = user.pk if self.is_authenticated else None
+        self.entity_id = user.entity_id if self.is_authenticated else None
+        self.roles = frozenset(
+            name for name in CAPABILITIES if self.is_authenticated and getattr(user, f"is_{name}")
+        )
+        self.evaluations: Counter = Counter()
+        self._scopes: dict = {}
+
+    def has(self, *capabilities, check: str = "has") -> bool:
+        """هل يملك المستخدم أياً من الصلاحيات المذكورة"""
+        self.evaluations[check] += 1
+        return not self.roles.isdisjoint(capabilities)
+
+    @cached_property
+    def entity_scope(self) -> frozenset:
+        """جهة المستخدم وجميع الجهات التابعة لها (من لقطة الهيكل)"""
+        if self.entity_id is None:
+            return frozenset()
+        from entities.hierarchy import get_snapshot
+
+        snapshot = get_snapshot()
+        return frozenset(
+            [self.entity_id, *(node.id for node in snapshot.descendants(self.entity_id))]
+        )
+
+    def scope_filter(self, full_access, owner_lookups=("requester_id",), role_lookups=None):
+        """
+        شرط تصفية السجلات المسموح بها: None لمن يملك إحدى صلاحيات full_access،
+        وإلا السجلات التي يطابق فيها المستخدم أحد owner_lookups (أو role_lookups
+        الإضافية لأدواره). يُحسب مرة واحدة لكل تركيبة في الطلب.
+        """
+        role_lookups = role_lookups or {}
+        key = (frozenset(full_access), tuple(owner_lookups), tuple(sorted(role_lookups.items())))
+        self.evaluations["scope"] += 1
+        if key not in self._scopes:
+            if not self.roles.isdisjoint(full_access):
+                condition = None
+            else:
+                lookups = [*owner_lookups]
+                for role, extra in role_lookups.items():
+                    if role in self.roles:
+                        lookups.extend(extra)
+                condition = Q()
+                for lookup in lookups:
+                    condition |= Q(**{lookup: self.user_id})
+            self._scopes[key] = condition
+        return self._scopes[key]
+
+
+def get_permission_context(request) -> PermissionContext:
+    """سياق الصلاحيات للطلب الحالي (يقبل طلب DRF أو HttpRequest)"""
+    http_request = getattr(request, "_request", request)
+    user = request.user
+    context = getattr(http_request, CONTEXT_ATTR, None)
+    if context is None or context.user is not user:
+        context = PermissionContext(user)
+        setattr(http_request, CONTEXT_ATTR, context)
+    return context
+
+
+class PermissionContextMixin:
+    """
+    للـ ViewSets: الوصول لسياق الصلاحيات وتصفية الـ QuerySet حسب الدور.
+    """
+
+    @property
+    def permission_context(self) -> PermissionContext:
+        return get_permission_context(self.request)
+
+    def scope_queryset(self, queryset, full_access, owner_lookups=("requester_id",), role_lookups=None):
+        condition = self.permission_context.scope_filter(full_access, owner_lookups, role_lookups)
+        return queryset if condition is None else queryset.filter(condition)
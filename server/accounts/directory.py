@@ -0,0 +1,414 @@
+"""
+مزامنة الجهات والمستخدمين من تصدير الدليل (Active Directory) بصيغة LDIF أو CSV
+
+تُقارن الصفوف بالبيانات الحالية (الجهات برمز الجهة والمستخدمون بالبريد)،
+ويُتحقق من الهيكل الهرمي كاملاً في الذاكرة، ثم تُطبق الإضافات والتعديلات
+بـ bulk_create / bulk_update بترتيب الاعتماد (الجهات الأم أولاً ثم الأبناء ثم
+المستخدمون). لا تُحذف أي جهة أو مستخدم غير موجود في الملف.
+
+أعمدة CSV:
+- الجهات: code, name, level, parent_code, is_active, description
+- المستخدمون: email, full_name, entity_code, role, phone_number, is_active
+"""
+import base64
+import binascii
+import csv
+import io
+import re
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from accounts.models import User
+from accounts.roles import ROLES_CACHE_NAMESPACE
+from accounts.tokens import forget_permissions_version
+from entities.hierarchy import ENTITIES_CACHE_NAMESPACE
+from entities.models import HIERARCHY_FIELDS, Entity
+from system.cache import bump_version
+
+ALLOWED_PARENT_LEVEL = {
+    Entity.Level.VICE_RECTORATE: None,
+    Entity.Level.COLLEGE_DEANSHIP: Entity.Level.VICE_RECTORATE,
+    Entity.Level.DEPARTMENT_UNIT: Entity.Level.COLLEGE_DEANSHIP,
+}
+LEVELS_BY_DEPTH = list(ALLOWED_PARENT_LEVEL)
+
+ENTITY_OBJECT_CLASSES = {"organizationalunit"}
+USER_OBJECT_CLASSES = {"user", "person", "organizationalperson", "inetorgperson"}
+# أول سمة متوفرة تُستخدم رمزاً للجهة في LDIF
+LDIF_ENTITY_CODE_ATTRS = ("departmentnumber", "businesscategory", "ou")
+# userAccountControl: البت 2 يعني أن الحساب معطل
+ACCOUNT_DISABLED_FLAG = 0x2
+
+TRUE_VALUES = {"1", "true", "yes", "y", "نعم"}
+FALSE_VALUES = {"0", "false", "no", "n", "لا"}
+
+
+def _parse_bool(value, default=True):
+    value = (value or "").strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return default
+
+
+def _read_csv(text: str, required: set[str]):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or not required <= set(reader.fieldnames):
+        raise ValidationError(f"الملف يجب أن يحتوي على الأعمدة: {', '.join(sorted(required))}.")
+    for row_number, row in enumerate(reader, start=2):
+        row = {key: (value or "").strip() for key, value in row.items() if key}
+        if any(row.values()):
+            yield row_number, row
+
+
+def parse_entities_csv(text: str) -> list[dict]:
+    rows, errors = [], []
+    for row_number, row in _read_csv(text, {"code", "name", "level"}):
+        if not row["code"] or not row["name"]:
+            errors.append(f"السطر {row_number}: الرمز والاسم مطلوبان.")
+            continue
+        if row["level"] not in Entity.Level.values:
+            errors.append(f"السطر {row_number}: مستوى غير صحيح '{row['level']}'.")
+            continue
+        rows.append(
+            {
+                "code": row["code"],
+                "name": row["name"],
+                "level": row["level"],
+                "parent_code": row.get("parent_code") or None,
+                "is_active": _parse_bool(row.get("is_active")),
+                "description": row.get("description", ""),
+            }
+        )
+    if errors:
+        raise ValidationError(errors)
+    return rows
+
+
+def parse_users_csv(text: str) -> list[dict]:
+    rows, errors = [], []
+    for row_number, row in _read_csv(text, {"email", "full_name"}):
+        if not row["email"] or not row["full_name"]:
+            errors.append(f"السطر {row_number}: البريد والاسم مطلوبان.")
+            continue
+        role = row.get("role") or None
+        if role and role not in User.Role.values:
+            errors.append(f"السطر {row_number}: دور غير صحيح '{role}'.")
+            continue
+        rows.append(
+            {
+                "email": row["email"],
+                "full_name": row["full_name"],
+                "entity_code": row.get("entity_code") or None,
+                "role": role,
+                "phone_number": row.get("phone_number", ""),
+                "is_active": _parse_bool(row.get("is_active")),
+            }
+        )
+    if errors:
+        raise ValidationError(errors)
+    return rows
+
+
+def _ldif_records(text: str, errors: list[str]):
+    """
+    تقسيم LDIF إلى سجلات {dn, attrs} مع دعم الأسطر المطوية وقيم base64.
+    قيم base64 غير الصالحة تُضاف إلى errors باسم السجل ويُتجاوز الحقل.
+    """
+    lines = []
+    for raw in text.splitlines():
+        if raw.startswith(" ") and lines:
+            lines[-1] += raw[1:]
+        else:
+            lines.append(raw)
+
+    record = {}
+    for line in lines + [""]:
+        if not line.strip():
+            if record.get("dn"):
+                yield record
+            record = {}
+            continue
+        if line.startswith("#") or ":" not in line:
+            continue
+        name, _, value = line.partition(":")
+        name = name.strip().lower()
+        if value.startswith(":"):
+            try:
+                value = base64.b64decode(value[1:].strip(), validate=True).decode("utf-8")
+            except (binascii.Error, UnicodeDecodeError):
+                label = value[1:].strip() if name == "dn" else record.get("dn", "")
+                errors.append(f"{label}: قيمة base64 غير صحيحة في الحقل {name}.")
+                if name == "dn":
+                    # سجل بلا dn صالح: تُتجاوز حقوله حتى السجل التالي
+                    record = {}
+                continue
+        else:
+            value = value.strip()
+        if name == "dn":
+            record["dn"] = value
+            record["attrs"] = {}
+        elif "attrs" in record:
+            record["attrs"].setdefault(name, []).append(value)
+
+
+def _normalize_dn(dn: str) -> str:
+    return ",".join(part.strip() for part in re.split(r"(?<!\\),", dn)).lower()
+
+
+def _parent_dn(dn: str) -> str:
+    parts = re.split(r"(?<!\\),", _normalize_dn(dn), maxsplit=1)
+    return parts[1] if len(parts) > 1 else ""
+
+
+def parse_ldif(text: str) -> tuple[list[dict], list[dict]]:
+    """
+    استخراج الجهات (organizationalUnit) والمستخدمين من LDIF.
+    مستوى الجهة يُحدد من عمقها بين الوحدات التنظيمية في الملف،
+    وجهة المستخدم هي الوحدة التنظيمية الحاوية له.
+    """
+    units, people, errors = {}, [], []
+    for record in _ldif_records(text, errors):
+        attrs = record["attrs"]
+        classes = {value.lower() for value in attrs.get("objectclass", [])}
+        if classes & ENTITY_OBJECT_CLASSES:
+            units[_normalize_dn(record["dn"])] = attrs
+        elif classes & USER_OBJECT_CLASSES:
+            people.append(record)
+
+    def first(attrs, *names):
+        for name in names:
+            if attrs.get(name):
+                return attrs[name][0]
+        return ""
+
+    codes = {dn: first(attrs, *LDIF_ENTITY_CODE_ATTRS) for dn, attrs in units.items()}
+
+    def depth(dn):
+        level = 0
+        parent = _parent_dn(dn)
+        while parent:
+            if parent in units:
+                level += 1
+            parent = _parent_dn(parent)
+        return level
+
+    entity_rows = []
+    for dn, attrs in units.items():
+        unit_depth = depth(dn)
+        if unit_depth >= len(LEVELS_BY_DEPTH):
+            errors.append(f"{dn}: عمق الوحدة التنظيمية يتجاوز المستويات المسموحة.")
+            continue
+        parent = _parent_dn(dn)
+        while parent and parent not in units:
+            parent = _parent_dn(parent)
+        entity_rows.append(
+            {
+                "code": codes[dn],
+                "name": first(attrs, "displayname", "ou"),
+                "level": LEVELS_BY_DEPTH[unit_depth],
+                "parent_code": codes.get(parent) or None,
+                "is_active": True,
+                "description": first(attrs, "description"),
+            }
+        )
+
+    user_rows = []
+    for record in people:
+        attrs = record["attrs"]
+        email = first(attrs, "mail", "userprincipalname")
+        if not email:
+            continue
+        parent = _parent_dn(record["dn"])
+        while parent and parent not in units:
+            parent = _parent_dn(parent)
+        control = first(attrs, "useraccountcontrol")
+        user_rows.append(
+            {
+                "email": email,
+                "full_name": first(attrs, "displayname", "cn") or email,
+                "entity_code": codes.get(parent) or None,
+                "role": None,
+                "phone_number": first(attrs, "telephonenumber", "mobile"),
+                "is_active": not (control.isdigit() and int(control) & ACCOUNT_DISABLED_FLAG),
+            }
+        )
+    if errors:
+        raise ValidationError(errors)
+    return entity_rows, user_rows
+
+
+def _sync_entities(rows: list[dict], errors: list[str]):
+    entities = list(Entity.objects.all())
+    by_id = {entity.id: entity for entity in entities}
+    by_code = {entity.code: entity for entity in entities if entity.code}
+    created, changed = [], set()
+
+    seen = set()
+    for row in rows:
+        code = row["code"]
+        if code in seen:
+            errors.append(f"الجهة {code}: مكررة في الملف.")
+            continue
+        seen.add(code)
+        entity = by_code.get(code)
+        if entity is None:
+            entity = Entity(code=code)
+            by_code[code] = by_id[entity.id] = entity
+            created.append(entity)
+        for field in ("name", "level", "is_active", "description"):
+            if getattr(entity, field) != row[field]:
+                setattr(entity, field, row[field])
+                changed.add(entity.id)
+
+    for row in rows:
+        entity = by_code[row["code"]]
+        parent_code = row["parent_code"]
+        parent = by_code.get(parent_code) if parent_code else None
+        if parent_code and parent is None:
+            errors.append(f"الجهة {row['code']}: الجهة الأم '{parent_code}' غير موجودة.")
+            continue
+        parent_id = parent.id if parent else None
+        if entity.parent_id != parent_id:
+            entity.parent_id = parent_id
+            changed.add(entity.id)
+
+    # التحقق من الهيكل الهرمي وترتيب الاعتماد في الذاكرة
+    depths = {}
+    for entity in by_id.values():
+        parent = by_id.get(entity.parent_id)
+        expected = ALLOWED_PARENT_LEVEL.get(entity.level)
+        if (parent.level if parent else None) != expected:
+            errors.append(f"الجهة {entity.code or entity.name}: لا تتوافق مع مستوى الجهة الأم.")
+        chain, node = [], entity
+        while node is not None and node.id not in depths:
+            if node in chain:
+                errors.append(f"الجهة {entity.code or entity.name}: حلقة في الهيكل الهرمي.")
+                break
+            chain.append(node)
+            node = by_id.get(node.parent_id)
+        else:
+            base = depths[node.id] + 1 if node is not None else 0
+            for offset, item in enumerate(reversed(chain)):
+                depths[item.id] = base + offset
+    if errors:
+        return None
+
+    ordered = sorted(by_id.values(), key=lambda entity: depths[entity.id])
+    new_ids = {entity.id for entity in created}
+    for entity in ordered:
+        before = entity._hierarchy_state()
+        entity._apply_hierarchy(by_id.get(entity.parent_id))
+        if entity.id not in new_ids and before != entity._hierarchy_state():
+            changed.add(entity.id)
+
+    updated = [entity for entity in ordered if entity.id in changed and entity.id not in new_ids]
+    created = [entity for entity in ordered if entity.id in new_ids]
+    unchanged = sum(
+        1 for code in seen if by_code[code].id not in changed and by_code[code].id not in new_ids
+    )
+    return by_code, created, updated, unchanged
+
+
+def _sync_users(rows: list[dict], entity_by_code: dict, errors: list[str]):
+    fields = ["full_name", "entity_id", "phone_number", "is_active", "role"]
+    existing = {
+        user.email.lower(): user
+        for user in User.objects.only("id", "email", "permissions_version", *fields)
+    }
+    created, updated, seen = [], [], set()
+    unchanged = 0
+    for row in rows:
+        email = User.objects.normalize_email(row["email"])
+        key = email.lower()
+        if key in seen:
+            errors.append(f"المستخدم {email}: مكرر في الملف.")
+            continue
+        seen.add(key)
+        entity_code = row["entity_code"]
+        entity = entity_by_code.get(entity_code) if entity_code else None
+        if entity_code and entity is None:
+            errors.append(f"المستخدم {email}: الجهة '{entity_code}' غير موجودة.")
+            continue
+        values = {
+            "full_name": row["full_name"],
+            "entity_id": entity.id if entity else None,
+            "phone_number": row["phone_number"],
+            "is_active": row["is_active"],
+        }
+        if row.get("role"):
+            values["role"] = row["role"]
+
+        user = existing.get(key)
+        if user is None:
+            user = User(email=email, **values)
+            user.set_unusable_password()
+            created.append(user)
+        elif any(getattr(user, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(user, field, value)
+            if user.claims_changed():
+                # bulk_update لا يمر بـ save؛ إبطال رموز الدخول يدوياً
+                user.permissions_version += 1
+            updated.append(user)
+        else:
+            unchanged += 1
+    return created, updated, unchanged
+
+
+@transaction.atomic
+def sync_directory(entity_rows=None, user_rows=None, dry_run: bool = False) -> dict:
+    """
+    تطبيق تصدير الدليل. يُرفع ValidationError بجميع الأخطاء دون أي تعديل
+    إذا كان الهيكل غير صالح، وعند dry_run يُرجع التقرير فقط.
+    """
+    errors: list[str] = []
+    synced = _sync_entities(entity_rows or [], errors)
+    if synced is None:
+        raise ValidationError(errors)
+    by_code, entities_created, entities_updated, entities_unchanged = synced
+
+    users_created, users_updated, users_unchanged = _sync_users(
+        user_rows or [], by_code, errors
+    )
+    if errors:
+        raise ValidationError(errors)
+
+    if not dry_run:
+        now = timezone.now()
+        Entity.objects.bulk_create(entities_created, batch_size=500)
+        for entity in entities_updated:
+            entity.updated_at = now
+        Entity.objects.bulk_update(
+            entities_updated,
+            ["name", "level", "parent", "is_active", "description", "updated_at", *HIERARCHY_FIELDS],
+            batch_size=500,
+        )
+        User.objects.bulk_create(users_created, batch_size=1000)
+        User.objects.bulk_update(
+            users_updated,
+            ["full_name", "entity", "phone_number", "is_active", "role", "permissions_version"],
+            batch_size=1000,
+        )
+        forget_permissions_version(*(user.pk for user in users_updated if user.claims_changed()))
+        if entities_created or entities_updated:
+            bump_version(ENTITIES_CACHE_NAMESPACE)
+        if users_created or users_updated:
+            bump_version(ROLES_CACHE_NAMESPACE)
+
+    return {
+        "dry_run": dry_run,
+        "entities": {
+            "created": len(entities_created),
+            "updated": len(entities_updated),
+            "unchanged": entities_unchanged,
+        },
+        "users": {
+            "created": len(users_created),
+            "updated": len(users_updated),
+            "unchanged": users_unchanged,
+        },
+    }
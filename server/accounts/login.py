@@ -0,0 +1,87 @@
+"""
+التحقق من بيانات الدخول مع حماية من المحاولات المتكررة
+
+- عدادات فشل في الكاش المشترك لكل حساب ولكل عنوان IP؛ عند تجاوز الحد يُرفض
+  الطلب مباشرة (429) قبل تشغيل دالة التجزئة المكلفة.
+- المستخدم غير الموجود يُشغل التجزئة أيضاً ليبقى زمن الاستجابة مماثلاً، وتُحدّث
+  تجزئة كلمة المرور عند تغيير إعدادات الخوارزمية.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from accounts.models import User
+
+
+def client_ip(request) -> str:
+    """عنوان العميل مع مراعاة NUM_PROXIES في إعدادات DRF"""
+    return BaseThrottle().get_ident(request)
+
+
+def _account_key(email: str) -> str:
+    digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+    return f"accounts:login_fail:acct:{digest}"
+
+
+def _ip_key(ip: str) -> str:
+    return f"accounts:login_fail:ip:{ip}"
+
+
+def check_attempts(email: str, ip: str) -> None:
+    """رفض الطلب إن تجاوز الحساب أو العنوان حد المحاولات الفاشلة"""
+    account_key, ip_key = _account_key(email), _ip_key(ip)
+    counts = cache.get_many([account_key, ip_key])
+    if (
+        counts.get(account_key, 0) >= settings.LOGIN_MAX_ACCOUNT_FAILURES
+        or counts.get(ip_key, 0) >= settings.LOGIN_MAX_IP_FAILURES
+    ):
+        raise Throttled(
+            wait=settings.LOGIN_FAILURE_WINDOW,
+            detail="محاولات دخول فاشلة كثيرة، يرجى المحاولة لاحقاً.",
+        )
+
+
+def record_failure(email: str, ip: str) -> None:
+    for key in (_account_key(email), _ip_key(ip)):
+        cache.add(key, 0, settings.LOGIN_FAILURE_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # انتهت صلاحية المفتاح بين add و incr
+            cache.set(key, 1, settings.LOGIN_FAILURE_WINDOW)
+
+
+def record_success(email: str) -> None:
+    cache.delete(_account_key(email))
+
+
+def _hash_check(password: str, encoded: str | None) -> bool:
+    if encoded is None:
+        # مستخدم غير موجود: تشغيل التجزئة للحفاظ على زمن استجابة مماثل
+        make_password(password)
+        return False
+    return check_password(password, encoded)
+
+
+def _find_user(email: str):
+    return User.objects.filter(**{User.USERNAME_FIELD: email}).first()
+
+
+def _finish(user, password: str, valid: bool):
+    if not valid or user is None or not user.is_active:
+        return None
+    if identify_hasher(user.password).must_update(user.password):
+        user.set_password(password)
+        user.save(update_fields=["password"])
+    return user
+
+
+def verify_credentials(email: str, password: str):
+    """المستخدم المفعل المطابق للبريد وكلمة المرور، أو None"""
+    user = _find_user(email)
+    valid = _hash_check(password, user.password if user else None)
+    return _finish(user, password, valid)
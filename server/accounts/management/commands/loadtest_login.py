@@ -0,0 +1,106 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from accounts.views import CustomTokenObtainPairView
+
+EMAIL_DOMAIN = "loadtest.invalid"
+PASSWORD = "LoadTest#2024"
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a semester-start login burst against the token endpoint and report "
+        "sustained logins/sec. Temporary users are created and removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Distinct accounts logging in.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients.")
+        parser.add_argument("--duration", type=float, default=20.0, help="Test length in seconds.")
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0.05,
+            help="Fraction of attempts sent with a wrong password.",
+        )
+
+    def handle(self, *args, **options):
+        emails = self._create_users(options["users"])
+        try:
+            results = self._run(emails, options)
+        finally:
+            User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+        self._report(results, options["duration"])
+
+    def _create_users(self, count):
+        encoded = make_password(PASSWORD)
+        users = [
+            User(email=f"user{i}@{EMAIL_DOMAIN}", full_name=f"Load Test {i}", password=encoded)
+            for i in range(count)
+        ]
+        User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+        User.objects.bulk_create(users, batch_size=1000)
+        return [user.email for user in users]
+
+    def _run(self, emails, options):
+        view = CustomTokenObtainPairView.as_view()
+        factory = APIRequestFactory()
+        deadline = time.monotonic() + options["duration"]
+        results = []
+        lock = threading.Lock()
+
+        def client(seed):
+            rng = random.Random(seed)
+            local = []
+            try:
+                while time.monotonic() < deadline:
+                    index = rng.randrange(len(emails))
+                    wrong = rng.random() < options["failure_rate"]
+                    request = factory.post(
+                        "/api/auth/token/",
+                        {"email": emails[index], "password": "wrong" if wrong else PASSWORD},
+                        format="json",
+                        REMOTE_ADDR=f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+                    )
+                    started = time.perf_counter()
+                    response = view(request)
+                    local.append((response.status_code, time.perf_counter() - started))
+            finally:
+                connection.close()
+                with lock:
+                    results.extend(local)
+
+        threads = [
+            threading.Thread(target=client, args=(seed,)) for seed in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _report(self, results, duration):
+        if not results:
+            self.stdout.write("No requests completed.")
+            return
+        statuses = Counter(status for status, _ in results)
+        latencies = sorted(latency * 1000 for _, latency in results)
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]  # noqa: E731
+
+        self.stdout.write(f"Requests:        {len(results)}")
+        self.stdout.write(f"Status codes:    {dict(sorted(statuses.items()))}")
+        self.stdout.write(f"Logins/sec:      {statuses[200] / duration:.1f}")
+        self.stdout.write(f"Requests/sec:    {len(results) / duration:.1f}")
+        self.stdout.write(
+            f"Latency ms:      p50={statistics.median(latencies):.1f} "
+            f"p95={percentile(0.95):.1f} p99={percentile(0.99):.1f}"
+        )
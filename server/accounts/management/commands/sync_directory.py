@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from accounts.directory import parse_entities_csv, parse_ldif, parse_users_csv, sync_directory
+
+
+class Command(BaseCommand):
+    help = "Sync entities and users from a directory export (LDIF or CSV files)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ldif", help="LDIF export containing OUs and users.")
+        parser.add_argument("--entities", help="Entities CSV (code,name,level,parent_code,...).")
+        parser.add_argument("--users", help="Users CSV (email,full_name,entity_code,role,...).")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without saving.")
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding="utf-8-sig") as handle:
+            return handle.read()
+
+    def handle(self, *args, **options):
+        if not any(options[name] for name in ("ldif", "entities", "users")):
+            raise CommandError("Provide --ldif and/or --entities/--users.")
+        try:
+            entity_rows, user_rows = [], []
+            if options["ldif"]:
+                entity_rows, user_rows = parse_ldif(self._read(options["ldif"]))
+            if options["entities"]:
+                entity_rows += parse_entities_csv(self._read(options["entities"]))
+            if options["users"]:
+                user_rows += parse_users_csv(self._read(options["users"]))
+            report = sync_directory(entity_rows, user_rows, dry_run=options["dry_run"])
+        except ValidationError as exc:
+            raise CommandError(f"Directory sync failed: {exc.detail}")
+
+        prefix = "[dry run] " if report["dry_run"] else ""
+        for kind in ("entities", "users"):
+            counts = report[kind]
+            self.stdout.write(
+                f"{prefix}{kind}: {counts['created']} created, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+            )
+        self.stdout.write(self.style.SUCCESS("Directory sync complete."))
@@ -0,0 +1,32 @@
+import logging
+
+from django.conf import settings
+
+from accounts.context import CONTEXT_ATTR
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionInstrumentationMiddleware:
+    """
+    قياس عدد عمليات التحقق من الصلاحيات في كل طلب (ترويسة X-Permission-Evaluations
+    وسجل debug بالتفاصيل) عند تفعيل PERMISSION_INSTRUMENTATION
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        context = getattr(request, CONTEXT_ATTR, None)
+        if context is not None and settings.PERMISSION_INSTRUMENTATION:
+            total = sum(context.evaluations.values())
+            response["X-Permission-Evaluations"] = str(total)
+            logger.debug(
+                "%s %s: %d permission evaluations %s",
+                request.method,
+                request.path,
+                total,
+                dict(context.evaluations),
+            )
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:59
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_entity_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimsUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('accounts.user',),
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='permissions_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='يزداد عند تغيير الدور أو الجهة أو التفعيل لإبطال رموز الدخول السابقة', verbose_name='إصدار الصلاحيات'),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.conf import settings
 
+from accounts.tokens import forget_permissions_version
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -70,6 +72,12 @@ class User(AbstractUser):
         choices=Role.choices,
         default=Role.CONSUMER,
     )
+    permissions_version = models.PositiveIntegerField(
+        "إصدار الصلاحيات",
+        default=0,
+        editable=False,
+        help_text="يزداد عند تغيير الدور أو الجهة أو التفعيل لإبطال رموز الدخول السابقة",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS: list[str] = []
@@ -81,9 +89,39 @@ class User(AbstractUser):
         verbose_name_plural = "المستخدمون"
         ordering = ["full_name"]
 
+    # الحقول المضمنة في رموز JWT؛ تغيير أي منها يرفع permissions_version
+    CLAIM_FIELDS = ("role", "entity_id", "is_active", "is_superuser")
+
     def __str__(self) -> str:
         return self.full_name or self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.claims_state()
+        return instance
+
+    def claims_state(self) -> dict:
+        loaded = self.__dict__
+        return {field: loaded[field] for field in self.CLAIM_FIELDS if field in loaded}
+
+    def claims_changed(self) -> bool:
+        loaded = getattr(self, "_loaded_claims", None)
+        if loaded is None:
+            return False
+        current = self.claims_state()
+        return any(current.get(field) != value for field, value in loaded.items())
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and self.claims_changed():
+            self.permissions_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "permissions_version"}
+            forget_permissions_version(self.pk)
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.claims_state()
+
     @property
     def is_admin(self) -> bool:
         """للتوافق مع الكود القديم"""
@@ -118,3 +156,31 @@ class User(AbstractUser):
         return self.role in [self.Role.APPROVER, self.Role.PRINT_MANAGER]
 
 
+class ClaimsUser(User):
+    """
+    مستخدم مبني من بيانات رمز JWT دون استعلام؛ الحقول غير المضمنة في الرمز
+    مؤجلة، وعند الوصول لأي منها تُحمّل جميعها باستعلام واحد.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, role, entity_id, is_superuser, permissions_version):
+        known = {
+            "id": user_id,
+            "role": role,
+            "entity_id": entity_id,
+            "is_active": True,
+            "is_superuser": is_superuser,
+            "permissions_version": permissions_version,
+        }
+        fields = [f.attname for f in cls._meta.concrete_fields if f.attname in known]
+        return cls.from_db("default", fields, [known[name] for name in fields])
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields)
+
@@ -1,50 +1,50 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from accounts.context import get_permission_context
+
+
+class RolePermission(BasePermission):
+    """صلاحية مبنية على أدوار المستخدم المحسوبة مرة واحدة في سياق الطلب"""
+
+    capabilities: tuple = ()
 
-class IsSystemAdmin(BasePermission):
-    """للتوافق مع الكود القديم"""
     def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_admin)
+        context = get_permission_context(request)
+        return context.is_authenticated and context.has(
+            *self.capabilities, check=type(self).__name__
+        )
+
+
+class IsSystemAdmin(RolePermission):
+    """للتوافق مع الكود القديم"""
+    capabilities = ("admin",)
 
 
-class IsPrintManager(BasePermission):
+class IsPrintManager(RolePermission):
     """مدير المطبعة - صلاحيات كاملة"""
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_print_manager)
+    capabilities = ("print_manager",)
 
 
-class IsDeptManager(BasePermission):
+class IsDeptManager(RolePermission):
     """مدير القسم - صلاحيات محدودة"""
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_dept_manager)
+    capabilities = ("dept_manager",)
 
 
-class IsDeptEmployee(BasePermission):
+class IsDeptEmployee(RolePermission):
     """موظف القسم - صلاحيات تنفيذية"""
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_dept_employee)
+    capabilities = ("dept_employee",)
 
 
-class IsTrainingSupervisor(BasePermission):
+class IsTrainingSupervisor(RolePermission):
     """مشرف التدريب"""
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_training_supervisor)
+    capabilities = ("training_supervisor",)
 
 
-class IsApprover(BasePermission):
+class IsApprover(RolePermission):
     """للتوافق مع الكود القديم"""
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_approver)
+    capabilities = ("approver",)
 
 
 class ReadOnly(BasePermission):
     def has_permission(self, request, view):
         return request.method in SAFE_METHODS
-
-
@@ -0,0 +1,81 @@
+"""
+فهرس أعضاء الأدوار (دور ← المستخدمون المفعلون) مع تفضيلات الإشعارات
+
+تُوزع الإشعارات على الموظفين حسب الدور (طلب جديد، تجاوز مهلة، انخفاض مخزون)،
+فيُحفظ لكل دور قائمة أعضائه وتفضيلاتهم في الكاش المشترك، ويُبطل الفهرس كاملاً
+بتغيير إصدار "roles" عند تعديل دور مستخدم أو تفعيله أو تفضيلاته. بذلك لا يحتاج
+تحديد المستلمين أي استعلام في الحالة المستقرة.
+"""
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from accounts.models import User
+from notifications.models import NotificationPreference
+from system.cache import versioned_key
+
+ROLES_CACHE_NAMESPACE = "roles"
+
+PREFERENCE_FIELDS = (
+    "order_updates",
+    "approvals",
+    "inventory_alerts",
+    "weekly_digest",
+    "email_subscription",
+)
+# القيم الافتراضية لمن لم يُنشأ له سجل تفضيلات بعد
+DEFAULT_PREFERENCES = tuple(
+    NotificationPreference._meta.get_field(name).default for name in PREFERENCE_FIELDS
+)
+
+# الأدوار التي يحق لها تحديث حالة الطلبات (تستقبل إشعار الطلبات الجديدة)
+ORDER_STAFF_ROLES = (
+    User.Role.PRINT_MANAGER,
+    User.Role.DEPT_MANAGER,
+    User.Role.DEPT_EMPLOYEE,
+    User.Role.ADMIN,  # للتوافق
+    User.Role.APPROVER,  # للتوافق
+)
+
+
+@dataclass(frozen=True)
+class RoleMember:
+    id: object
+    role: str
+    preferences: tuple
+
+    def wants(self, preference: str) -> bool:
+        return self.preferences[PREFERENCE_FIELDS.index(preference)]
+
+
+def _load(roles) -> dict:
+    members = {role: [] for role in roles}
+    users = User.objects.filter(role__in=roles, is_active=True).values_list(
+        "id", "role", *(f"notification_preferences__{name}" for name in PREFERENCE_FIELDS)
+    )
+    for user_id, role, *flags in users.order_by("full_name"):
+        preferences = DEFAULT_PREFERENCES if flags[0] is None else tuple(flags)
+        members[role].append(RoleMember(user_id, role, preferences))
+    return {role: tuple(items) for role, items in members.items()}
+
+
+def members(*roles) -> list[RoleMember]:
+    """أعضاء الأدوار المطلوبة؛ الأدوار غير المخزنة تُحمل معاً باستعلام واحد"""
+    keys = {role: versioned_key(ROLES_CACHE_NAMESPACE, role) for role in roles}
+    cached = cache.get_many(keys.values())
+    found = {role: cached[key] for role, key in keys.items() if key in cached}
+    missing = [role for role in roles if role not in found]
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({keys[role]: loaded[role] for role in missing}, None)
+        found.update(loaded)
+    return [member for role in roles for member in found[role]]
+
+
+def recipient_ids(*roles, preference: str | None = None) -> list:
+    """معرفات المستخدمين المفعلين في الأدوار (دون تكرار)، مع تصفية اختيارية بتفضيل إشعار"""
+    result = {}
+    for member in members(*roles):
+        if preference is None or member.wants(preference):
+            result.setdefault(member.id, None)
+    return list(result)
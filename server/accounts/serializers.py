@@ -1,7 +1,13 @@
+from django.contrib.auth.models import update_last_login
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
+from accounts.directory import parse_entities_csv, parse_ldif, parse_users_csv
+from accounts.login import check_attempts, client_ip, record_failure, record_success, verify_credentials
 from accounts.models import User
+from accounts.tokens import stamp_claims
 from entities.models import Entity
 from entities.serializers import EntityListSerializer
 
@@ -10,11 +16,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom token serializer that uses email instead of username"""
     
     username_field = "email"
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        stamp_claims(token, user)
+        return token
     
     def validate(self, attrs):
-        # When username_field = "email", the field name in attrs is "email", not "username"
-        # The parent class will automatically use attrs[self.username_field] as the username
-        email = attrs.get(self.username_field)  # This will be "email"
+        email = attrs.get(self.username_field)
         password = attrs.get("password")
         
         if not email:
@@ -27,27 +37,42 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 {"password": "كلمة المرور مطلوبة."}
             )
         
-        # Authenticate using email as username (since USERNAME_FIELD = "email" in User model)
-        from django.contrib.auth import authenticate
-        
-        user = authenticate(username=email, password=password)
+        # رفض المحاولات المتكررة قبل تشغيل التجزئة
+        request = self.context.get("request")
+        ip = client_ip(request) if request is not None else ""
+        check_attempts(email, ip)
         
-        if not user:
+        user = verify_credentials(email, password)
+        if user is None:
+            record_failure(email, ip)
             raise serializers.ValidationError(
                 {"email": "البريد الإلكتروني أو كلمة المرور غير صحيحة."}
             )
+        record_success(email)
         
-        if not user.is_active:
-            raise serializers.ValidationError(
-                {"email": "هذا الحساب غير مفعّل."}
-            )
-        
-        # The parent class's validate method will use attrs[self.username_field] internally
-        # So we don't need to set attrs["username"] - the parent handles it
-        # Call parent validate to get tokens
-        data = super().validate(attrs)
-        
-        return data
+        # إنشاء الرموز مباشرة (validate الأصلية تعيد التحقق من كلمة المرور)
+        self.user = user
+        refresh = self.get_token(user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    تجديد رمز الوصول مع تحديث بيانات الصلاحيات من قاعدة البيانات
+    (استعلام واحد لكل تجديد بدلاً من استعلام لكل طلب)
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            pk=refresh[jwt_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if user is None:
+            raise AuthenticationFailed("الحساب غير موجود أو غير مفعّل.", code="user_inactive")
+        stamp_claims(refresh, user)
+        return super().validate({**attrs, "refresh": str(refresh)})
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -97,3 +122,33 @@ class UserCreateSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save(update_fields=["password"])
         return user
+
+
+class DirectorySyncSerializer(serializers.Serializer):
+    """
+    ملفات تصدير الدليل: ldif (جهات ومستخدمون معاً) أو entities و/أو users بصيغة CSV
+    """
+
+    ldif = serializers.FileField(required=False)
+    entities = serializers.FileField(required=False)
+    users = serializers.FileField(required=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+    @staticmethod
+    def _read(upload):
+        try:
+            return upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise serializers.ValidationError("يجب أن يكون الملف بترميز UTF-8.")
+
+    def validate(self, attrs):
+        if not any(attrs.get(name) for name in ("ldif", "entities", "users")):
+            raise serializers.ValidationError("يجب إرفاق ملف LDIF أو ملفات CSV للجهات والمستخدمين.")
+        entity_rows, user_rows = [], []
+        if attrs.get("ldif"):
+            entity_rows, user_rows = parse_ldif(self._read(attrs["ldif"]))
+        if attrs.get("entities"):
+            entity_rows += parse_entities_csv(self._read(attrs["entities"]))
+        if attrs.get("users"):
+            user_rows += parse_users_csv(self._read(attrs["users"]))
+        return {"entity_rows": entity_rows, "user_rows": user_rows, "dry_run": attrs["dry_run"]}
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.roles import ROLES_CACHE_NAMESPACE
+from accounts.tokens import forget_permissions_version
+from notifications.models import NotificationPreference
+from system.cache import bump_version
+
+
+@receiver(post_save, sender=User)
+def invalidate_role_index(sender, instance, created, **kwargs):
+    # claims_changed يشمل الدور والتفعيل (يُقرأ قبل تحديث الحالة المحملة في save)
+    if created or instance.claims_changed():
+        bump_version(ROLES_CACHE_NAMESPACE)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    forget_permissions_version(instance.pk)
+    bump_version(ROLES_CACHE_NAMESPACE)
+
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def invalidate_role_index_preferences(sender, instance, **kwargs):
+    bump_version(ROLES_CACHE_NAMESPACE)
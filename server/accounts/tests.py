@@ -0,0 +1,198 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.context import PermissionContext
+from accounts.models import ClaimsUser, User
+from accounts.roles import recipient_ids
+from accounts.tokens import permissions_version_key
+from entities.models import Entity
+from notifications.models import NotificationPreference
+
+
+ENTITIES_CSV = """code,name,level,parent_code
+VR1,وكالة الشؤون الأكاديمية,vice_rectorate,
+COL1,كلية العلوم,college_deanship,VR1
+DEP1,قسم الفيزياء,department_unit,COL1
+"""
+
+USERS_CSV = """email,full_name,entity_code,role
+Ali@taibahu.edu.sa,علي,DEP1,dept_employee
+sara@taibahu.edu.sa,سارة,COL1,
+"""
+
+
+class DirectorySyncTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@taibahu.edu.sa", password="StrongPass123", full_name="Admin"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _sync(self, entities, users="", dry_run=False):
+        data = {"entities": SimpleUploadedFile("entities.csv", entities.encode("utf-8"))}
+        if users:
+            data["users"] = SimpleUploadedFile("users.csv", users.encode("utf-8"))
+        if dry_run:
+            data["dry_run"] = True
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/accounts/users/sync/", data, format="multipart")
+
+    def test_sync_creates_then_updates(self):
+        response = self._sync(ENTITIES_CSV, USERS_CSV, dry_run=True)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["entities"]["created"], 3)
+        self.assertFalse(Entity.objects.exists())
+
+        response = self._sync(ENTITIES_CSV, USERS_CSV)
+        self.assertEqual(response.data["users"]["created"], 2)
+        department = Entity.objects.get(code="DEP1")
+        self.assertEqual(department.full_path, "وكالة الشؤون الأكاديمية / كلية العلوم / قسم الفيزياء")
+        user = User.objects.get(email__iexact="ali@taibahu.edu.sa")
+        self.assertEqual(user.entity, department)
+        self.assertFalse(user.has_usable_password())
+
+        renamed = ENTITIES_CSV.replace("كلية العلوم", "كلية العلوم التطبيقية")
+        response = self._sync(renamed)
+        # القسم يُحدَّث أيضاً لأن مساره الكامل المخزن تغير
+        self.assertEqual(response.data["entities"], {"created": 0, "updated": 2, "unchanged": 1})
+        department.refresh_from_db()
+        self.assertIn("كلية العلوم التطبيقية", department.full_path)
+
+    def test_invalid_hierarchy_is_rejected_without_changes(self):
+        invalid = ENTITIES_CSV + "DEP2,قسم,department_unit,VR1\n"
+        response = self._sync(invalid)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Entity.objects.exists())
+
+    def test_malformed_ldif_base64_is_reported(self):
+        ldif = (
+            "dn: ou=Science,dc=taibahu\n"
+            "objectClass: organizationalUnit\n"
+            "ou: Science\n"
+            "description:: not*base64\n"
+        )
+        upload = SimpleUploadedFile("directory.ldif", ldif.encode("utf-8"))
+        response = self.client.post(
+            "/api/accounts/users/sync/", {"ldif": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ou=Science,dc=taibahu", str(response.data))
+        self.assertFalse(Entity.objects.exists())
+
+
+@override_settings(JWT_STATELESS_AUTH=True)
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="manager@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Print Manager",
+            role=User.Role.PRINT_MANAGER,
+        )
+        self.client = APIClient()
+
+    def _login(self):
+        response = self.client.post(
+            "/api/auth/token/", {"email": self.user.email, "password": "StrongPass123"}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_role_change_revokes_tokens_until_refresh(self):
+        tokens = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.get("/api/accounts/users/")
+        self.assertEqual(response.status_code, 200)
+        request_user = response.wsgi_request.user
+        self.assertIsInstance(request_user, ClaimsUser)
+        self.assertIn("full_name", request_user.get_deferred_fields())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = User.Role.CONSUMER
+            self.user.save()
+        self.assertEqual(self.client.get("/api/accounts/users/").status_code, 401)
+
+        refreshed = self.client.post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(refreshed.status_code, 200, refreshed.data)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+        self.assertEqual(self.client.get("/api/accounts/users/").status_code, 403)
+        self.assertEqual(self.client.get("/api/accounts/users/me/").data["full_name"], "Print Manager")
+
+    def test_revocation_from_another_process_is_seen_on_cache_miss(self):
+        tokens = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get("/api/accounts/users/").status_code, 200)
+
+        # عملية أخرى رفعت الإصدار (دون إشارات هذه العملية)، وانتهت القيمة المخزنة هنا
+        User.objects.filter(pk=self.user.pk).update(
+            permissions_version=self.user.permissions_version + 1
+        )
+        cache.delete(permissions_version_key(self.user.pk))
+        self.assertEqual(self.client.get("/api/accounts/users/").status_code, 401)
+
+
+class RoleIndexTests(TestCase):
+    def test_recipients_cached_until_role_or_preference_changes(self):
+        manager = User.objects.create_user(
+            email="pm@taibahu.edu.sa", password="StrongPass123", full_name="PM",
+            role=User.Role.PRINT_MANAGER,
+        )
+        employee = User.objects.create_user(
+            email="emp@taibahu.edu.sa", password="StrongPass123", full_name="Emp",
+            role=User.Role.DEPT_EMPLOYEE,
+        )
+        roles = (User.Role.PRINT_MANAGER, User.Role.DEPT_EMPLOYEE)
+        self.assertEqual(set(recipient_ids(*roles)), {manager.id, employee.id})
+        with self.assertNumQueries(0):
+            recipient_ids(*roles, preference="order_updates")
+
+        NotificationPreference.objects.create(user=employee, order_updates=False)
+        self.assertEqual(recipient_ids(*roles, preference="order_updates"), [manager.id])
+
+        manager.is_active = False
+        manager.save()
+        self.assertEqual(recipient_ids(*roles), [employee.id])
+
+
+class LoginThrottleTests(TestCase):
+    def test_repeated_failures_are_rejected_before_hashing(self):
+        User.objects.create_user(
+            email="locked@taibahu.edu.sa", password="StrongPass123", full_name="Locked"
+        )
+        client = APIClient()
+        payload = {"email": "locked@taibahu.edu.sa", "password": "wrong-password"}
+        for _ in range(settings.LOGIN_MAX_ACCOUNT_FAILURES):
+            self.assertEqual(client.post("/api/auth/token/", payload).status_code, 400)
+
+        with patch("accounts.serializers.verify_credentials") as verify:
+            payload["password"] = "StrongPass123"
+            response = client.post("/api/auth/token/", payload)
+        self.assertEqual(response.status_code, 429)
+        verify.assert_not_called()
+
+
+@override_settings(PERMISSION_INSTRUMENTATION=True)
+class PermissionContextTests(TestCase):
+    def test_roles_and_scope_computed_once_per_request(self):
+        user = User.objects.create_user(
+            email="approver@taibahu.edu.sa", password="StrongPass123", full_name="Approver",
+            role=User.Role.APPROVER,
+        )
+        context = PermissionContext(user)
+        self.assertEqual(context.roles, {"approver"})
+        first = context.scope_filter({"admin"}, role_lookups={"approver": ("current_approver_id",)})
+        again = context.scope_filter({"admin"}, role_lookups={"approver": ("current_approver_id",)})
+        self.assertIs(first, again)
+        self.assertEqual(context.evaluations["scope"], 2)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get("/api/print-orders/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response["X-Permission-Evaluations"]), 0)
@@ -0,0 +1,36 @@
+"""
+بيانات الصلاحيات المضمنة في رموز JWT
+
+يحمل رمز الوصول الدور والجهة ورقم إصدار الصلاحيات، فتعمل فئات الصلاحيات
+وتصفية get_queryset دون تحميل صف المستخدم في كل طلب. أي تغيير في الدور أو
+الجهة أو التفعيل يرفع رقم الإصدار فتُرفض الرموز الصادرة قبله.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+ROLE_CLAIM = "role"
+ENTITY_CLAIM = "entity_id"
+SUPERUSER_CLAIM = "is_superuser"
+VERSION_CLAIM = "perm_ver"
+
+# مدة حفظ رقم الإصدار في الكاش (تحد من التأخير عند استخدام كاش غير مشترك)
+PERMISSIONS_VERSION_TIMEOUT = 300
+
+
+def permissions_version_key(user_id) -> str:
+    return f"accounts:perm_ver:{user_id}"
+
+
+def stamp_claims(token, user) -> None:
+    """إضافة بيانات الصلاحيات الحالية للمستخدم إلى الرمز"""
+    token[ROLE_CLAIM] = user.role
+    token[ENTITY_CLAIM] = str(user.entity_id) if user.entity_id else None
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    token[VERSION_CLAIM] = user.permissions_version
+
+
+def forget_permissions_version(*user_ids) -> None:
+    """حذف رقم الإصدار المخزن بعد تأكيد المعاملة ليُقرأ من قاعدة البيانات"""
+    keys = [permissions_version_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -5,10 +5,12 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import update_session_auth_hash
 
+from accounts.directory import sync_directory
 from accounts.models import User
 from accounts.permissions import IsSystemAdmin
 from accounts.serializers import (
     CustomTokenObtainPairSerializer,
+    DirectorySyncSerializer,
     UserCreateSerializer,
     UserSerializer,
 )
@@ -21,7 +23,7 @@ class UserViewSet(
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = User.objects.all().order_by("full_name")
+    queryset = User.objects.select_related("entity").order_by("full_name")
     permission_classes = [IsAuthenticated & IsSystemAdmin]
 
     def get_serializer_class(self):
@@ -29,6 +31,17 @@ class UserViewSet(
             return UserCreateSerializer
         return UserSerializer
 
+    @action(detail=False, methods=["post"])
+    def sync(self, request):
+        """
+        مزامنة الجهات والمستخدمين من تصدير الدليل (LDIF أو CSV)
+        تُطبق جميع التعديلات في معاملة واحدة أو لا يُطبق شيء عند وجود أخطاء.
+        """
+        serializer = DirectorySyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = sync_directory(**serializer.validated_data)
+        return Response(report, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def me(self, request):
         """إرجاع بيانات المستخدم الحالي"""
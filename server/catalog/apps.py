@@ -6,3 +6,6 @@ class CatalogConfig(AppConfig):
     name = "catalog"
     verbose_name = "كتالوج الخدمات"
 
+    def ready(self):
+        import catalog.signals  # noqa
+
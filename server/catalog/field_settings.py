@@ -0,0 +1,141 @@
+"""
+إعدادات حقول الخدمات (إظهار/إخفاء، الإلزامية، الترتيب، الخيارات)
+
+- قائمة الإعدادات تُبنى باستعلامين وتُخزن في الكاش لكل إصدار للكتالوج.
+- التعديلات على عدة حقول وخياراتها تُطبق دفعة واحدة (bulk_update/bulk_create)
+  داخل معاملة واحدة، ثم يُرفع إصدار الكتالوج مرة واحدة (العمليات المجمعة لا
+  تُطلق إشارات الحفظ في catalog/signals.py).
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from catalog.models import CATALOG_CACHE_NAMESPACE, ServiceField, ServiceFieldOption
+from system.cache import bump_version, versioned_key
+
+FIELD_ATTRS = ("is_visible", "is_required", "order", "label")
+OPTION_ATTRS = ("is_active", "label", "order")
+
+
+def list_field_settings() -> list[dict]:
+    """إعدادات جميع الحقول مع خياراتها (من الكاش ما لم يتغير الكتالوج)"""
+    key = versioned_key(CATALOG_CACHE_NAMESPACE, "field-settings")
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    options = defaultdict(list)
+    for option in ServiceFieldOption.objects.values(
+        "id", "field_id", "label", "value", "is_active", "order"
+    ):
+        field_id = option.pop("field_id")
+        options[field_id].append({**option, "id": str(option["id"])})
+
+    result = [
+        {
+            "id": str(field["id"]),
+            "service_id": str(field["service_id"]),
+            "service_name": field["service__name"],
+            "key": field["key"],
+            "label": field["label"],
+            "field_type": field["field_type"],
+            "order": field["order"],
+            "is_required": field["is_required"],
+            "is_visible": field["is_visible"],
+            "options": options.get(field["id"], []),
+        }
+        for field in ServiceField.objects.values(
+            "id",
+            "service_id",
+            "service__name",
+            "key",
+            "label",
+            "field_type",
+            "order",
+            "is_required",
+            "is_visible",
+        )
+    ]
+    cache.set(key, result, None)
+    return result
+
+
+def apply_field_settings(changes: list[dict]) -> dict:
+    """
+    تطبيق تعديلات محققة [{"id", <FIELD_ATTRS>..., "options": [...]}] دفعة واحدة.
+    الخيار بمعرف يُعدل (إن كان تابعاً للحقل)، وبدونه يُنشأ؛ الخيارات لحقول radio فقط.
+    يُرجع عدد الحقول والخيارات المعدلة والمنشأة.
+    """
+    fields = ServiceField.objects.in_bulk([change["id"] for change in changes])
+    missing = [str(change["id"]) for change in changes if change["id"] not in fields]
+    if missing:
+        raise serializers.ValidationError({"id": [f"الحقل غير موجود: {', '.join(missing)}"]})
+
+    option_changes = {
+        change["id"]: change.get("options", [])
+        for change in changes
+        if fields[change["id"]].field_type == ServiceField.FieldType.RADIO
+    }
+    existing = ServiceFieldOption.objects.filter(field_id__in=option_changes).in_bulk()
+    taken = defaultdict(set)
+    for option in existing.values():
+        taken[option.field_id].add(option.value)
+
+    now = timezone.now()
+    field_updates, field_attrs = [], {"updated_at"}
+    option_updates, option_attrs, option_creates = [], set(), []
+    for change in changes:
+        field = fields[change["id"]]
+        attrs = [attr for attr in FIELD_ATTRS if attr in change]
+        for attr in attrs:
+            setattr(field, attr, change[attr])
+        if attrs:
+            field.updated_at = now
+            field_attrs.update(attrs)
+            field_updates.append(field)
+
+        for option_data in option_changes.get(field.id, []):
+            if "id" in option_data:
+                option = existing.get(option_data["id"])
+                if option is None or option.field_id != field.id:
+                    continue
+                attrs = [attr for attr in OPTION_ATTRS if attr in option_data]
+                for attr in attrs:
+                    setattr(option, attr, option_data[attr])
+                if attrs:
+                    option_attrs.update(attrs)
+                    option_updates.append(option)
+                continue
+            value = option_data.get("value", "")
+            if not value or value in taken[field.id]:
+                raise serializers.ValidationError(
+                    {field.key: [f"قيمة الخيار «{value}» فارغة أو مكررة."]}
+                )
+            taken[field.id].add(value)
+            option_creates.append(
+                ServiceFieldOption(
+                    field=field,
+                    label=option_data.get("label", ""),
+                    value=value,
+                    is_active=option_data.get("is_active", True),
+                    order=option_data.get("order", 1),
+                )
+            )
+
+    with transaction.atomic():
+        if field_updates:
+            ServiceField.objects.bulk_update(field_updates, sorted(field_attrs))
+        if option_updates:
+            ServiceFieldOption.objects.bulk_update(option_updates, sorted(option_attrs))
+        if option_creates:
+            ServiceFieldOption.objects.bulk_create(option_creates)
+        if field_updates or option_updates or option_creates:
+            bump_version(CATALOG_CACHE_NAMESPACE)
+    return {
+        "fields_updated": len(field_updates),
+        "options_updated": len(option_updates),
+        "options_created": len(option_creates),
+    }
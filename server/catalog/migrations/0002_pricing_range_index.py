@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicepricing',
+            index=models.Index(fields=['service', 'effective_from', 'effective_to'], name='pricing_service_range_idx'),
+        ),
+    ]
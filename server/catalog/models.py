@@ -3,6 +3,9 @@ import uuid
 from django.db import models
 from django.utils.text import slugify
 
+# نطاق إصدار الكاش للكتالوج (يتغير مع أي تعديل على الخدمات وحقولها وتسعيراتها)
+CATALOG_CACHE_NAMESPACE = "catalog"
+
 
 class Service(models.Model):
     class Category(models.TextChoices):
@@ -115,6 +118,13 @@ class ServicePricing(models.Model):
         verbose_name = "تسعيرة خدمة"
         verbose_name_plural = "تسعيرات الخدمات"
         ordering = ["-effective_from"]
+        indexes = [
+            # البحث عن التسعيرة السارية لخدمة في تاريخ معين (orders/costing.py)
+            models.Index(
+                fields=["service", "effective_from", "effective_to"],
+                name="pricing_service_range_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.service.name} - {self.internal_cost} ريال"
@@ -0,0 +1,26 @@
+"""
+إبطال الكاش المرتبط بالكتالوج عند أي تعديل على الخدمات وحقولها وخياراتها وتسعيراتها
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import (
+    CATALOG_CACHE_NAMESPACE,
+    Service,
+    ServiceField,
+    ServiceFieldOption,
+    ServicePricing,
+)
+from system.cache import bump_version
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=ServiceField)
+@receiver(post_save, sender=ServiceFieldOption)
+@receiver(post_save, sender=ServicePricing)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=ServiceField)
+@receiver(post_delete, sender=ServiceFieldOption)
+@receiver(post_delete, sender=ServicePricing)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_version(CATALOG_CACHE_NAMESPACE)
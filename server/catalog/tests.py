@@ -0,0 +1,127 @@
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import Service, ServiceField, ServiceFieldOption
+from catalog.validation import get_validator
+
+
+class ServiceCatalogCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="consumer@taibahu.edu.sa", password="StrongPass123", full_name="Consumer"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service = Service.objects.create(name="طباعة مستندات")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_served_from_cache_with_etag(self):
+        response = self.client.get("/api/catalog/services/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(response.json()["results"][0]["name"], "طباعة مستندات")
+
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/catalog/services/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ServiceField.objects.create(service=self.service, key="pages", label="عدد الصفحات")
+        response = self.client.get("/api/catalog/services/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["results"][0]["fields"][0]["key"], "pages")
+
+
+class ServiceFormValidatorTests(TestCase):
+    def test_compiled_validator_checks_types_options_and_config(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            service = Service.objects.create(name="بطاقات عمل")
+            quantity = ServiceField.objects.create(
+                service=service, key="quantity", label="الكمية", is_required=True,
+                field_type=ServiceField.FieldType.NUMBER, config={"min": 1, "integer": True},
+            )
+            color = ServiceField.objects.create(
+                service=service, key="color", label="اللون", field_type=ServiceField.FieldType.RADIO,
+            )
+            color.options.create(label="ملون", value="color")
+            color.options.create(label="أبيض وأسود", value="bw", is_active=False)
+            ServiceField.objects.create(
+                service=service, key="internal", label="داخلي", is_visible=False, is_required=True,
+            )
+
+        validator = get_validator(service.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(get_validator(service.pk), validator)
+            cleaned = validator.validate(
+                [{"field": str(quantity.id), "value": "250"}, {"field": color.id, "value": "color"}]
+            )
+        self.assertEqual(dict(cleaned), {str(quantity.id): 250, str(color.id): "color"})
+
+        with self.assertRaises(ValidationError) as raised:
+            validator.validate([{"field": str(quantity.id), "value": "2.5"}, {"field": str(color.id), "value": "bw"}])
+        self.assertEqual(set(raised.exception.detail), {"quantity", "color"})
+        with self.assertRaises(ValidationError) as raised:
+            validator.validate([])
+        self.assertEqual(set(raised.exception.detail), {"quantity"})
+
+
+class FieldSettingsBulkTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="manager@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Manager",
+            role=User.Role.PRINT_MANAGER,
+        )
+        self.service = Service.objects.create(name="طباعة")
+        self.size = ServiceField.objects.create(
+            service=self.service, key="size", label="المقاس", field_type="radio"
+        )
+        self.a4 = ServiceFieldOption.objects.create(field=self.size, label="A4", value="a4")
+        self.notes = ServiceField.objects.create(service=self.service, key="notes", label="ملاحظات")
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_bulk_update_applies_all_changes_and_refreshes_list(self):
+        listed = self.client.get("/api/system/field-settings/list/").json()
+        self.assertEqual([field["key"] for field in listed], ["size", "notes"])
+        with self.assertNumQueries(0):
+            self.client.get("/api/system/field-settings/list/")
+
+        response = self.client.put(
+            "/api/system/field-settings/bulk-update/",
+            [
+                {
+                    "id": str(self.size.id),
+                    "is_required": True,
+                    "options": [
+                        {"id": str(self.a4.id), "is_active": False},
+                        {"label": "A3", "value": "a3", "order": 2},
+                    ],
+                },
+                {"id": str(self.notes.id), "is_visible": False, "order": 5},
+            ],
+            format="json",
+        )
+        self.assertEqual(
+            response.data, {"fields_updated": 2, "options_updated": 1, "options_created": 1}
+        )
+
+        listed = {field["key"]: field for field in self.client.get("/api/system/field-settings/list/").json()}
+        self.assertTrue(listed["size"]["is_required"])
+        self.assertEqual(
+            [(option["value"], option["is_active"]) for option in listed["size"]["options"]],
+            [("a4", False), ("a3", True)],
+        )
+        self.assertFalse(listed["notes"]["is_visible"])
+
+        duplicate = self.client.put(
+            "/api/system/field-settings/bulk-update/",
+            [{"id": str(self.size.id), "options": [{"label": "A4", "value": "a4"}]}],
+            format="json",
+        )
+        self.assertEqual(duplicate.status_code, 400)
+
@@ -0,0 +1,211 @@
+"""
+التحقق من قيم حقول الخدمة (النماذج الديناميكية)
+
+تُحوَّل تعريفات حقول كل خدمة إلى كائن تحقق (ServiceFormValidator) مرة واحدة
+لكل إصدار للكتالوج ويُحفظ في ذاكرة العملية، فيتم التحقق من الطلب في Python
+دون أي استعلام. يشمل التحقق: الحقول الإلزامية، تجاهل الحقول المخفية، تحويل
+الأنواع، قيم الاختيارات المسموح بها، وقيود ServiceField.config:
+
+- number: min, max, integer
+- text / textarea: min_length, max_length, pattern
+- link: max_length (مع التحقق من صيغة الرابط)
+- file: extensions (قائمة الامتدادات المسموح بها)
+
+القيم الفارغة في الحقول الاختيارية تُحفظ كما هي دون تحويل.
+"""
+import re
+import threading
+import uuid
+from dataclasses import dataclass, field as dataclass_field
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import URLValidator
+from rest_framework import serializers
+
+from catalog.models import CATALOG_CACHE_NAMESPACE, ServiceField
+from system.cache import get_version
+
+FieldType = ServiceField.FieldType
+
+_url_validator = URLValidator()
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or value == []
+
+
+def _normalize_id(value) -> str:
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return str(value or "")
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    id: str
+    key: str
+    label: str
+    field_type: str
+    required: bool
+    visible: bool
+    options: frozenset
+    config: dict = dataclass_field(default_factory=dict)
+    pattern: re.Pattern | None = None
+
+    def clean(self, value):
+        """القيمة بعد التحويل، أو ValueError برسالة الخطأ"""
+        cleaner = getattr(self, f"_clean_{self.field_type}", self._clean_text)
+        return cleaner(value)
+
+    def _clean_text(self, value):
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise ValueError("يجب أن تكون القيمة نصاً.")
+        value = str(value).strip()
+        min_length, max_length = self.config.get("min_length"), self.config.get("max_length")
+        if min_length is not None and len(value) < min_length:
+            raise ValueError(f"يجب ألا يقل طول النص عن {min_length} حرف.")
+        if max_length is not None and len(value) > max_length:
+            raise ValueError(f"يجب ألا يزيد طول النص عن {max_length} حرف.")
+        if self.pattern is not None and not self.pattern.fullmatch(value):
+            raise ValueError("صيغة القيمة غير صحيحة.")
+        return value
+
+    _clean_textarea = _clean_text
+
+    def _clean_number(self, value):
+        if isinstance(value, bool):
+            raise ValueError("يجب أن تكون القيمة رقماً.")
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError("يجب أن تكون القيمة رقماً.")
+        if not number.is_finite():
+            raise ValueError("يجب أن تكون القيمة رقماً.")
+        if self.config.get("integer") and number != number.to_integral_value():
+            raise ValueError("يجب أن تكون القيمة عدداً صحيحاً.")
+        minimum, maximum = self.config.get("min"), self.config.get("max")
+        if minimum is not None and number < Decimal(str(minimum)):
+            raise ValueError(f"يجب ألا تقل القيمة عن {minimum}.")
+        if maximum is not None and number > Decimal(str(maximum)):
+            raise ValueError(f"يجب ألا تزيد القيمة عن {maximum}.")
+        return int(number) if number == number.to_integral_value() else float(number)
+
+    def _clean_radio(self, value):
+        value = str(value).strip()
+        if self.options and value not in self.options:
+            raise ValueError("القيمة المختارة غير متاحة.")
+        return value
+
+    def _clean_link(self, value):
+        value = self._clean_text(value)
+        try:
+            _url_validator(value)
+        except DjangoValidationError:
+            raise ValueError("يجب إدخال رابط صحيح.")
+        return value
+
+    def _clean_file(self, value):
+        value = self._clean_text(value)
+        extensions = self.config.get("extensions")
+        if extensions:
+            allowed = {ext.lower().lstrip(".") for ext in extensions}
+            if value.rsplit(".", 1)[-1].lower() not in allowed:
+                raise ValueError(f"امتداد الملف غير مسموح ({', '.join(sorted(allowed))}).")
+        return value
+
+
+class ServiceFormValidator:
+    def __init__(self, service_id, rules):
+        self.service_id = service_id
+        self.rules = {rule.id: rule for rule in rules}
+
+    def validate(self, submitted) -> list[tuple[str, object]]:
+        """
+        التحقق من قائمة [{"field": <id>, "value": ...}] وإرجاع [(field_id, value)]
+        للحقول الظاهرة بعد التحويل. تُجمع جميع الأخطاء حسب مفتاح الحقل.
+        """
+        errors: dict = {}
+        cleaned: dict = {}
+        for entry in submitted:
+            field_id = _normalize_id(entry.get("field"))
+            rule = self.rules.get(field_id)
+            if rule is None:
+                errors.setdefault("non_field_errors", []).append(
+                    f"الحقل {field_id or '—'} غير تابع للخدمة."
+                )
+                continue
+            if not rule.visible:
+                continue
+            if field_id in cleaned:
+                errors.setdefault(rule.key, []).append("الحقل مكرر.")
+                continue
+            value = entry.get("value")
+            if _is_empty(value):
+                # حقل الملف الإلزامي يكفي وجوده (يُرفع المرفق بعد إنشاء الطلب)
+                if rule.required and rule.field_type != FieldType.FILE:
+                    errors.setdefault(rule.key, []).append(f"حقل {rule.label} إلزامي.")
+                cleaned[field_id] = value
+                continue
+            try:
+                cleaned[field_id] = rule.clean(value)
+            except ValueError as exc:
+                errors.setdefault(rule.key, []).append(str(exc))
+
+        for rule in self.rules.values():
+            if rule.required and rule.visible and rule.id not in cleaned and rule.key not in errors:
+                errors.setdefault(rule.key, []).append(f"حقل {rule.label} إلزامي.")
+        if errors:
+            raise serializers.ValidationError(errors)
+        return list(cleaned.items())
+
+
+def build_validator(service_id) -> ServiceFormValidator:
+    fields = ServiceField.objects.filter(service_id=service_id).prefetch_related("options")
+    rules = []
+    for field in fields:
+        config = field.config if isinstance(field.config, dict) else {}
+        try:
+            pattern = re.compile(config["pattern"]) if config.get("pattern") else None
+        except (re.error, TypeError):
+            pattern = None
+        rules.append(
+            FieldRule(
+                id=str(field.id),
+                key=field.key,
+                label=field.label,
+                field_type=field.field_type,
+                required=field.is_required,
+                visible=field.is_visible,
+                options=frozenset(
+                    option.value for option in field.options.all() if option.is_active
+                ),
+                config=config,
+                pattern=pattern,
+            )
+        )
+    return ServiceFormValidator(service_id, rules)
+
+
+_validators: dict = {}
+_version: str | None = None
+_lock = threading.Lock()
+
+
+def get_validator(service_id) -> ServiceFormValidator:
+    """كائن التحقق للخدمة؛ يُبنى مرة واحدة لكل إصدار للكتالوج في كل عملية"""
+    global _version
+    version = get_version(CATALOG_CACHE_NAMESPACE)
+    key = str(service_id)
+    with _lock:
+        if _version != version:
+            _validators.clear()
+            _version = version
+        validator = _validators.get(key)
+    if validator is None:
+        validator = build_validator(service_id)
+        with _lock:
+            if _version == version:
+                _validators[key] = validator
+    return validator
@@ -1,10 +1,18 @@
-from rest_framework import filters, viewsets
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, BasePermission
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from accounts.permissions import IsSystemAdmin
-from catalog.models import Service, ServiceField, ServicePricing
+from catalog.models import CATALOG_CACHE_NAMESPACE, Service, ServiceField, ServicePricing
+from system.cache import versioned_key
 from catalog.serializers import (
     ServiceFieldSerializer,
     ServicePricingSerializer,
@@ -29,6 +37,28 @@ class ServiceViewSet(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAuthenticated, IsSystemAdmin]
         return [permission() for permission in permission_classes]
+
+    def list(self, request, *args, **kwargs):
+        """
+        قائمة الخدمات الافتراضية (دون بحث أو ترتيب) تُبنى مرة واحدة لكل إصدار
+        للكتالوج وتُخزن كـ JSON جاهز مع ETag، ويُرد بـ 304 عند عدم التغيير.
+        """
+        if request.query_params or request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        # يتضمن الرابط الكامل لأن روابط الصفحات (next/previous) مطلقة
+        key = versioned_key(CATALOG_CACHE_NAMESPACE, "services", request.build_absolute_uri())
+        cached = cache.get(key)
+        if cached is None:
+            payload = JSONRenderer().render(super().list(request, *args, **kwargs).data)
+            cached = (quote_etag(hashlib.sha256(payload).hexdigest()), payload)
+            cache.set(key, cached, None)
+        etag, payload = cached
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return HttpResponse(payload, content_type="application/json", headers={"ETag": etag})
     
     @action(detail=True, methods=["patch"], permission_classes=[IsAuthenticated & IsSystemAdmin])
     def update_approval(self, request, pk=None):
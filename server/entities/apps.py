@@ -5,3 +5,6 @@ class EntitiesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "entities"
     verbose_name = "الجهات"
+
+    def ready(self):
+        import entities.signals  # noqa
@@ -0,0 +1,110 @@
+"""
+لقطة (snapshot) للهيكل الهرمي للجهات داخل ذاكرة العملية
+
+الجهات نادراً ما تتغير لكنها تُقرأ في أغلب الطلبات، لذلك تُحمل كاملة مرة واحدة
+باستعلام واحد وتُحفظ كبيانات غير قابلة للتعديل. يُقارن رقم إصدار الجهات في
+الكاش المشترك مع كل قراءة، فأي تعديل في أي عامل (gunicorn worker) يُبطل
+اللقطة في جميع العمليات وتُعاد بناؤها عند أول طلب لاحق.
+"""
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from entities.models import Entity
+from system.cache import get_version
+
+ENTITIES_CACHE_NAMESPACE = "entities"
+
+_FIELDS = tuple(field.attname for field in Entity._meta.concrete_fields)
+
+
+@dataclass(frozen=True)
+class EntityNode:
+    id: object
+    parent_id: object
+    level: str
+    name: str
+    path: str
+    is_active: bool
+    children: tuple
+    values: tuple
+
+    def as_dict(self) -> dict:
+        return dict(zip(_FIELDS, self.values))
+
+    def to_instance(self) -> Entity:
+        """نسخة مستقلة من نموذج Entity (كأنها محملة من قاعدة البيانات)"""
+        return Entity.from_db("default", _FIELDS, self.values)
+
+
+class HierarchySnapshot:
+    def __init__(self, version: str, rows):
+        self.version = version
+        records = [(dict(zip(_FIELDS, values)), values) for values in rows]
+        children: dict = {}
+        for row, _ in records:
+            children.setdefault(row["parent_id"], []).append(row["id"])
+        nodes = {}
+        by_level: dict = {level: [] for level in Entity.Level.values}
+        for row, values in records:
+            nodes[row["id"]] = EntityNode(
+                id=row["id"],
+                parent_id=row["parent_id"],
+                level=row["level"],
+                name=row["name"],
+                path=row["path"],
+                is_active=row["is_active"],
+                children=tuple(children.get(row["id"], ())),
+                values=values,
+            )
+            by_level[row["level"]].append(row["id"])
+        self.nodes = MappingProxyType(nodes)
+        self.by_level = MappingProxyType({level: tuple(ids) for level, ids in by_level.items()})
+
+    def get(self, entity_id):
+        return self.nodes.get(entity_id)
+
+    def children(self, entity_id, active_only: bool = True) -> list[EntityNode]:
+        node = self.nodes.get(entity_id)
+        if node is None:
+            return []
+        result = [self.nodes[child_id] for child_id in node.children]
+        return [child for child in result if child.is_active] if active_only else result
+
+    def ancestors(self, entity_id) -> list[EntityNode]:
+        """الجهات الأعلى من الجذر حتى الأب"""
+        result = []
+        node = self.nodes.get(entity_id)
+        while node is not None and node.parent_id is not None:
+            node = self.nodes.get(node.parent_id)
+            if node is not None:
+                result.insert(0, node)
+        return result
+
+    def descendants(self, entity_id) -> list[EntityNode]:
+        """جميع الجهات التابعة (بحث بالعمق، مرتبة حسب الاسم داخل كل مستوى)"""
+        result = []
+        stack = list(reversed(self.nodes[entity_id].children)) if entity_id in self.nodes else []
+        while stack:
+            node = self.nodes[stack.pop()]
+            result.append(node)
+            stack.extend(reversed(node.children))
+        return result
+
+
+_snapshot: HierarchySnapshot | None = None
+_lock = threading.Lock()
+
+
+def get_snapshot() -> HierarchySnapshot:
+    """اللقطة الحالية؛ تُعاد بناؤها فقط عند تغير إصدار الجهات في الكاش المشترك"""
+    global _snapshot
+    version = get_version(ENTITIES_CACHE_NAMESPACE)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            rows = list(Entity.objects.order_by("level", "name").values_list(*_FIELDS))
+            _snapshot = HierarchySnapshot(version, rows)
+        return _snapshot
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Entity = apps.get_model("entities", "Entity")
+    parents = dict(Entity.objects.values_list("id", "parent_id"))
+
+    def build(entity_id):
+        parts = []
+        while entity_id is not None:
+            parts.insert(0, entity_id.hex)
+            entity_id = parents.get(entity_id)
+        return "/".join(parts) + "/"
+
+    entities = list(Entity.objects.only("id", "parent_id"))
+    for entity in entities:
+        entity.path = build(entity.id)
+        entity.depth = entity.path.count("/") - 1
+    Entity.objects.bulk_update(entities, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entity',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='العمق'),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='معرفات الجهات من الجذر حتى الجهة نفسها (مسار مادي للاستعلامات الشجرية)', max_length=255, verbose_name='المسار الهرمي'),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_hierarchy(apps, schema_editor):
+    Entity = apps.get_model("entities", "Entity")
+    entities = {entity.id: entity for entity in Entity.objects.order_by("depth")}
+    for entity in entities.values():
+        parent = entities.get(entity.parent_id)
+        entity.full_path = f"{parent.full_path} / {entity.name}" if parent else entity.name
+        if entity.level == "vice_rectorate":
+            entity.vice_rectorate_id = entity.id
+        else:
+            entity.vice_rectorate_id = parent.vice_rectorate_id if parent else None
+        if entity.level == "college_deanship":
+            entity.college_deanship_id = entity.id
+        elif entity.level == "department_unit":
+            entity.college_deanship_id = parent.college_deanship_id if parent else None
+    Entity.objects.bulk_update(
+        list(entities.values()),
+        ["full_path", "vice_rectorate", "college_deanship"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0002_entity_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entity',
+            name='college_deanship',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='entities.entity', verbose_name='الكلية/العمادة'),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='full_path',
+            field=models.CharField(blank=True, editable=False, max_length=1024, verbose_name='المسار الكامل'),
+        ),
+        migrations.AddField(
+            model_name='entity',
+            name='vice_rectorate',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='entities.entity', verbose_name='الوكالة/القطاع'),
+        ),
+        migrations.RunPython(populate_hierarchy, migrations.RunPython.noop),
+    ]
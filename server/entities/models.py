@@ -1,8 +1,13 @@
 import uuid
 
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
+PATH_SEPARATOR = "/"
+FULL_PATH_SEPARATOR = " / "
+
+HIERARCHY_FIELDS = ["path", "depth", "full_path", "vice_rectorate", "college_deanship"]
+
 
 class Entity(models.Model):
     """
@@ -35,6 +40,36 @@ class Entity(models.Model):
         verbose_name="الجهة الأم",
         help_text="الجهة الأعلى في الهيكل الهرمي",
     )
+    path = models.CharField(
+        "المسار الهرمي",
+        max_length=255,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="معرفات الجهات من الجذر حتى الجهة نفسها (مسار مادي للاستعلامات الشجرية)",
+    )
+    depth = models.PositiveSmallIntegerField("العمق", default=0, editable=False)
+    full_path = models.CharField(
+        "المسار الكامل", max_length=1024, blank=True, editable=False
+    )
+    vice_rectorate = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="الوكالة/القطاع",
+    )
+    college_deanship = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="الكلية/العمادة",
+    )
     is_active = models.BooleanField("نشط", default=True)
     description = models.TextField("الوصف", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -55,6 +90,8 @@ class Entity(models.Model):
     def clean(self):
         """التحقق من صحة الهيكل الهرمي"""
         if self.parent:
+            if self.path and self.parent.path.startswith(self.path):
+                raise ValidationError("لا يمكن نقل الجهة إلى إحدى الجهات التابعة لها")
             # المستوى 3 (قسم/وحدة) يجب أن يكون أبوه المستوى 2 (كلية/عمادة)
             if self.level == self.Level.DEPARTMENT_UNIT:
                 if self.parent.level != self.Level.COLLEGE_DEANSHIP:
@@ -78,38 +115,98 @@ class Entity(models.Model):
                     "يجب تحديد الجهة الأم للكلية/العمادة والقسم/الوحدة"
                 )
     
+    def _apply_hierarchy(self, parent):
+        """حساب الحقول الهرمية المخزنة من الجهة الأم"""
+        self.path = f"{parent.path if parent else ''}{self.id.hex}{PATH_SEPARATOR}"
+        self.depth = self.path.count(PATH_SEPARATOR) - 1
+        self.full_path = (
+            f"{parent.full_path}{FULL_PATH_SEPARATOR}{self.name}" if parent else self.name
+        )
+        if self.level == self.Level.VICE_RECTORATE:
+            self.vice_rectorate_id = self.id
+        else:
+            self.vice_rectorate_id = parent.vice_rectorate_id if parent else None
+        if self.level == self.Level.COLLEGE_DEANSHIP:
+            self.college_deanship_id = self.id
+        elif self.level == self.Level.DEPARTMENT_UNIT:
+            self.college_deanship_id = parent.college_deanship_id if parent else None
+        else:
+            self.college_deanship_id = None
+
+    def _hierarchy_state(self):
+        return (
+            self.path,
+            self.depth,
+            self.full_path,
+            self.vice_rectorate_id,
+            self.college_deanship_id,
+        )
+
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
-    
+        self.full_clean(exclude=["vice_rectorate", "college_deanship"])
+        old_path = self.path
+        old_state = self._hierarchy_state()
+        self._apply_hierarchy(self.parent if self.parent_id else None)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *HIERARCHY_FIELDS}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_state != self._hierarchy_state():
+                self._refresh_descendants(old_path)
+
+    def _refresh_descendants(self, old_path):
+        """
+        إعادة حساب الحقول الهرمية للشجرة الفرعية بعد النقل أو إعادة التسمية
+        (استعلام قراءة واحد ثم تحديث مجمع).
+        """
+        descendants = list(
+            Entity.objects.filter(path__startswith=old_path)
+            .exclude(pk=self.pk)
+            .order_by("depth")
+        )
+        nodes = {self.pk: self}
+        for node in descendants:
+            node._apply_hierarchy(nodes[node.parent_id])
+            nodes[node.pk] = node
+        Entity.objects.bulk_update(descendants, HIERARCHY_FIELDS, batch_size=500)
+
     @property
-    def full_path(self):
-        """إرجاع المسار الكامل للجهة في الهيكل الهرمي"""
-        path = [self.name]
-        current = self.parent
-        while current:
-            path.insert(0, current.name)
-            current = current.parent
-        return " / ".join(path)
-    
+    def ancestor_ids(self):
+        """معرفات الجهات الأعلى من الجذر حتى الأب (دون استعلامات)"""
+        return [uuid.UUID(part) for part in self.path.split(PATH_SEPARATOR)[:-2]]
+
+    def ancestors(self):
+        """الجهات الأعلى مرتبة من الجذر (استعلام واحد)"""
+        return Entity.objects.filter(id__in=self.ancestor_ids).order_by("depth")
+
+    def subtree(self):
+        """الجهة وجميع الجهات التابعة لها (استعلام واحد على المسار)"""
+        return Entity.objects.filter(path__startswith=self.path)
+
+    def descendants(self):
+        return self.subtree().exclude(pk=self.pk)
+
     def get_all_children(self):
-        """إرجاع جميع الأبناء (بما في ذلك الأحفاد)"""
-        children = list(self.children.all())
-        for child in self.children.all():
-            children.extend(child.get_all_children())
-        return children
+        """إرجاع جميع الأبناء (بما في ذلك الأحفاد) من لقطة الهيكل في الذاكرة"""
+        from entities.hierarchy import get_snapshot
+
+        return [node.to_instance() for node in get_snapshot().descendants(self.id)]
     
     def get_vice_rectorate(self):
         """إرجاع الوكالة/القطاع الأعلى في الهيكل"""
-        current = self
-        while current.parent:
-            current = current.parent
-        return current if current.level == self.Level.VICE_RECTORATE else None
+        return self._from_snapshot(self.vice_rectorate_id)
     
     def get_college_deanship(self):
         """إرجاع الكلية/العمادة التابعة لها"""
-        if self.level == self.Level.COLLEGE_DEANSHIP:
+        return self._from_snapshot(self.college_deanship_id)
+
+    def _from_snapshot(self, entity_id):
+        from entities.hierarchy import get_snapshot
+
+        if entity_id is None:
+            return None
+        if entity_id == self.id:
             return self
-        if self.level == self.Level.DEPARTMENT_UNIT and self.parent:
-            return self.parent
-        return None
+        node = get_snapshot().get(entity_id)
+        return node.to_instance() if node else None
@@ -0,0 +1,15 @@
+"""
+إبطال الكاش المرتبط بالهيكل الهرمي عند أي تعديل على الجهات
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from entities.hierarchy import ENTITIES_CACHE_NAMESPACE
+from entities.models import Entity
+from system.cache import bump_version
+
+
+@receiver(post_save, sender=Entity)
+@receiver(post_delete, sender=Entity)
+def invalidate_entity_cache(sender, **kwargs):
+    bump_version(ENTITIES_CACHE_NAMESPACE)
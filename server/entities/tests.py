@@ -1,3 +1,98 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import User
+from entities.models import Entity
+from entities.serializers import EntityListSerializer
+
+
+class EntityPathTests(TestCase):
+    def setUp(self):
+        # تنفيذ on_commit لتحديث إصدار الجهات (ومنه لقطة الهيكل في الذاكرة)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.academic = Entity.objects.create(
+                name="وكالة الشؤون الأكاديمية", level=Entity.Level.VICE_RECTORATE
+            )
+            self.research = Entity.objects.create(
+                name="وكالة البحث", level=Entity.Level.VICE_RECTORATE
+            )
+            self.college = Entity.objects.create(
+                name="كلية العلوم", level=Entity.Level.COLLEGE_DEANSHIP, parent=self.academic
+            )
+            self.department = Entity.objects.create(
+                name="قسم الفيزياء", level=Entity.Level.DEPARTMENT_UNIT, parent=self.college
+            )
+
+    def test_subtree_and_ancestors_follow_moves(self):
+        self.assertEqual(self.department.depth, 2)
+        self.assertEqual(set(self.academic.get_all_children()), {self.college, self.department})
+        self.assertEqual(self.department.get_vice_rectorate(), self.academic)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.college.parent = self.research
+            self.college.save()
+        self.department.refresh_from_db()
+        self.assertTrue(self.department.path.startswith(self.research.path))
+        self.assertEqual(self.department.full_path, "وكالة البحث / كلية العلوم / قسم الفيزياء")
+        self.assertEqual(self.academic.get_all_children(), [])
+        self.assertEqual(set(self.research.descendants()), {self.college, self.department})
+
+    def test_hierarchy_actions_read_from_snapshot(self):
+        user = User.objects.create_user(
+            email="reader@taibahu.edu.sa", password="StrongPass123", full_name="Reader"
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        client.get("/api/entities/entities/tree/")  # تحميل اللقطة
+
+        with self.assertNumQueries(0):
+            response = client.get(f"/api/entities/entities/{self.department.id}/hierarchy/")
+            self.assertEqual(self.department.get_college_deanship(), self.college)
+        self.assertEqual(
+            [row["name"] for row in response.data],
+            ["وكالة الشؤون الأكاديمية", "كلية العلوم", "قسم الفيزياء"],
+        )
+        with self.assertNumQueries(0):
+            response = client.get(f"/api/entities/entities/{self.academic.id}/children/")
+        self.assertEqual([row["id"] for row in response.data], [str(self.college.id)])
+
+    def test_rename_refreshes_stored_full_path_for_subtree(self):
+        self.academic.name = "وكالة الجامعة"
+        self.academic.save()
+        department = Entity.objects.get(pk=self.department.pk)
+        with self.assertNumQueries(0):
+            data = EntityListSerializer(department).data
+        self.assertEqual(data["full_path"], "وكالة الجامعة / كلية العلوم / قسم الفيزياء")
+        self.assertEqual(department.vice_rectorate_id, self.academic.id)
+        self.assertEqual(department.college_deanship_id, self.college.id)
+
+
+class EntityTreeEndpointTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="tree@taibahu.edu.sa", password="StrongPass123", full_name="Tree"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root = Entity.objects.create(name="وكالة", level=Entity.Level.VICE_RECTORATE)
+            Entity.objects.create(
+                name="كلية", level=Entity.Level.COLLEGE_DEANSHIP, parent=self.root
+            )
+
+    def test_tree_is_single_query_cached_and_revalidated(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/entities/entities/tree/")
+        self.assertEqual(response.data[0]["children"][0]["name"], "كلية")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/entities/entities/tree/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root.name = "وكالة الشؤون الأكاديمية"
+            self.root.save()
+        response = self.client.get("/api/entities/entities/tree/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["name"], "وكالة الشؤون الأكاديمية")
@@ -1,10 +1,20 @@
+import hashlib
+import json
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 
 from accounts.permissions import IsSystemAdmin
+from system.cache import versioned_key
+from .hierarchy import ENTITIES_CACHE_NAMESPACE, get_snapshot
 from .models import Entity
 from .serializers import (
     EntitySerializer,
@@ -13,6 +23,33 @@ from .serializers import (
 )
 
 
+def build_entity_tree():
+    """
+    بناء الهيكل الشجري للجهات النشطة من لقطة الهيكل في الذاكرة (O(n) دون استعلامات إضافية)
+    الجذور هي الوكالات/القطاعات النشطة، والأبناء مرتبون حسب المستوى ثم الاسم.
+    """
+    snapshot = get_snapshot()
+
+    def build(node):
+        row = node.as_dict()
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "code": row["code"],
+            "level": row["level"],
+            "parent": row["parent_id"],
+            "is_active": row["is_active"],
+            "description": row["description"],
+            "children": [build(child) for child in snapshot.children(node.id)],
+        }
+
+    return [
+        build(snapshot.nodes[entity_id])
+        for entity_id in snapshot.by_level[Entity.Level.VICE_RECTORATE]
+        if snapshot.nodes[entity_id].is_active
+    ]
+
+
 class EntityViewSet(viewsets.ModelViewSet):
     """
     ViewSet لإدارة الجهات
@@ -74,22 +111,32 @@ class EntityViewSet(viewsets.ModelViewSet):
     def tree(self, request):
         """
         إرجاع الهيكل الهرمي الكامل (شجري)
+        يُخزن في الكاش حسب إصدار الجهات ويدعم ETag/If-None-Match.
         """
-        # إرجاع فقط الجهات من المستوى 1 (الوكالات/القطاعات)
-        root_entities = self.get_queryset().filter(
-            level=Entity.Level.VICE_RECTORATE,
-            is_active=True
-        )
-        serializer = self.get_serializer(root_entities, many=True)
-        return Response(serializer.data)
+        key = versioned_key(ENTITIES_CACHE_NAMESPACE, "tree")
+        cached = cache.get(key)
+        if cached is None:
+            tree = build_entity_tree()
+            payload = json.dumps(tree, cls=DjangoJSONEncoder).encode()
+            cached = (quote_etag(hashlib.md5(payload).hexdigest()), tree)
+            cache.set(key, cached, None)
+        etag, tree = cached
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(tree, headers={"ETag": etag})
     
     @action(detail=True, methods=["get"])
     def children(self, request, pk=None):
         """
         إرجاع جميع الأبناء المباشرين للجهة
         """
-        entity = self.get_object()
-        children = entity.children.filter(is_active=True)
+        snapshot = get_snapshot()
+        node = snapshot.get(self._snapshot_pk(pk))
+        if node is None:
+            return Response({"detail": "الجهة غير موجودة."}, status=status.HTTP_404_NOT_FOUND)
+        children = [child.to_instance() for child in snapshot.children(node.id)]
         serializer = EntityListSerializer(children, many=True)
         return Response(serializer.data)
     
@@ -98,15 +145,13 @@ class EntityViewSet(viewsets.ModelViewSet):
         """
         إرجاع التسلسل الهرمي الكامل للجهة (من الجذر إلى الجهة الحالية)
         """
-        entity = self.get_object()
-        hierarchy = []
-        current = entity
-        
-        while current:
-            hierarchy.insert(0, EntityListSerializer(current).data)
-            current = current.parent
-        
-        return Response(hierarchy)
+        snapshot = get_snapshot()
+        node = snapshot.get(self._snapshot_pk(pk))
+        if node is None:
+            return Response({"detail": "الجهة غير موجودة."}, status=status.HTTP_404_NOT_FOUND)
+        chain = [*snapshot.ancestors(node.id), node]
+        serializer = EntityListSerializer([item.to_instance() for item in chain], many=True)
+        return Response(serializer.data)
     
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated & IsSystemAdmin])
     def by_level(self, request):
@@ -119,8 +164,20 @@ class EntityViewSet(viewsets.ModelViewSet):
             Entity.Level.DEPARTMENT_UNIT: [],
         }
         
-        entities = self.get_queryset().filter(is_active=True)
-        for entity in entities:
-            levels[entity.level].append(EntityListSerializer(entity).data)
+        snapshot = get_snapshot()
+        for level, entity_ids in snapshot.by_level.items():
+            entities = [
+                snapshot.nodes[entity_id].to_instance()
+                for entity_id in entity_ids
+                if snapshot.nodes[entity_id].is_active
+            ]
+            levels[level] = EntityListSerializer(entities, many=True).data
         
         return Response(levels)
+
+    @staticmethod
+    def _snapshot_pk(pk):
+        try:
+            return uuid.UUID(str(pk))
+        except ValueError:
+            return None
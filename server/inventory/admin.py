@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from inventory.models import InventoryItem, InventoryLog, ReorderRequest
+from inventory.models import (
+    InventoryBalanceCheckpoint,
+    InventoryItem,
+    InventoryLog,
+    InventoryMovementDaily,
+    ReorderRequest,
+)
 
 
 @admin.register(InventoryItem)
@@ -24,3 +30,19 @@ class ReorderRequestAdmin(admin.ModelAdmin):
     search_fields = ("item__name",)
 
 
+
+
+@admin.register(InventoryBalanceCheckpoint)
+class InventoryBalanceCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("item", "date", "closing_balance", "movements")
+    list_filter = ("date",)
+    search_fields = ("item__name", "item__sku")
+    date_hierarchy = "date"
+
+
+@admin.register(InventoryMovementDaily)
+class InventoryMovementDailyAdmin(admin.ModelAdmin):
+    list_display = ("item", "day", "operation", "quantity", "movements")
+    list_filter = ("operation", "category")
+    search_fields = ("item__name", "item__sku")
+    date_hierarchy = "day"
@@ -0,0 +1,306 @@
+"""
+دفتر المخزون: إعادة تشغيل سجلات InventoryLog وبناء الأرصدة اليومية
+
+قواعد الحركة مطابقة لما تكتبه واجهات المخزون:
+- IN: إضافة القيمة المطلقة للكمية
+- OUT: خصم القيمة المطلقة للكمية دون النزول تحت الصفر
+- ADJUST: تعيين الرصيد إلى الكمية (تعديل مطلق)
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Max, OuterRef, Q, Subquery
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from inventory.models import InventoryBalanceCheckpoint, InventoryItem, InventoryLog
+from inventory.rollups import record_movements
+
+
+def apply_movement(balance: int, operation: str, quantity: int) -> int:
+    """تطبيق حركة واحدة على الرصيد"""
+    if operation == InventoryLog.Operation.IN:
+        return balance + abs(quantity)
+    if operation == InventoryLog.Operation.OUT:
+        return max(0, balance - abs(quantity))
+    return quantity
+
+
+def start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _latest_checkpoints(item_ids=None) -> dict:
+    """إرجاع {item_id: (date, closing_balance)} لآخر رصيد يومي لكل مادة"""
+    latest_date = (
+        InventoryBalanceCheckpoint.objects.filter(item=OuterRef("item"))
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    qs = InventoryBalanceCheckpoint.objects.filter(date=Subquery(latest_date))
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=item_ids)
+    return {
+        item_id: (cp_date, balance)
+        for item_id, cp_date, balance in qs.values_list("item_id", "date", "closing_balance")
+    }
+
+
+def _replay_window_start():
+    """
+    بداية نافذة السجلات غير المغطاة بالأرصدة اليومية.
+    كل تشغيل لـ build_checkpoints يغلق جميع الأيام السابقة لموعد القطع،
+    لذلك لا توجد سجلات بين آخر يوم مُغلق واليوم التالي له.
+    """
+    last_closed = InventoryBalanceCheckpoint.objects.aggregate(last=Max("date"))["last"]
+    if last_closed is None:
+        return None
+    return start_of_day(last_closed + timedelta(days=1))
+
+
+def build_checkpoints(until: date | None = None) -> int:
+    """
+    بناء الأرصدة اليومية لجميع الأيام المغلقة (قبل `until`، افتراضياً اليوم).
+    العملية تدريجية: تبدأ من آخر رصيد محفوظ لكل مادة.
+    """
+    until = until or timezone.localdate()
+    cutoff = start_of_day(until)
+    latest = _latest_checkpoints()
+
+    logs = InventoryLog.objects.filter(created_at__lt=cutoff)
+    window_start = _replay_window_start()
+    if window_start is not None:
+        logs = logs.filter(created_at__gte=window_start)
+
+    # item_id -> [day, balance, movements]
+    running: dict = {}
+    pending: list[InventoryBalanceCheckpoint] = []
+
+    def flush(item_id, state):
+        pending.append(
+            InventoryBalanceCheckpoint(
+                item_id=item_id,
+                date=state[0],
+                closing_balance=state[1],
+                movements=state[2],
+            )
+        )
+
+    rows = logs.order_by("created_at", "id").values_list(
+        "item_id", "operation", "quantity", "created_at"
+    )
+    for item_id, operation, quantity, created_at in rows.iterator(chunk_size=2000):
+        day = timezone.localdate(created_at)
+        last_day, last_balance = latest.get(item_id, (None, 0))
+        if last_day is not None and day <= last_day:
+            continue
+        state = running.get(item_id)
+        if state is None:
+            state = running[item_id] = [day, last_balance, 0]
+        elif state[0] != day:
+            flush(item_id, state)
+            state[0], state[2] = day, 0
+        state[1] = apply_movement(state[1], operation, quantity)
+        state[2] += 1
+
+    for item_id, state in running.items():
+        flush(item_id, state)
+
+    InventoryBalanceCheckpoint.objects.bulk_create(
+        pending, batch_size=1000, ignore_conflicts=True
+    )
+    return len(pending)
+
+
+def balance_as_of(item: InventoryItem, at) -> int:
+    """
+    رصيد المادة في لحظة معينة (datetime) أو في نهاية يوم معين (date):
+    أقرب رصيد يومي سابق + إعادة تشغيل السجلات بعده فقط.
+    """
+    if isinstance(at, datetime):
+        day = timezone.localdate(at)
+        checkpoint_filter = {"date__lt": day}
+        end_filter = {"created_at__lte": at}
+    else:
+        checkpoint_filter = {"date__lte": at}
+        end_filter = {"created_at__lt": start_of_day(at + timedelta(days=1))}
+
+    checkpoint = (
+        item.checkpoints.filter(**checkpoint_filter)
+        .order_by("-date")
+        .values_list("date", "closing_balance")
+        .first()
+    )
+    logs = item.logs.filter(**end_filter)
+    balance = 0
+    if checkpoint:
+        balance = checkpoint[1]
+        logs = logs.filter(created_at__gte=start_of_day(checkpoint[0] + timedelta(days=1)))
+
+    for operation, quantity in logs.order_by("created_at", "id").values_list("operation", "quantity"):
+        balance = apply_movement(balance, operation, quantity)
+    return balance
+
+
+def ledger_drift(items=None) -> list[dict]:
+    """
+    مقارنة current_quantity برصيد الدفتر لكل مادة.
+    يُرجع المواد التي يختلف فيها الرصيد الفعلي عن رصيد السجلات.
+    """
+    items_qs = InventoryItem.objects.all() if items is None else items
+    item_rows = list(items_qs.values_list("id", "sku", "name", "current_quantity"))
+    item_ids = [row[0] for row in item_rows]
+    latest = _latest_checkpoints(item_ids)
+
+    balances = {item_id: balance for item_id, (_, balance) in latest.items()}
+    logs = InventoryLog.objects.filter(item_id__in=item_ids)
+    window_start = _replay_window_start()
+    if window_start is not None:
+        logs = logs.filter(created_at__gte=window_start)
+    rows = logs.order_by("created_at", "id").values_list(
+        "item_id", "operation", "quantity", "created_at"
+    )
+    for item_id, operation, quantity, created_at in rows.iterator(chunk_size=2000):
+        last_day = latest.get(item_id, (None, 0))[0]
+        if last_day is not None and timezone.localdate(created_at) <= last_day:
+            continue
+        balances[item_id] = apply_movement(balances.get(item_id, 0), operation, quantity)
+
+    drift = []
+    for item_id, sku, name, current_quantity in item_rows:
+        ledger_balance = balances.get(item_id, 0)
+        if ledger_balance != current_quantity:
+            drift.append(
+                {
+                    "id": str(item_id),
+                    "sku": sku,
+                    "name": name,
+                    "current_quantity": current_quantity,
+                    "ledger_balance": ledger_balance,
+                    "drift": current_quantity - ledger_balance,
+                }
+            )
+    return drift
+
+
+def write_opening_balances() -> int:
+    """
+    كتابة سجل رصيد افتتاحي (ADJUST) لكل مادة لها كمية وليس لها أي سجل،
+    وهي المواد المنشأة قبل أن تكتب واجهات المخزون الرصيد الافتتاحي.
+    يُؤرَّخ السجل بتاريخ إنشاء المادة، أو ببداية النافذة غير المغلقة إن كان
+    ذلك اليوم قد أُغلق بالأرصدة اليومية، فيظهر في الدفتر دون إعادة بنائها.
+    العملية آمنة للتكرار: المادة التي لها سجل لا تُعدَّل.
+    """
+    items = list(
+        InventoryItem.objects.exclude(current_quantity=0)
+        .filter(logs__isnull=True)
+        .only("id", "current_quantity", "created_at")
+    )
+    if not items:
+        return 0
+
+    window_start = _replay_window_start()
+    logs = InventoryLog.objects.bulk_create(
+        [
+            InventoryLog(
+                item=item,
+                operation=InventoryLog.Operation.ADJUST,
+                quantity=item.current_quantity,
+                balance_after=item.current_quantity,
+                note="رصيد افتتاحي.",
+            )
+            for item in items
+        ],
+        batch_size=500,
+    )
+    # created_at تلقائي عند الإنشاء، ويُعاد تعيينه بـ bulk_update
+    for log, item in zip(logs, items):
+        log.created_at = (
+            item.created_at if window_start is None else max(item.created_at, window_start)
+        )
+    InventoryLog.objects.bulk_update(logs, ["created_at"], batch_size=500)
+    record_movements(logs)
+    return len(logs)
+
+
+def apply_adjustments(lines: list[dict], user=None, reference_order: str = "", note: str = "") -> dict:
+    """
+    تطبيق مجموعة تعديلات مخزون في معاملة واحدة (جرد أو تعديل جماعي).
+
+    كل سطر يحتوي على item (معرف) أو sku، والعملية والكمية وملاحظة اختيارية.
+    تُقفل الصفوف بترتيب المعرف لتجنب الاختناق بين عمليات الجرد المتزامنة،
+    وتُكتب السجلات بـ bulk_create. يجب استدعاؤها داخل transaction.atomic.
+    """
+    item_ids = {line["item"] for line in lines if line.get("item")}
+    skus = {line["sku"] for line in lines if not line.get("item")}
+    items = list(
+        InventoryItem.objects.select_for_update()
+        .filter(Q(id__in=item_ids) | Q(sku__in=skus))
+        .order_by("id")
+    )
+    by_id = {item.id: item for item in items}
+    by_sku = {item.sku: item for item in items}
+
+    missing = [
+        str(line.get("item") or line.get("sku"))
+        for line in lines
+        if (by_id.get(line["item"]) if line.get("item") else by_sku.get(line.get("sku"))) is None
+    ]
+    if missing:
+        raise ValidationError({"adjustments": f"مواد غير موجودة: {', '.join(missing)}"})
+
+    now = timezone.now()
+    opening = {item.id: item.current_quantity for item in items}
+    logs = []
+    report = []
+    for line in lines:
+        item = by_id[line["item"]] if line.get("item") else by_sku[line["sku"]]
+        operation = line["operation"]
+        quantity = line["quantity"]
+        before = item.current_quantity
+        item.current_quantity = apply_movement(before, operation, quantity)
+        if operation == InventoryLog.Operation.IN:
+            item.last_restocked_at = now
+        elif operation == InventoryLog.Operation.OUT:
+            item.last_usage_at = now
+        item.updated_at = now
+        logs.append(
+            InventoryLog(
+                item=item,
+                operation=operation,
+                quantity=quantity,
+                balance_after=item.current_quantity,
+                reference_order=reference_order,
+                performed_by=user,
+                note=line.get("note") or note,
+            )
+        )
+        report.append(
+            {
+                "item": str(item.id),
+                "sku": item.sku,
+                "name": item.name,
+                "operation": operation,
+                "quantity": quantity,
+                "before": before,
+                "after": item.current_quantity,
+                "variance": item.current_quantity - before,
+            }
+        )
+
+    InventoryItem.objects.bulk_update(
+        items,
+        ["current_quantity", "last_restocked_at", "last_usage_at", "updated_at"],
+        batch_size=500,
+    )
+    InventoryLog.objects.bulk_create(logs, batch_size=500)
+    # bulk_create لا يُطلق post_save، فيُحدَّث التجميع اليومي هنا
+    record_movements(logs)
+
+    changed = [item for item in items if item.current_quantity != opening[item.id]]
+    return {
+        "lines": len(lines),
+        "items": len(items),
+        "items_with_variance": len(changed),
+        "total_variance": sum(item.current_quantity - opening[item.id] for item in items),
+        "adjustments": report,
+    }
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.rollups import rebuild_movement_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily inventory movement rollups from InventoryLog."
+
+    def handle(self, *args, **options):
+        count = rebuild_movement_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily movement rows."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.ledger import write_opening_balances
+
+
+class Command(BaseCommand):
+    help = "Write an opening-balance InventoryLog for items that have stock but no logs."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = write_opening_balances()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} opening balance logs."))
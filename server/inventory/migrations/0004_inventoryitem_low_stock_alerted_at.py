@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_inventorylog_print_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='low_stock_alerted_at',
+            field=models.DateTimeField(blank=True, help_text='يُعبأ عند إرسال تنبيه الانخفاض ويُفرغ عند عودة الكمية فوق الحد', null=True, verbose_name='آخر تنبيه انخفاض'),
+        ),
+    ]
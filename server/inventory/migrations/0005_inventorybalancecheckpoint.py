@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_inventoryitem_low_stock_alerted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryBalanceCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='التاريخ')),
+                ('closing_balance', models.IntegerField(verbose_name='الرصيد الختامي')),
+                ('movements', models.PositiveIntegerField(default=0, verbose_name='عدد الحركات')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='inventory.inventoryitem', verbose_name='المادة')),
+            ],
+            options={
+                'verbose_name': 'رصيد يومي',
+                'verbose_name_plural': 'الأرصدة اليومية',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventorybalancecheckpoint',
+            constraint=models.UniqueConstraint(fields=('item', 'date'), name='unique_item_checkpoint_date'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:40
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventorybalancecheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(models.Case(models.When(current_quantity__lte=models.F('minimum_threshold'), then=models.Value('critical')), models.When(current_quantity__lte=django.db.models.functions.comparison.Greatest(django.db.models.expressions.CombinedExpression(models.F('minimum_threshold'), '+', models.Value(1)), models.F('reorder_point')), then=models.Value('warning')), default=models.Value('ok'), output_field=models.CharField()), name='inventory_item_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(models.Case(models.When(current_quantity__lte=models.F('minimum_threshold'), then=models.Value(0)), models.When(current_quantity__lte=django.db.models.functions.comparison.Greatest(django.db.models.expressions.CombinedExpression(models.F('minimum_threshold'), '+', models.Value(1)), models.F('reorder_point')), then=models.Value(1)), default=models.Value(2), output_field=models.IntegerField()), models.F('name'), name='inventory_item_status_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_inventoryitem_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovementDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('paper', 'ورق'), ('ink', 'أحبار'), ('banner', 'بنرات'), ('other', 'مستهلكات أخرى')], max_length=20, verbose_name='التصنيف')),
+                ('day', models.DateField(verbose_name='اليوم')),
+                ('operation', models.CharField(choices=[('in', 'إضافة'), ('out', 'صرف'), ('adjust', 'تعديل')], max_length=10, verbose_name='العملية')),
+                ('quantity', models.BigIntegerField(default=0, verbose_name='إجمالي الكمية')),
+                ('movements', models.PositiveIntegerField(default=0, verbose_name='عدد الحركات')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_movements', to='inventory.inventoryitem', verbose_name='المادة')),
+            ],
+            options={
+                'verbose_name': 'حركة مخزون يومية',
+                'verbose_name_plural': 'حركات المخزون اليومية',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'category'], name='inv_movement_day_cat_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventorymovementdaily',
+            constraint=models.UniqueConstraint(fields=('item', 'day', 'operation'), name='unique_item_day_operation'),
+        ),
+    ]
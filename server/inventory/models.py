@@ -2,11 +2,61 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.lookups import In
 from django.utils import timezone
 
 
 User = settings.AUTH_USER_MODEL
 
+def stock_status_expression():
+    """تعبير SQL مطابق لخاصية InventoryItem.status"""
+    return Case(
+        When(current_quantity__lte=F("minimum_threshold"), then=Value("critical")),
+        When(
+            current_quantity__lte=Greatest(F("minimum_threshold") + 1, F("reorder_point")),
+            then=Value("warning"),
+        ),
+        default=Value("ok"),
+        output_field=models.CharField(),
+    )
+
+
+def stock_status_rank_expression():
+    """ترتيب الحالات حسب الخطورة: critical ثم warning ثم ok"""
+    return Case(
+        When(current_quantity__lte=F("minimum_threshold"), then=Value(0)),
+        When(
+            current_quantity__lte=Greatest(F("minimum_threshold") + 1, F("reorder_point")),
+            then=Value(1),
+        ),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+
+
+# المواد منخفضة المخزون (حالتها حرجة أو تحذير، أو بلغت حد التنبيه min_quantity):
+# التعريف الوحيد المستخدم في التنبيهات ولوحة المدير والتقارير
+LOW_STOCK_STATUSES = ("critical", "warning")
+LOW_STOCK_Q = Q(In(stock_status_expression(), LOW_STOCK_STATUSES)) | Q(
+    current_quantity__lte=F("min_quantity")
+)
+
+
+class InventoryItemQuerySet(models.QuerySet):
+    def with_status(self):
+        return self.annotate(
+            stock_status=stock_status_expression(),
+            status_rank=stock_status_rank_expression(),
+        )
+
+    def with_stock_status(self, status: str):
+        return self.with_status().filter(stock_status=status)
+
+    def low_stock(self):
+        return self.filter(LOW_STOCK_Q)
+
 
 class InventoryItem(models.Model):
     class Category(models.TextChoices):
@@ -15,6 +65,11 @@ class InventoryItem(models.Model):
         BANNER = "banner", "بنرات"
         OTHER = "other", "مستهلكات أخرى"
 
+    class StockStatus(models.TextChoices):
+        CRITICAL = "critical", "حرج"
+        WARNING = "warning", "تحذير"
+        OK = "ok", "جيد"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField("اسم المادة", max_length=200, unique=True)
     sku = models.CharField("رمز المخزون", max_length=100, unique=True)
@@ -33,14 +88,28 @@ class InventoryItem(models.Model):
     reorder_point = models.PositiveIntegerField("نقطة إعادة الطلب", default=0)
     last_restocked_at = models.DateTimeField("آخر تزويد", null=True, blank=True)
     last_usage_at = models.DateTimeField("آخر استهلاك", null=True, blank=True)
+    low_stock_alerted_at = models.DateTimeField(
+        "آخر تنبيه انخفاض",
+        null=True,
+        blank=True,
+        help_text="يُعبأ عند إرسال تنبيه الانخفاض ويُفرغ عند عودة الكمية فوق الحد",
+    )
     notes = models.TextField("ملاحظات", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InventoryItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = "مادة مخزون"
         verbose_name_plural = "مواد المخزون"
         ordering = ["name"]
+        indexes = [
+            models.Index(stock_status_expression(), name="inventory_item_status_idx"),
+            models.Index(
+                stock_status_rank_expression(), "name", name="inventory_item_status_rank_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -55,8 +124,8 @@ class InventoryItem(models.Model):
     
     @property
     def is_low_stock(self) -> bool:
-        """التحقق من انخفاض المخزون (أقل من الحد الأدنى للتنبيه)"""
-        return self.current_quantity <= self.min_quantity
+        """التحقق من انخفاض المخزون (مطابق لـ LOW_STOCK_Q)"""
+        return self.status in LOW_STOCK_STATUSES or self.current_quantity <= self.min_quantity
 
 
 class InventoryLog(models.Model):
@@ -100,6 +169,76 @@ class InventoryLog(models.Model):
         return f"{self.item.name} ({self.operation})"
 
 
+class InventoryBalanceCheckpoint(models.Model):
+    """
+    الرصيد الختامي اليومي لكل مادة (يُبنى تدريجياً من سجلات المخزون)
+    يُسجل فقط للأيام التي شهدت حركة على المادة.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+        verbose_name="المادة",
+    )
+    date = models.DateField("التاريخ")
+    closing_balance = models.IntegerField("الرصيد الختامي")
+    movements = models.PositiveIntegerField("عدد الحركات", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "رصيد يومي"
+        verbose_name_plural = "الأرصدة اليومية"
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["item", "date"], name="unique_item_checkpoint_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.date}: {self.closing_balance}"
+
+
+class InventoryMovementDaily(models.Model):
+    """
+    تجميع يومي لحركة المخزون (مادة × يوم × عملية)
+    يُحدَّث تدريجياً مع كل سجل مخزون، ويُستخدم في تقارير السلاسل الزمنية.
+    الكمية مجموع القيم المطلقة لكميات السجلات.
+    """
+
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="daily_movements",
+        verbose_name="المادة",
+    )
+    category = models.CharField(
+        "التصنيف", max_length=20, choices=InventoryItem.Category.choices
+    )
+    day = models.DateField("اليوم")
+    operation = models.CharField(
+        "العملية", max_length=10, choices=InventoryLog.Operation.choices
+    )
+    quantity = models.BigIntegerField("إجمالي الكمية", default=0)
+    movements = models.PositiveIntegerField("عدد الحركات", default=0)
+
+    class Meta:
+        verbose_name = "حركة مخزون يومية"
+        verbose_name_plural = "حركات المخزون اليومية"
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "day", "operation"], name="unique_item_day_operation"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["day", "category"], name="inv_movement_day_cat_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.day} ({self.operation}): {self.quantity}"
+
+
 class ReorderRequest(models.Model):
     class Status(models.TextChoices):
         PENDING = "pending", "قيد المراجعة"
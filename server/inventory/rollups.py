@@ -0,0 +1,93 @@
+"""
+تجميعات حركة المخزون اليومية (InventoryMovementDaily)
+
+تُحدَّث تدريجياً: كل سجل مخزون جديد يضيف كميته إلى صف (مادة، يوم، عملية)،
+وتُقرأ تقارير السلاسل الزمنية من هذا الجدول بدل التجميع على InventoryLog.
+التعديل أو الحذف المباشر للسجلات لا ينعكس تلقائياً؛ يُستخدم أمر
+rebuild_inventory_rollups لإعادة البناء.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Abs, TruncDate
+from django.utils import timezone
+
+from inventory.models import InventoryItem, InventoryLog, InventoryMovementDaily
+
+
+def _rollup_key(log: InventoryLog):
+    return (log.item_id, timezone.localdate(log.created_at), log.operation)
+
+
+def record_movements(logs, sign: int = 1) -> None:
+    """
+    إضافة (أو طرح عند sign=-1) مجموعة سجلات إلى التجميع اليومي.
+    تُجمع السجلات في الذاكرة أولاً فيُنفذ تحديث واحد لكل (مادة، يوم، عملية).
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for log in logs:
+        entry = totals[_rollup_key(log)]
+        entry[0] += abs(log.quantity)
+        entry[1] += 1
+    if not totals:
+        return
+
+    categories = dict(
+        InventoryItem.objects.filter(id__in={key[0] for key in totals}).values_list(
+            "id", "category"
+        )
+    )
+    for (item_id, day, operation), (quantity, movements) in totals.items():
+        _increment(
+            item_id, categories.get(item_id), day, operation, sign * quantity, sign * movements
+        )
+
+
+def _increment(item_id, category, day, operation, quantity, movements) -> None:
+    lookup = {"item_id": item_id, "day": day, "operation": operation}
+    delta = {"quantity": F("quantity") + quantity, "movements": F("movements") + movements}
+    if InventoryMovementDaily.objects.filter(**lookup).update(**delta):
+        return
+    if movements < 0 or category is None:
+        return
+    try:
+        with transaction.atomic():
+            InventoryMovementDaily.objects.create(
+                category=category, quantity=quantity, movements=movements, **lookup
+            )
+    except IntegrityError:
+        # أُنشئ الصف من عملية متزامنة بعد محاولة التحديث
+        InventoryMovementDaily.objects.filter(**lookup).update(**delta)
+
+
+def sync_item_category(item: InventoryItem) -> None:
+    """تحديث التصنيف المكرر في التجميعات عند تغيير تصنيف المادة"""
+    InventoryMovementDaily.objects.filter(item=item).exclude(category=item.category).update(
+        category=item.category
+    )
+
+
+@transaction.atomic
+def rebuild_movement_rollups() -> int:
+    """إعادة بناء التجميعات بالكامل من سجلات المخزون"""
+    InventoryMovementDaily.objects.all().delete()
+    rows = (
+        InventoryLog.objects.annotate(day=TruncDate("created_at"))
+        .values("item_id", "item__category", "day", "operation")
+        .annotate(quantity=Sum(Abs("quantity")), movements=Count("id"))
+        .order_by()
+    )
+    objs = [
+        InventoryMovementDaily(
+            item_id=row["item_id"],
+            category=row["item__category"],
+            day=row["day"],
+            operation=row["operation"],
+            quantity=row["quantity"],
+            movements=row["movements"],
+        )
+        for row in rows.iterator(chunk_size=2000)
+    ]
+    InventoryMovementDaily.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
@@ -1,3 +1,6 @@
+import csv
+import io
+
 from rest_framework import serializers
 
 from inventory.models import InventoryItem, InventoryLog, ReorderRequest
@@ -76,3 +79,72 @@ class ReorderRequestSerializer(serializers.ModelSerializer):
         ]
 
 
+
+
+class BulkAdjustmentLineSerializer(serializers.Serializer):
+    item = serializers.UUIDField(required=False)
+    sku = serializers.CharField(required=False, max_length=100)
+    operation = serializers.ChoiceField(
+        choices=InventoryLog.Operation.choices, default=InventoryLog.Operation.ADJUST
+    )
+    quantity = serializers.IntegerField(min_value=0)
+    note = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+    def validate(self, attrs):
+        if not attrs.get("item") and not attrs.get("sku"):
+            raise serializers.ValidationError("يجب تحديد المادة (item) أو رمزها (sku).")
+        return attrs
+
+
+class BulkAdjustSerializer(serializers.Serializer):
+    adjustments = BulkAdjustmentLineSerializer(many=True, allow_empty=False)
+    reference_order = serializers.CharField(required=False, allow_blank=True, max_length=50)
+    note = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+
+class StockTakeUploadSerializer(serializers.Serializer):
+    """ملف جرد CSV بالأعمدة: sku, counted_quantity, note (اختياري)"""
+
+    file = serializers.FileField()
+    reference_order = serializers.CharField(required=False, allow_blank=True, max_length=50)
+    note = serializers.CharField(required=False, allow_blank=True, max_length=255)
+
+    def validate_file(self, upload):
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise serializers.ValidationError("يجب أن يكون الملف بترميز UTF-8.")
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or not {"sku", "counted_quantity"} <= set(reader.fieldnames):
+            raise serializers.ValidationError("الملف يجب أن يحتوي على العمودين sku و counted_quantity.")
+
+        lines = []
+        errors = []
+        for row_number, row in enumerate(reader, start=2):
+            sku = (row.get("sku") or "").strip()
+            counted = (row.get("counted_quantity") or "").strip()
+            if not sku and not counted:
+                continue
+            try:
+                quantity = int(counted)
+                if quantity < 0:
+                    raise ValueError
+            except ValueError:
+                errors.append(f"السطر {row_number}: كمية غير صحيحة '{counted}'.")
+                continue
+            if not sku:
+                errors.append(f"السطر {row_number}: رمز المادة مطلوب.")
+                continue
+            lines.append(
+                {
+                    "sku": sku,
+                    "operation": InventoryLog.Operation.ADJUST,
+                    "quantity": quantity,
+                    "note": (row.get("note") or "").strip()[:255],
+                }
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+        if not lines:
+            raise serializers.ValidationError("الملف لا يحتوي على أي سطر جرد.")
+        return lines
@@ -6,9 +6,23 @@ from django.dispatch import receiver
 from django.utils import timezone
 
 from inventory.models import InventoryItem, InventoryLog
+from inventory.rollups import record_movements, sync_item_category
 from orders.models import PrintOrder
 
 
+@receiver(post_save, sender=InventoryLog)
+def update_movement_rollup(sender, instance, created, **kwargs):
+    """إضافة السجل الجديد إلى التجميع اليومي لحركة المخزون"""
+    if created:
+        record_movements([instance])
+
+
+@receiver(post_save, sender=InventoryItem)
+def sync_movement_rollup_category(sender, instance, created, **kwargs):
+    if not created:
+        sync_item_category(instance)
+
+
 @receiver(post_save, sender=PrintOrder)
 def auto_deduct_inventory(sender, instance, created, **kwargs):
     """
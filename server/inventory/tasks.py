@@ -1,56 +1,110 @@
 """
 Celery tasks لإدارة المخزون
 """
+import logging
+
 from celery import shared_task
-from django.db.models import F
+from django.db import transaction
 from django.utils import timezone
 
-from inventory.models import InventoryItem
+from inventory.ledger import build_checkpoints, ledger_drift
+from inventory.models import LOW_STOCK_Q, InventoryItem
 from notifications.models import Notification
 from accounts.models import User
+from accounts.roles import recipient_ids
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def check_low_stock():
     """
     التحقق من انخفاض المخزون وإرسال تنبيهات
+
+    يُرسل التنبيه مرة واحدة عند عبور المادة للحد الأدنى فقط، ويُعاد تفعيله
+    عندما ترتفع الكمية فوق الحد مرة أخرى.
     """
-    low_stock_items = InventoryItem.objects.filter(
-        current_quantity__lte=F("min_quantity"),
-        is_active=True,
-    )
-    
-    if not low_stock_items.exists():
-        return
-    
-    # إرسال إشعار لمدير المطبعة
-    print_managers = User.objects.filter(
-        role__in=[User.Role.PRINT_MANAGER, User.Role.ADMIN],
-        is_active=True,
-    )
-    
-    items_list = ", ".join([item.name for item in low_stock_items[:5]])
-    message = f"انخفض المخزون للعناصر التالية: {items_list}"
-    if low_stock_items.count() > 5:
-        message += f" و{low_stock_items.count() - 5} عنصر آخر"
-    
-    for manager in print_managers:
-        Notification.objects.create(
-            recipient=manager,
-            title="تنبيه انخفاض المخزون",
-            message=message,
-            type=Notification.Type.INVENTORY,
-            data={
-                "items_count": low_stock_items.count(),
-                "items": [
-                    {
-                        "id": str(item.id),
-                        "name": item.name,
-                        "current_quantity": item.current_quantity,
-                        "min_quantity": item.min_quantity,
-                    }
-                    for item in low_stock_items[:10]
-                ],
-            },
+    now = timezone.now()
+
+    with transaction.atomic():
+        # إعادة تفعيل التنبيه للمواد التي عادت فوق الحد
+        InventoryItem.objects.filter(low_stock_alerted_at__isnull=False).exclude(
+            LOW_STOCK_Q
+        ).update(low_stock_alerted_at=None)
+
+        # المواد التي عبرت الحد ولم يُرسل لها تنبيه بعد
+        newly_low = list(
+            InventoryItem.objects.select_for_update()
+            .low_stock()
+            .filter(low_stock_alerted_at__isnull=True)
+            .order_by("current_quantity", "name")
+            .values("id", "name", "current_quantity", "min_quantity")
         )
+        if not newly_low:
+            return 0
+
+        # إرسال إشعار لمدير المطبعة (لمن فعّل تنبيهات المخزون)
+        manager_ids = recipient_ids(
+            User.Role.PRINT_MANAGER, User.Role.ADMIN, preference="inventory_alerts"
+        )
+        if not manager_ids:
+            return 0
+
+        items_list = ", ".join(item["name"] for item in newly_low[:5])
+        message = f"انخفض المخزون للعناصر التالية: {items_list}"
+        if len(newly_low) > 5:
+            message += f" و{len(newly_low) - 5} عنصر آخر"
+
+        data = {
+            "items_count": len(newly_low),
+            "items": [
+                {
+                    "id": str(item["id"]),
+                    "name": item["name"],
+                    "current_quantity": item["current_quantity"],
+                    "min_quantity": item["min_quantity"],
+                }
+                for item in newly_low[:10]
+            ],
+        }
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient_id=recipient_id,
+                    title="تنبيه انخفاض المخزون",
+                    message=message,
+                    type=Notification.Type.INVENTORY,
+                    data=data,
+                )
+                for recipient_id in manager_ids
+            ]
+        )
+
+        InventoryItem.objects.filter(
+            id__in=[item["id"] for item in newly_low]
+        ).update(low_stock_alerted_at=now)
 
+    return len(newly_low)
+
+
+@shared_task
+def build_inventory_checkpoints():
+    """
+    بناء الأرصدة اليومية للأيام المغلقة (تدريجياً من آخر رصيد محفوظ)
+    """
+    return build_checkpoints()
+
+
+@shared_task
+def check_inventory_ledger():
+    """
+    التحقق من تطابق الكميات الحالية مع دفتر المخزون
+    """
+    drift = ledger_drift()
+    if drift:
+        logger.warning(
+            "Inventory ledger drift detected for %s item(s): %s",
+            len(drift),
+            ", ".join(row["sku"] for row in drift[:10]),
+        )
+    return len(drift)
@@ -0,0 +1,260 @@
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from inventory.ledger import (
+    apply_adjustments,
+    balance_as_of,
+    build_checkpoints,
+    ledger_drift,
+    write_opening_balances,
+)
+from inventory.models import (
+    InventoryBalanceCheckpoint,
+    InventoryItem,
+    InventoryLog,
+    InventoryMovementDaily,
+)
+from inventory.rollups import rebuild_movement_rollups
+from inventory.tasks import check_low_stock
+from notifications.models import Notification, NotificationPreference
+
+
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="manager@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Print Manager",
+            role=User.Role.PRINT_MANAGER,
+        )
+        NotificationPreference.objects.create(user=self.manager, inventory_alerts=True)
+        # مدير عطّل تنبيهات المخزون لا يستقبلها
+        self.opted_out = User.objects.create_user(
+            email="opted-out@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Opted Out",
+            role=User.Role.PRINT_MANAGER,
+        )
+        NotificationPreference.objects.create(user=self.opted_out, inventory_alerts=False)
+        self.item = InventoryItem.objects.create(
+            name="ورق A4",
+            sku="PAPER-A4",
+            current_quantity=5,
+            minimum_threshold=10,
+        )
+
+    def test_alert_sent_once_per_threshold_crossing(self):
+        self.assertEqual(check_low_stock(), 1)
+        self.assertEqual(check_low_stock(), 0)
+        self.assertEqual(Notification.objects.filter(recipient=self.manager).count(), 1)
+
+        # العودة فوق الحد ثم الانخفاض مجدداً تعيد إرسال التنبيه
+        InventoryItem.objects.filter(pk=self.item.pk).update(current_quantity=50)
+        self.assertEqual(check_low_stock(), 0)
+        InventoryItem.objects.filter(pk=self.item.pk).update(current_quantity=3)
+        self.assertEqual(check_low_stock(), 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.manager).count(), 2)
+        self.assertFalse(Notification.objects.filter(recipient=self.opted_out).exists())
+
+    def test_alert_threshold_min_quantity_counts_as_low_stock(self):
+        toner = InventoryItem.objects.create(
+            name="حبر أسود", sku="TONER", current_quantity=15, min_quantity=20
+        )
+        self.assertEqual(toner.status, "ok")
+        self.assertTrue(toner.is_low_stock)
+        self.assertTrue(InventoryItem.objects.low_stock().filter(pk=toner.pk).exists())
+        self.assertEqual(check_low_stock(), 2)
+
+
+class InventoryLedgerTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(name="حبر", sku="INK-1", current_quantity=0)
+        self.today = timezone.localdate()
+
+    def _log(self, days_ago, operation, quantity):
+        log = InventoryLog.objects.create(
+            item=self.item, operation=operation, quantity=quantity, balance_after=0
+        )
+        created_at = timezone.now() - timedelta(days=days_ago)
+        InventoryLog.objects.filter(pk=log.pk).update(created_at=created_at)
+
+    def test_checkpoints_and_as_of_balance(self):
+        self._log(3, InventoryLog.Operation.IN, 100)
+        self._log(2, InventoryLog.Operation.OUT, 30)
+        self._log(2, InventoryLog.Operation.OUT, -10)
+        self._log(0, InventoryLog.Operation.ADJUST, 50)
+
+        self.assertEqual(build_checkpoints(), 2)
+        # التشغيل الثاني لا يكرر الأيام المغلقة
+        self.assertEqual(build_checkpoints(), 0)
+        checkpoint = InventoryBalanceCheckpoint.objects.get(
+            item=self.item, date=self.today - timedelta(days=2)
+        )
+        self.assertEqual(checkpoint.closing_balance, 60)
+        self.assertEqual(checkpoint.movements, 2)
+
+        self.assertEqual(balance_as_of(self.item, self.today - timedelta(days=3)), 100)
+        self.assertEqual(balance_as_of(self.item, self.today - timedelta(days=1)), 60)
+        self.assertEqual(balance_as_of(self.item, timezone.now()), 50)
+
+        self.assertEqual(ledger_drift()[0]["ledger_balance"], 50)
+        InventoryItem.objects.filter(pk=self.item.pk).update(current_quantity=50)
+        self.assertEqual(ledger_drift(), [])
+
+    def test_balance_as_of_date_includes_same_day_movements(self):
+        manager = User.objects.create_user(
+            email="ledger@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Ledger",
+            role=User.Role.PRINT_MANAGER,
+        )
+        client = APIClient()
+        client.force_authenticate(manager)
+        self._log(1, InventoryLog.Operation.IN, 100)
+        self._log(0, InventoryLog.Operation.OUT, 40)
+
+        url = f"/api/inventory/items/{self.item.id}/balance-as-of/"
+        self.assertEqual(client.get(url, {"at": self.today.isoformat()}).data["balance"], 60)
+        yesterday = (self.today - timedelta(days=1)).isoformat()
+        self.assertEqual(client.get(url, {"at": yesterday}).data["balance"], 100)
+        self.assertEqual(client.get(url, {"at": "2025-02-30"}).status_code, 400)
+
+    def test_opening_balances_for_items_without_logs(self):
+        self._log(3, InventoryLog.Operation.IN, 100)
+        InventoryItem.objects.filter(pk=self.item.pk).update(current_quantity=100)
+        build_checkpoints()
+        # مادة أقدم من كتابة الرصيد الافتتاحي: لها كمية ولا سجلات
+        legacy = InventoryItem.objects.create(name="ورق", sku="PAPER-1", current_quantity=30)
+        InventoryItem.objects.filter(pk=legacy.pk).update(
+            created_at=timezone.now() - timedelta(days=5)
+        )
+        self.assertEqual([row["sku"] for row in ledger_drift()], ["PAPER-1"])
+
+        self.assertEqual(write_opening_balances(), 1)
+        self.assertEqual(write_opening_balances(), 0)
+        self.assertEqual(ledger_drift(), [])
+        self.assertEqual(balance_as_of(legacy, timezone.now()), 30)
+
+
+class BulkAdjustTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="stock@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Stock Manager",
+            role=User.Role.PRINT_MANAGER,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        self.paper = InventoryItem.objects.create(name="ورق", sku="PAPER", current_quantity=100)
+        self.ink = InventoryItem.objects.create(name="حبر", sku="INK", current_quantity=10)
+
+    def test_bulk_adjust_returns_variance_report(self):
+        response = self.client.post(
+            "/api/inventory/items/bulk-adjust/",
+            {
+                "adjustments": [
+                    {"sku": "PAPER", "operation": "out", "quantity": 30},
+                    {"item": str(self.ink.id), "operation": "adjust", "quantity": 12},
+                ],
+                "reference_order": "STOCK-01",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["items_with_variance"], 2)
+        self.assertEqual(response.data["total_variance"], -28)
+        self.paper.refresh_from_db()
+        self.assertEqual(self.paper.current_quantity, 70)
+        self.assertEqual(InventoryLog.objects.filter(reference_order="STOCK-01").count(), 2)
+
+    def test_stock_take_csv_rejects_unknown_sku_atomically(self):
+        upload = SimpleUploadedFile(
+            "count.csv", b"sku,counted_quantity\nPAPER,95\nMISSING,4\n", content_type="text/csv"
+        )
+        response = self.client.post("/api/inventory/items/stock-take/", {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.paper.refresh_from_db()
+        self.assertEqual(self.paper.current_quantity, 100)
+        self.assertFalse(InventoryLog.objects.exists())
+
+
+class InventoryStatusFilterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="viewer@taibahu.edu.sa", password="StrongPass123", full_name="Viewer"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        InventoryItem.objects.create(name="ورق", sku="P", current_quantity=50, reorder_point=10)
+        InventoryItem.objects.create(name="حبر", sku="I", current_quantity=8, reorder_point=10)
+        InventoryItem.objects.create(
+            name="بنر", sku="B", current_quantity=2, minimum_threshold=5
+        )
+
+    def test_status_filter_and_ordering_match_property(self):
+        response = self.client.get("/api/inventory/items/", {"status": "warning"})
+        self.assertEqual([row["sku"] for row in response.data["results"]], ["I"])
+
+        response = self.client.get("/api/inventory/items/", {"ordering": "status_rank"})
+        rows = response.data["results"]
+        self.assertEqual([row["status"] for row in rows], ["critical", "warning", "ok"])
+        for item in InventoryItem.objects.with_status():
+            self.assertEqual(item.stock_status, item.status)
+
+
+class InventoryMovementReportTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="reports@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Reports",
+            role=User.Role.PRINT_MANAGER,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        self.paper = InventoryItem.objects.create(
+            name="ورق", sku="PAPER", category=InventoryItem.Category.PAPER
+        )
+
+    def test_rollup_is_maintained_incrementally_and_matches_rebuild(self):
+        InventoryLog.objects.create(
+            item=self.paper, operation="in", quantity=100, balance_after=100
+        )
+        InventoryLog.objects.create(
+            item=self.paper, operation="out", quantity=-30, balance_after=70
+        )
+        apply_adjustments(
+            [{"item": self.paper.id, "operation": "out", "quantity": 5}], user=self.manager
+        )
+        incremental = set(
+            InventoryMovementDaily.objects.values_list("operation", "quantity", "movements")
+        )
+        self.assertEqual(incremental, {("in", 100, 1), ("out", 35, 2)})
+        rebuild_movement_rollups()
+        self.assertEqual(
+            set(InventoryMovementDaily.objects.values_list("operation", "quantity", "movements")),
+            incremental,
+        )
+
+        response = self.client.get(
+            "/api/admin/reports/inventory-movement/", {"bucket": "month", "group_by": "category"}
+        )
+        self.assertEqual(response.status_code, 200)
+        [series] = response.data["series"]
+        self.assertEqual(series["key"], "paper")
+        self.assertEqual(series["points"][0]["out"], 35)
+        self.assertEqual(series["points"][0]["movements"], 3)
+
+        response = self.client.get("/api/admin/reports/inventory-movement/", {"item": "not-a-uuid"})
+        self.assertEqual(response.status_code, 400)
+        for param in ("start_date", "end_date"):
+            response = self.client.get(
+                "/api/admin/reports/inventory-movement/", {param: "2024-02-30"}
+            )
+            self.assertEqual(response.status_code, 400)
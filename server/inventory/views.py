@@ -1,17 +1,22 @@
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from accounts.permissions import IsSystemAdmin, IsPrintManager
+from inventory.ledger import apply_adjustments, balance_as_of, ledger_drift
 from inventory.models import InventoryItem, InventoryLog, ReorderRequest
 from inventory.serializers import (
+    BulkAdjustSerializer,
     InventoryItemSerializer,
     InventoryLogSerializer,
     ReorderRequestSerializer,
+    StockTakeUploadSerializer,
 )
+from system.exports import Column, ExportMixin
 
 
 class InventoryItemViewSet(viewsets.ModelViewSet):
@@ -19,8 +24,19 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     serializer_class = InventoryItemSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name", "sku", "category"]
-    ordering_fields = ["name", "current_quantity", "updated_at"]
-    
+    ordering_fields = ["name", "current_quantity", "updated_at", "status_rank"]
+
+    def get_queryset(self):
+        """
+        الحالة (critical/warning/ok) تُحسب في قاعدة البيانات، فيمكن التصفية
+        عبر ?status= والترتيب عبر ?ordering=status_rank (الأخطر أولاً).
+        """
+        queryset = InventoryItem.objects.with_status()
+        stock_status = self.request.query_params.get("status")
+        if stock_status in InventoryItem.StockStatus.values:
+            queryset = queryset.filter(stock_status=stock_status)
+        return queryset
+
     def get_permissions(self):
         """
         Allow all authenticated users to read inventory items (list, retrieve),
@@ -32,6 +48,63 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated & IsSystemAdmin]
         return [permission() for permission in permission_classes]
 
+    @transaction.atomic
+    def perform_create(self, serializer):
+        item = serializer.save()
+        if item.current_quantity:
+            # رصيد افتتاحي حتى يبقى الدفتر مطابقاً للكمية الحالية
+            InventoryLog.objects.create(
+                item=item,
+                operation=InventoryLog.Operation.ADJUST,
+                quantity=item.current_quantity,
+                balance_after=item.current_quantity,
+                performed_by=self.request.user,
+                note="رصيد افتتاحي.",
+            )
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_quantity = serializer.instance.current_quantity
+        item = serializer.save()
+        if item.current_quantity != old_quantity:
+            InventoryLog.objects.create(
+                item=item,
+                operation=InventoryLog.Operation.ADJUST,
+                quantity=item.current_quantity,
+                balance_after=item.current_quantity,
+                performed_by=self.request.user,
+                note="تعديل الكمية من بيانات المادة.",
+            )
+
+    @action(detail=True, methods=["get"], url_path="balance-as-of")
+    def balance_as_of(self, request, pk=None):
+        """رصيد المادة في تاريخ (YYYY-MM-DD) أو لحظة (ISO 8601) سابقة"""
+        item = self.get_object()
+        at_param = request.query_params.get("at", "")
+        # التاريخ وحده يعني نهاية ذلك اليوم؛ parse_datetime تقبله وتعيد منتصف الليل
+        try:
+            at = parse_date(at_param) or parse_datetime(at_param)
+        except ValueError:
+            at = None
+        if at is None:
+            return Response(
+                {"detail": "يجب تحديد التاريخ بصيغة YYYY-MM-DD أو ISO 8601."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if hasattr(at, "tzinfo") and timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        return Response({
+            "item": str(item.id),
+            "at": at.isoformat(),
+            "balance": balance_as_of(item, at),
+        })
+
+    @action(detail=False, methods=["get"], url_path="ledger-consistency")
+    def ledger_consistency(self, request):
+        """المواد التي تختلف كميتها الحالية عن رصيد دفتر المخزون"""
+        drift = ledger_drift()
+        return Response({"count": len(drift), "items": drift})
+
     @transaction.atomic
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated & (IsSystemAdmin | IsPrintManager)])
     def adjust(self, request, pk=None):
@@ -65,12 +138,53 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         return Response(InventoryLogSerializer(log).data, status=status.HTTP_201_CREATED)
 
 
-class InventoryLogViewSet(viewsets.ReadOnlyModelViewSet):
+    @transaction.atomic
+    @action(detail=False, methods=["post"], url_path="bulk-adjust")
+    def bulk_adjust(self, request):
+        """تطبيق تعديلات متعددة في معاملة واحدة وإرجاع تقرير الفروقات"""
+        serializer = BulkAdjustSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = apply_adjustments(
+            serializer.validated_data["adjustments"],
+            user=request.user,
+            reference_order=serializer.validated_data.get("reference_order", ""),
+            note=serializer.validated_data.get("note", ""),
+        )
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    @action(detail=False, methods=["post"], url_path="stock-take")
+    def stock_take(self, request):
+        """رفع ملف جرد CSV (sku, counted_quantity) وتعيين الكميات المعدودة"""
+        serializer = StockTakeUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = apply_adjustments(
+            serializer.validated_data["file"],
+            user=request.user,
+            reference_order=serializer.validated_data.get("reference_order", ""),
+            note=serializer.validated_data.get("note") or "جرد مخزون.",
+        )
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
+class InventoryLogViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     queryset = InventoryLog.objects.select_related("item").all()
     serializer_class = InventoryLogSerializer
     permission_classes = [IsAuthenticated & IsSystemAdmin]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["created_at"]
+    export_filename = "inventory-logs"
+    export_columns = [
+        Column("التاريخ", "created_at"),
+        Column("المادة", "item__name"),
+        Column("رمز المادة", "item__sku"),
+        Column("العملية", "operation", dict(InventoryLog.Operation.choices)),
+        Column("الكمية", "quantity"),
+        Column("الرصيد بعد العملية", "balance_after"),
+        Column("رقم الطلب المرجعي", "reference_order"),
+        Column("المستخدم", "performed_by__full_name"),
+        Column("ملاحظة", "note"),
+    ]
 
 
 class ReorderRequestViewSet(viewsets.ModelViewSet):
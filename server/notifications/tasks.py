@@ -8,6 +8,7 @@ from datetime import timedelta
 from notifications.models import Notification, NotificationPreference
 from orders.models import DesignOrder, PrintOrder
 from accounts.models import User
+from accounts.roles import recipient_ids
 
 
 @shared_task
@@ -186,55 +187,46 @@ def check_overdue_orders():
     # TODO: إضافة منطق لتحديد مهلة التنفيذ حسب الأولوية
     # حالياً نتحقق من الطلبات التي في الإنتاج لأكثر من 7 أيام
     overdue_threshold = timezone.now() - timedelta(days=7)
+    # إرسال إشعار للمدير ومدير القسم
+    manager_ids = recipient_ids(User.Role.PRINT_MANAGER, User.Role.DEPT_MANAGER)
+    if not manager_ids:
+        return
     
-    # طلبات التصميم
-    overdue_design = DesignOrder.objects.filter(
-        status=DesignOrder.Status.IN_DESIGN,
-        submitted_at__lt=overdue_threshold,
-    )
-    
-    for order in overdue_design:
-        # إرسال إشعار للمدير ومدير القسم
-        managers = User.objects.filter(
-            role__in=[User.Role.PRINT_MANAGER, User.Role.DEPT_MANAGER],
-            is_active=True,
-        )
-        
-        for manager in managers:
-            Notification.objects.create(
-                recipient=manager,
-                title="تجاوز مهلة التنفيذ",
-                message=f"طلب التصميم {order.order_code} تجاوز مهلة التنفيذ",
-                type=Notification.Type.SYSTEM,
-                data={
-                    "order_id": str(order.id),
-                    "order_code": order.order_code,
-                    "order_type": "design",
-                },
-            )
-    
-    # طلبات الطباعة
-    overdue_print = PrintOrder.objects.filter(
-        status=PrintOrder.Status.IN_PRODUCTION,
-        submitted_at__lt=overdue_threshold,
-    )
+    overdue = [
+        # طلبات التصميم
+        (
+            "design",
+            "طلب التصميم",
+            DesignOrder.objects.filter(
+                status=DesignOrder.Status.IN_DESIGN,
+                submitted_at__lt=overdue_threshold,
+            ),
+        ),
+        # طلبات الطباعة
+        (
+            "print",
+            "طلب الطباعة",
+            PrintOrder.objects.filter(
+                status=PrintOrder.Status.IN_PRODUCTION,
+                submitted_at__lt=overdue_threshold,
+            ),
+        ),
+    ]
     
-    for order in overdue_print:
-        managers = User.objects.filter(
-            role__in=[User.Role.PRINT_MANAGER, User.Role.DEPT_MANAGER],
-            is_active=True,
+    notifications = [
+        Notification(
+            recipient_id=manager_id,
+            title="تجاوز مهلة التنفيذ",
+            message=f"{label} {order_code} تجاوز مهلة التنفيذ",
+            type=Notification.Type.SYSTEM,
+            data={
+                "order_id": str(order_id),
+                "order_code": order_code,
+                "order_type": order_type,
+            },
         )
-        
-        for manager in managers:
-            Notification.objects.create(
-                recipient=manager,
-                title="تجاوز مهلة التنفيذ",
-                message=f"طلب الطباعة {order.order_code} تجاوز مهلة التنفيذ",
-                type=Notification.Type.SYSTEM,
-                data={
-                    "order_id": str(order.id),
-                    "order_code": order.order_code,
-                    "order_type": "print",
-                },
-            )
-
+        for order_type, label, orders in overdue
+        for order_id, order_code in orders.values_list("id", "order_code")
+        for manager_id in manager_ids
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=500)
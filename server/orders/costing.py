@@ -0,0 +1,265 @@
+"""
+تسعير الطلبات وحساب تكلفتها (OrderCostSnapshot)
+
+التسعيرة المطبقة على الطلب هي تسعيرة خدمته السارية في يوم تقديمه
+(effective_from <= اليوم <= effective_to، والحد الفارغ مفتوح)، وعند تعدد
+التسعيرات تُختار الأحدث سرياناً. تُحل التسعيرة لجميع الطلبات باستعلام واحد
+(Subquery على الفهرس pricing_service_range_idx)، وتُحفظ اللقطات بعملية upsert
+مجمعة. الكمية من قيمة الحقل ذي المفتاح quantity (وإلا 1).
+
+تجميع العائد الشهري (OrderCostMonthlyStat) يشمل الطلبات المكتملة فقط، ويُعاد
+حساب صفوفه المتأثرة (شهر الإكمال، الخدمة، الجهة) قبل وبعد كل تحديث للقطات.
+
+تعديل تسعيرة يعيد حساب الطلبات المتأثرة بها فقط (reprice_for_pricing) في مهمة
+Celery، لا في طلب المدير.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import TruncDate, TruncMonth
+
+from catalog.models import ServicePricing
+from orders.models import (
+    REPORTS_CACHE_NAMESPACE,
+    Order,
+    OrderCostMonthlyStat,
+    OrderCostSnapshot,
+    OrderFieldValue,
+)
+from system.cache import bump_version
+
+QUANTITY_FIELD_KEY = "quantity"
+BATCH_SIZE = 1000
+
+SNAPSHOT_UPDATE_FIELDS = [
+    "service",
+    "entity",
+    "pricing",
+    "priced_on",
+    "completed_on",
+    "quantity",
+    "internal_unit_cost",
+    "external_unit_cost",
+    "internal_cost",
+    "external_cost",
+    "computed_at",
+]
+
+
+def applicable_pricing(service_ref=OuterRef("service_id"), date_ref=OuterRef("priced_on")):
+    """التسعيرات السارية للخدمة في التاريخ، الأحدث سرياناً أولاً"""
+    return ServicePricing.objects.filter(
+        Q(effective_from__isnull=True) | Q(effective_from__lte=date_ref),
+        Q(effective_to__isnull=True) | Q(effective_to__gte=date_ref),
+        service_id=service_ref,
+    ).order_by(F("effective_from").desc(nulls_last=True), "-created_at")
+
+
+def resolve_pricing(service_id, on_date) -> ServicePricing | None:
+    return applicable_pricing(service_id, on_date).first()
+
+
+def _parse_quantity(value) -> int:
+    try:
+        quantity = int(Decimal(str(value).strip()))
+    except (ArithmeticError, ValueError):
+        return 1
+    return quantity if quantity > 0 else 1
+
+
+def _quantities(order_ids) -> dict:
+    values = OrderFieldValue.objects.filter(
+        order_id__in=order_ids, field__key=QUANTITY_FIELD_KEY
+    ).values_list("order_id", "value")
+    return {order_id: _parse_quantity(value) for order_id, value in values}
+
+
+def rollup_key(completed_on, service_id, entity_id):
+    """مفتاح صف التجميع الشهري للقطة، أو None إن لم يكتمل الطلب"""
+    if completed_on is None:
+        return None
+    return (completed_on.replace(day=1), service_id, entity_id)
+
+
+def refresh_cost_rollups(keys) -> None:
+    """إعادة حساب صفوف التجميع الشهري المحددة من لقطات التكلفة"""
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+    months = {key[0] for key in keys}
+    services = {key[1] for key in keys}
+    rows = (
+        OrderCostSnapshot.objects.filter(completed_on__isnull=False, service_id__in=services)
+        .annotate(month=TruncMonth("completed_on"))
+        .filter(month__in=months)
+        .values("month", "service_id", "entity_id")
+        .annotate(
+            count=Count("id"),
+            internal=Sum("internal_cost"),
+            external=Sum("external_cost"),
+        )
+        .order_by()
+    )
+    stale = OrderCostMonthlyStat.objects.filter(month__in=months, service_id__in=services)
+    with transaction.atomic():
+        OrderCostMonthlyStat.objects.filter(
+            id__in=[
+                stat_id
+                for stat_id, *key in stale.values_list("id", "month", "service_id", "entity_id")
+                if tuple(key) in keys
+            ]
+        ).delete()
+        OrderCostMonthlyStat.objects.bulk_create(
+            [
+                OrderCostMonthlyStat(
+                    month=row["month"],
+                    service_id=row["service_id"],
+                    entity_id=row["entity_id"],
+                    count=row["count"],
+                    internal_cost=row["internal"],
+                    external_cost=row["external"],
+                )
+                for row in rows
+                if (row["month"], row["service_id"], row["entity_id"]) in keys
+            ]
+        )
+        bump_version(REPORTS_CACHE_NAMESPACE)
+
+
+@transaction.atomic
+def rebuild_cost_rollups() -> int:
+    """إعادة بناء التجميع الشهري بالكامل من لقطات التكلفة"""
+    OrderCostMonthlyStat.objects.all().delete()
+    rows = (
+        OrderCostSnapshot.objects.filter(completed_on__isnull=False)
+        .annotate(month=TruncMonth("completed_on"))
+        .values("month", "service_id", "entity_id")
+        .annotate(
+            count=Count("id"),
+            internal=Sum("internal_cost"),
+            external=Sum("external_cost"),
+        )
+        .order_by()
+    )
+    objs = [
+        OrderCostMonthlyStat(
+            month=row["month"],
+            service_id=row["service_id"],
+            entity_id=row["entity_id"],
+            count=row["count"],
+            internal_cost=row["internal"],
+            external_cost=row["external"],
+        )
+        for row in rows.iterator(chunk_size=2000)
+    ]
+    OrderCostMonthlyStat.objects.bulk_create(objs, batch_size=1000)
+    bump_version(REPORTS_CACHE_NAMESPACE)
+    return len(objs)
+
+
+def _save_batch(rows) -> None:
+    order_ids = [row[0] for row in rows]
+    quantities = _quantities(order_ids)
+    # صفوف التجميع التي كانت تشملها اللقطات قبل التحديث
+    keys = {
+        rollup_key(*values)
+        for values in OrderCostSnapshot.objects.filter(order_id__in=order_ids).values_list(
+            "completed_on", "service_id", "entity_id"
+        )
+    }
+    snapshots = []
+    for (
+        order_id,
+        service_id,
+        entity_id,
+        priced_on,
+        completed_on,
+        pricing_id,
+        internal,
+        external,
+    ) in rows:
+        quantity = quantities.get(order_id, 1)
+        keys.add(rollup_key(completed_on, service_id, entity_id))
+        snapshots.append(
+            OrderCostSnapshot(
+                order_id=order_id,
+                service_id=service_id,
+                entity_id=entity_id,
+                pricing_id=pricing_id,
+                priced_on=priced_on,
+                completed_on=completed_on,
+                quantity=quantity,
+                internal_unit_cost=internal,
+                external_unit_cost=external,
+                internal_cost=(internal or Decimal(0)) * quantity,
+                external_cost=(external or Decimal(0)) * quantity,
+            )
+        )
+    OrderCostSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["order"],
+        update_fields=SNAPSHOT_UPDATE_FIELDS,
+    )
+    refresh_cost_rollups(keys)
+
+
+def reprice_for_pricing(service_id, effective_from=None, effective_to=None, pricing_id=None) -> int:
+    """
+    إعادة حساب طلبات الخدمة التي قد تتغير تسعيرتها بتعديل تسعيرة: المقدمة ضمن
+    مدة سريانها (الحد الفارغ مفتوح)، والتي كانت لقطاتها تستخدمها (مدتها السابقة).
+    """
+    in_range = Q()
+    if effective_from:
+        in_range &= Q(submitted_at__date__gte=effective_from)
+    if effective_to:
+        in_range &= Q(submitted_at__date__lte=effective_to)
+    if pricing_id:
+        in_range |= Q(cost_snapshot__pricing_id=pricing_id)
+    return compute_order_costs(Order.objects.filter(in_range, service_id=service_id))
+
+
+def compute_order_costs(orders=None) -> int:
+    """
+    حساب (أو إعادة حساب) لقطات التكلفة لمجموعة طلبات (QuerySet)، أو لكل الطلبات.
+    يُرجع عدد الطلبات المحسوبة.
+    """
+    orders = Order.objects.all() if orders is None else orders
+    pricing = applicable_pricing()
+    rows = (
+        orders.order_by()
+        .annotate(
+            priced_on=TruncDate("submitted_at"),
+            completed_on=Case(
+                When(status=Order.Status.READY, then=TruncDate("completed_at"))
+            ),
+        )
+        .annotate(
+            applied_pricing_id=Subquery(pricing.values("id")[:1]),
+            internal_unit=Subquery(pricing.values("internal_cost")[:1]),
+            external_unit=Subquery(pricing.values("external_cost")[:1]),
+        )
+        .values_list(
+            "id",
+            "service_id",
+            "entity_id",
+            "priced_on",
+            "completed_on",
+            "applied_pricing_id",
+            "internal_unit",
+            "external_unit",
+        )
+    )
+    count = 0
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            _save_batch(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        _save_batch(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from orders.costing import compute_order_costs, rebuild_cost_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute per-order cost snapshots from the pricing effective at submission "
+        "and rebuild the monthly ROI rollups."
+    )
+
+    def handle(self, *args, **options):
+        count = compute_order_costs()
+        rows = rebuild_cost_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(f"Computed costs for {count} orders; rebuilt {rows} monthly rows.")
+        )
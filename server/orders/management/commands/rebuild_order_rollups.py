@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild_order_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily order rollups (OrderDailyStat) from the order tables."
+
+    def handle(self, *args, **options):
+        count = rebuild_order_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily order rows."))
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.11 on 2026-10-19 00:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_stats(apps, schema_editor):
+    OrderDailyStat = apps.get_model("orders", "OrderDailyStat")
+    sources = [
+        ("Order", "general", Value(0)),
+        ("DesignOrder", "design", Value(0)),
+        ("PrintOrder", "print", Sum("quantity")),
+    ]
+    objs = []
+    for model_name, order_type, quantity in sources:
+        rows = (
+            apps.get_model("orders", model_name)
+            .objects.annotate(day=TruncDate("created_at"))
+            .values("day", "status", "entity_id")
+            .annotate(count=Count("id"), total_quantity=quantity)
+            .order_by()
+        )
+        objs.extend(
+            OrderDailyStat(
+                day=row["day"],
+                order_type=order_type,
+                status=row["status"],
+                entity_id=row["entity_id"],
+                count=row["count"],
+                quantity=row["total_quantity"] or 0,
+            )
+            for row in rows
+        )
+    OrderDailyStat.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0003_entity_denormalized_hierarchy'),
+        ('orders', '0003_printorder_printattachment_designorder_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='اليوم')),
+                ('order_type', models.CharField(choices=[('general', 'طلب عام'), ('design', 'طلب تصميم'), ('print', 'طلب طباعة')], max_length=10, verbose_name='نوع الطلب')),
+                ('status', models.CharField(max_length=20, verbose_name='الحالة')),
+                ('count', models.IntegerField(default=0, verbose_name='عدد الطلبات')),
+                ('quantity', models.BigIntegerField(default=0, verbose_name='الكمية')),
+                ('entity', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_daily_stats', to='entities.entity', verbose_name='الجهة')),
+            ],
+            options={
+                'verbose_name': 'إحصائية طلبات يومية',
+                'verbose_name_plural': 'إحصائيات الطلبات اليومية',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['entity', 'day'], name='order_stat_entity_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailystat',
+            constraint=models.UniqueConstraint(fields=('day', 'order_type', 'status', 'entity'), name='unique_order_daily_stat'),
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
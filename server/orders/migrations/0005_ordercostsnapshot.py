@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0003_entity_denormalized_hierarchy'),
+        ('catalog', '0002_pricing_range_index'),
+        ('orders', '0004_orderdailystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCostSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priced_on', models.DateField(verbose_name='تاريخ التسعير')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='الكمية')),
+                ('internal_unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='تكلفة الوحدة الداخلية')),
+                ('external_unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='تكلفة الوحدة في السوق')),
+                ('internal_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='التكلفة الداخلية')),
+                ('external_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='تكلفة السوق')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ الحساب')),
+                ('entity', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_cost_snapshots', to='entities.entity', verbose_name='الجهة')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cost_snapshot', to='orders.order', verbose_name='الطلب')),
+                ('pricing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_snapshots', to='catalog.servicepricing', verbose_name='التسعيرة المطبقة')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_snapshots', to='catalog.service', verbose_name='الخدمة')),
+            ],
+            options={
+                'verbose_name': 'تكلفة طلب',
+                'verbose_name_plural': 'تكاليف الطلبات',
+                'ordering': ['-priced_on'],
+                'indexes': [models.Index(fields=['priced_on', 'service'], name='order_cost_day_service_idx')],
+            },
+        ),
+    ]
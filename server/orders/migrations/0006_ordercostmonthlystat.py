@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_pricing_range_index'),
+        ('entities', '0003_entity_denormalized_hierarchy'),
+        ('orders', '0005_ordercostsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordercostsnapshot',
+            name='completed_on',
+            field=models.DateField(blank=True, null=True, verbose_name='تاريخ الإكمال'),
+        ),
+        migrations.CreateModel(
+            name='OrderCostMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='الشهر')),
+                ('count', models.IntegerField(default=0, verbose_name='عدد الطلبات')),
+                ('internal_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='التكلفة الداخلية')),
+                ('external_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='تكلفة السوق')),
+                ('entity', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_cost_monthly_stats', to='entities.entity', verbose_name='الجهة')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_monthly_stats', to='catalog.service', verbose_name='الخدمة')),
+            ],
+            options={
+                'verbose_name': 'إحصائية تكاليف شهرية',
+                'verbose_name_plural': 'إحصائيات التكاليف الشهرية',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['entity', 'month'], name='order_cost_entity_month_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ordercostmonthlystat',
+            constraint=models.UniqueConstraint(fields=('month', 'service', 'entity'), name='unique_order_cost_monthly_stat'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import TruncDate
+
+
+def repopulate_daily_stats(apps, schema_editor):
+    OrderDailyStat = apps.get_model("orders", "OrderDailyStat")
+    OrderDailyStat.objects.all().delete()
+    sources = [
+        ("Order", "general", F("service_id"), Value(""), Value(0)),
+        ("DesignOrder", "design", Value(None, models.UUIDField()), Value(""), Value(0)),
+        ("PrintOrder", "print", Value(None, models.UUIDField()), F("production_dept"), Sum("quantity")),
+    ]
+    objs = []
+    for model_name, order_type, service, dept, quantity in sources:
+        rows = (
+            apps.get_model("orders", model_name)
+            .objects.annotate(
+                day=TruncDate("created_at"),
+                completed_on=TruncDate("completed_at"),
+                stat_service=service,
+                stat_dept=dept,
+            )
+            .values("day", "status", "entity_id", "priority", "stat_service", "stat_dept", "completed_on")
+            .annotate(count=Count("id"), total_quantity=quantity)
+            .order_by()
+        )
+        objs.extend(
+            OrderDailyStat(
+                day=row["day"],
+                order_type=order_type,
+                status=row["status"],
+                entity_id=row["entity_id"],
+                service_id=row["stat_service"],
+                production_dept=row["stat_dept"] or "",
+                priority=row["priority"] or "",
+                completed_on=row["completed_on"],
+                count=row["count"],
+                quantity=row["total_quantity"] or 0,
+            )
+            for row in rows
+        )
+    OrderDailyStat.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_pricing_range_index'),
+        ('orders', '0006_ordercostmonthlystat'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='orderdailystat',
+            name='unique_order_daily_stat',
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='completed_on',
+            field=models.DateField(blank=True, null=True, verbose_name='يوم الإكمال'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='priority',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='الأولوية'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='production_dept',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='قسم الإنتاج'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='service',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_daily_stats', to='catalog.service', verbose_name='الخدمة'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdailystat',
+            index=models.Index(fields=['completed_on', 'order_type'], name='order_stat_completed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailystat',
+            constraint=models.UniqueConstraint(fields=('day', 'order_type', 'status', 'entity', 'service', 'production_dept', 'priority', 'completed_on'), name='unique_order_daily_stat'),
+        ),
+        migrations.RunPython(repopulate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:19
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def repopulate_daily_stats(apps, schema_editor):
+    OrderDailyStat = apps.get_model("orders", "OrderDailyStat")
+    OrderDailyStat.objects.all().delete()
+    no_service = Value(None, models.UUIDField())
+    paper = Sum(F("sides") * F("pages") * Coalesce("actual_quantity", 0))
+    sources = [
+        ("Order", "general", {"stat_service": F("service_id")}, Value(0), Value(0)),
+        ("DesignOrder", "design", {"stat_service": no_service}, Value(0), Value(0)),
+        (
+            "PrintOrder",
+            "print",
+            {
+                "stat_service": no_service,
+                "stat_dept": F("production_dept"),
+                "stat_print_type": F("print_type"),
+                "stat_paper_type": F("paper_type"),
+            },
+            Sum("quantity"),
+            paper,
+        ),
+    ]
+    objs = []
+    for model_name, order_type, dimensions, quantity, paper_consumption in sources:
+        dimensions = {
+            "stat_dept": Value(""),
+            "stat_print_type": Value(""),
+            "stat_paper_type": Value(""),
+            **dimensions,
+        }
+        rows = (
+            apps.get_model("orders", model_name)
+            .objects.annotate(
+                day=TruncDate("created_at"), completed_on=TruncDate("completed_at"), **dimensions
+            )
+            .values("day", "status", "entity_id", "priority", "completed_on", *dimensions)
+            .annotate(count=Count("id"), total_quantity=quantity, total_paper=paper_consumption)
+            .order_by()
+        )
+        objs.extend(
+            OrderDailyStat(
+                day=row["day"],
+                order_type=order_type,
+                status=row["status"],
+                entity_id=row["entity_id"],
+                service_id=row["stat_service"],
+                production_dept=row["stat_dept"] or "",
+                print_type=row["stat_print_type"] or "",
+                paper_type=row["stat_paper_type"] or "",
+                priority=row["priority"] or "",
+                completed_on=row["completed_on"],
+                count=row["count"],
+                quantity=row["total_quantity"] or 0,
+                paper_consumption=row["total_paper"] or 0,
+            )
+            for row in rows
+        )
+    OrderDailyStat.objects.bulk_create(objs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_orderdailystat_dimensions'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='orderdailystat',
+            name='unique_order_daily_stat',
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='paper_consumption',
+            field=models.BigIntegerField(default=0, verbose_name='استهلاك الورق'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='paper_type',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='نوع الورق'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystat',
+            name='print_type',
+            field=models.CharField(blank=True, default='', max_length=30, verbose_name='نوع الطباعة'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailystat',
+            constraint=models.UniqueConstraint(fields=('day', 'order_type', 'status', 'entity', 'service', 'production_dept', 'print_type', 'paper_type', 'priority', 'completed_on'), name='unique_order_daily_stat'),
+        ),
+        migrations.RunPython(repopulate_daily_stats, migrations.RunPython.noop),
+    ]
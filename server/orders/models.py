@@ -9,6 +9,9 @@ from catalog.models import Service, ServiceField
 
 User = settings.AUTH_USER_MODEL
 
+# نطاق إصدار الكاش للتقارير (يتغير مع أي تحديث لجداول التجميع)
+REPORTS_CACHE_NAMESPACE = "reports"
+
 
 def order_attachment_upload_path(instance, filename):
     return f"orders/{instance.order.order_code}/{filename}"
@@ -88,8 +91,8 @@ class Order(models.Model):
         if not self.order_code:
             self.order_code = self._generate_order_code()
         # ربط الطلب بالجهة تلقائياً من جهة المستخدم
-        if not self.entity and self.requester and self.requester.entity:
-            self.entity = self.requester.entity
+        if not self.entity_id and self.requester_id:
+            self.entity_id = self.requester.entity_id
         super().save(*args, **kwargs)
 
     @staticmethod
@@ -327,8 +330,8 @@ class DesignOrder(models.Model):
         if not self.order_code:
             self.order_code = self._generate_order_code()
         # ربط الطلب بالجهة تلقائياً
-        if not self.entity and self.requester and self.requester.entity:
-            self.entity = self.requester.entity
+        if not self.entity_id and self.requester_id:
+            self.entity_id = self.requester.entity_id
         # تعيين موعد انتهاء التأكيد عند الانتقال إلى PENDING_CONFIRM
         if self.status == self.Status.PENDING_CONFIRM and not self.confirmation_deadline:
             from datetime import timedelta
@@ -572,8 +575,8 @@ class PrintOrder(models.Model):
         if not self.order_code:
             self.order_code = self._generate_order_code()
         # ربط الطلب بالجهة تلقائياً
-        if not self.entity and self.requester and self.requester.entity:
-            self.entity = self.requester.entity
+        if not self.entity_id and self.requester_id:
+            self.entity_id = self.requester.entity_id
         # تعيين موعد انتهاء التأكيد عند الانتقال إلى PENDING_CONFIRM
         if self.status == self.Status.PENDING_CONFIRM and not self.confirmation_deadline:
             from datetime import timedelta
@@ -653,3 +656,176 @@ class PrintAttachment(models.Model):
         return self.name or (self.file.name if self.file else self.link_url)
 
 
+
+
+class OrderDailyStat(models.Model):
+    """
+    جدول الحقائق اليومي للتقارير: أعداد الطلبات حسب (يوم الإنشاء، نوع الطلب،
+    الحالة، الجهة، الخدمة، قسم الإنتاج، نوع الطباعة، نوع الورق، الأولوية، يوم الإكمال)
+    يُحدَّث تدريجياً عند حفظ أو حذف أي طلب، ويُجمع على مستوى الشجرة الفرعية
+    للجهات عبر المسار الهرمي (entity__path__startswith).
+    الخدمة للطلبات العامة فقط؛ قسم الإنتاج ونوعا الطباعة والورق والكمية واستهلاك
+    الورق (الأوجه × الصفحات × الكمية الفعلية) لطلبات الطباعة فقط.
+    """
+
+    class OrderType(models.TextChoices):
+        GENERAL = "general", "طلب عام"
+        DESIGN = "design", "طلب تصميم"
+        PRINT = "print", "طلب طباعة"
+
+    day = models.DateField("اليوم")
+    order_type = models.CharField("نوع الطلب", max_length=10, choices=OrderType.choices)
+    status = models.CharField("الحالة", max_length=20)
+    entity = models.ForeignKey(
+        "entities.Entity",
+        on_delete=models.CASCADE,
+        related_name="order_daily_stats",
+        null=True,
+        blank=True,
+        verbose_name="الجهة",
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name="order_daily_stats",
+        null=True,
+        blank=True,
+        verbose_name="الخدمة",
+    )
+    production_dept = models.CharField("قسم الإنتاج", max_length=20, blank=True, default="")
+    print_type = models.CharField("نوع الطباعة", max_length=30, blank=True, default="")
+    paper_type = models.CharField("نوع الورق", max_length=20, blank=True, default="")
+    priority = models.CharField("الأولوية", max_length=20, blank=True, default="")
+    completed_on = models.DateField("يوم الإكمال", null=True, blank=True)
+    count = models.IntegerField("عدد الطلبات", default=0)
+    quantity = models.BigIntegerField("الكمية", default=0)
+    paper_consumption = models.BigIntegerField("استهلاك الورق", default=0)
+
+    class Meta:
+        verbose_name = "إحصائية طلبات يومية"
+        verbose_name_plural = "إحصائيات الطلبات اليومية"
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "day",
+                    "order_type",
+                    "status",
+                    "entity",
+                    "service",
+                    "production_dept",
+                    "print_type",
+                    "paper_type",
+                    "priority",
+                    "completed_on",
+                ],
+                name="unique_order_daily_stat",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["entity", "day"], name="order_stat_entity_day_idx"),
+            models.Index(fields=["completed_on", "order_type"], name="order_stat_completed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.order_type}/{self.status}: {self.count}"
+
+
+class OrderCostSnapshot(models.Model):
+    """
+    تكلفة الطلب الداخلية مقابل تكلفة السوق وقت تقديمه (من التسعيرة السارية)
+    تُحفظ لكل طلب عام حتى تصبح تقارير التوفير والعائد تجميعات مباشرة.
+    completed_on هو يوم إكمال الطلب (الحالة READY) وإلا NULL.
+    """
+
+    order = models.OneToOneField(
+        Order, on_delete=models.CASCADE, related_name="cost_snapshot", verbose_name="الطلب"
+    )
+    service = models.ForeignKey(
+        Service, on_delete=models.CASCADE, related_name="cost_snapshots", verbose_name="الخدمة"
+    )
+    entity = models.ForeignKey(
+        "entities.Entity",
+        on_delete=models.SET_NULL,
+        related_name="order_cost_snapshots",
+        null=True,
+        blank=True,
+        verbose_name="الجهة",
+    )
+    pricing = models.ForeignKey(
+        "catalog.ServicePricing",
+        on_delete=models.SET_NULL,
+        related_name="cost_snapshots",
+        null=True,
+        blank=True,
+        verbose_name="التسعيرة المطبقة",
+    )
+    priced_on = models.DateField("تاريخ التسعير")
+    completed_on = models.DateField("تاريخ الإكمال", null=True, blank=True)
+    quantity = models.PositiveIntegerField("الكمية", default=1)
+    internal_unit_cost = models.DecimalField(
+        "تكلفة الوحدة الداخلية", max_digits=8, decimal_places=2, null=True, blank=True
+    )
+    external_unit_cost = models.DecimalField(
+        "تكلفة الوحدة في السوق", max_digits=8, decimal_places=2, null=True, blank=True
+    )
+    internal_cost = models.DecimalField("التكلفة الداخلية", max_digits=14, decimal_places=2, default=0)
+    external_cost = models.DecimalField("تكلفة السوق", max_digits=14, decimal_places=2, default=0)
+    computed_at = models.DateTimeField("تاريخ الحساب", auto_now=True)
+
+    class Meta:
+        verbose_name = "تكلفة طلب"
+        verbose_name_plural = "تكاليف الطلبات"
+        ordering = ["-priced_on"]
+        indexes = [
+            models.Index(fields=["priced_on", "service"], name="order_cost_day_service_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.internal_cost} / {self.external_cost}"
+
+    @property
+    def savings(self):
+        return self.external_cost - self.internal_cost
+
+
+class OrderCostMonthlyStat(models.Model):
+    """
+    تجميع شهري لتكاليف الطلبات المكتملة حسب (شهر الإكمال، الخدمة، الجهة)
+    يُعاد حساب الصفوف المتأثرة فقط عند تغير لقطات التكلفة، ويُجمع على مستوى
+    الشجرة الفرعية للجهات عبر المسار الهرمي. month هو أول يوم في الشهر.
+    """
+
+    month = models.DateField("الشهر")
+    service = models.ForeignKey(
+        Service, on_delete=models.CASCADE, related_name="cost_monthly_stats", verbose_name="الخدمة"
+    )
+    entity = models.ForeignKey(
+        "entities.Entity",
+        on_delete=models.CASCADE,
+        related_name="order_cost_monthly_stats",
+        null=True,
+        blank=True,
+        verbose_name="الجهة",
+    )
+    count = models.IntegerField("عدد الطلبات", default=0)
+    internal_cost = models.DecimalField("التكلفة الداخلية", max_digits=16, decimal_places=2, default=0)
+    external_cost = models.DecimalField("تكلفة السوق", max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "إحصائية تكاليف شهرية"
+        verbose_name_plural = "إحصائيات التكاليف الشهرية"
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "service", "entity"],
+                name="unique_order_cost_monthly_stat",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["entity", "month"], name="order_cost_entity_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.service_id}: {self.count}"
+
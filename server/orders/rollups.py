@@ -0,0 +1,222 @@
+"""
+تجميعات الطلبات اليومية (OrderDailyStat)
+
+تُحفظ لكل طلب قيم حقول بصمته الخام عند تحميله، وتُحسب البصمة (أبعاده في جدول الحقائق مع
+الكمية واستهلاك الورق) عند الحفظ أو الحذف فقط، فيُطبق الفرق على صفوف التجميع بدل إعادة
+العد من جداول الطلبات.
+التحديثات المباشرة عبر QuerySet.update لا تمر بالإشارات؛ يُستخدم أمر
+rebuild_order_rollups لإعادة البناء عند الحاجة.
+"""
+from functools import cache
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, UUIDField, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from orders.models import REPORTS_CACHE_NAMESPACE, DesignOrder, Order, OrderDailyStat, PrintOrder
+from system.cache import bump_version
+
+ORDER_TYPES = {
+    Order: OrderDailyStat.OrderType.GENERAL,
+    DesignOrder: OrderDailyStat.OrderType.DESIGN,
+    PrintOrder: OrderDailyStat.OrderType.PRINT,
+}
+
+SNAPSHOT_ATTR = "_daily_stat_key"
+UNKNOWN = object()
+KEY_FIELDS = {
+    "status",
+    "entity_id",
+    "created_at",
+    "quantity",
+    "service_id",
+    "production_dept",
+    "print_type",
+    "paper_type",
+    "priority",
+    "completed_at",
+    "actual_quantity",
+    "sides",
+    "pages",
+}
+DIMENSIONS = (
+    "service_id",
+    "production_dept",
+    "print_type",
+    "paper_type",
+    "priority",
+    "completed_on",
+)
+
+
+@cache
+def _key_fields(model) -> tuple:
+    """حقول البصمة الموجودة في نموذج الطلب"""
+    return tuple(
+        field.attname for field in model._meta.concrete_fields if field.attname in KEY_FIELDS
+    )
+
+
+def _key(model, values: dict):
+    """
+    بصمة الطلب في التجميع: (النوع، الجهة، الحالة، اليوم، الخدمة، قسم الإنتاج،
+    نوع الطباعة، نوع الورق، الأولوية، يوم الإكمال، الكمية، استهلاك الورق)
+    """
+    if values["created_at"] is None:
+        return None
+    printed = model is PrintOrder
+    completed_at = values["completed_at"]
+    return (
+        ORDER_TYPES[model],
+        values["entity_id"],
+        values["status"],
+        timezone.localdate(values["created_at"]),
+        values.get("service_id"),
+        values.get("production_dept") or "",
+        values.get("print_type") or "",
+        values.get("paper_type") or "",
+        values["priority"] or "",
+        timezone.localdate(completed_at) if completed_at else None,
+        values["quantity"] if printed else 0,
+        # مطابق لـ PrintOrder.calculate_paper_consumption
+        values["sides"] * values["pages"] * values["actual_quantity"]
+        if printed and values["actual_quantity"]
+        else 0,
+    )
+
+
+def stat_key(instance):
+    """بصمة الطلب من قيمه الحالية"""
+    model = type(instance)
+    return _key(model, {name: getattr(instance, name) for name in _key_fields(model)})
+
+
+def remember(instance) -> None:
+    """
+    حفظ قيم حقول البصمة الخام عند تحميل الطلب (post_init لكل صف، فلا تُحسب البصمة هنا).
+    الطلب المحمّل بحقول مؤجلة (only/defer) تُقرأ بصمته من قاعدة البيانات قبل الحفظ.
+    """
+    values = instance.__dict__
+    fields = _key_fields(type(instance))
+    if all(name in values for name in fields):
+        values[SNAPSHOT_ATTR] = {name: values[name] for name in fields}
+    else:
+        values[SNAPSHOT_ATTR] = UNKNOWN
+
+
+def resolve_unknown(instance) -> None:
+    """قبل الحفظ أو الحذف: قراءة البصمة من قاعدة البيانات إن حُمّل الطلب بحقول مؤجلة"""
+    if instance.__dict__.get(SNAPSHOT_ATTR) is not UNKNOWN:
+        return
+    stored = type(instance).objects.filter(pk=instance.pk).first()
+    instance.__dict__[SNAPSHOT_ATTR] = stat_key(stored) if stored else None
+
+
+def _previous_key(instance):
+    """البصمة المحفوظة قبل التعديل الحالي، محسوبة من القيم الخام عند أول طلب لها"""
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+    if isinstance(snapshot, dict):
+        snapshot = instance.__dict__[SNAPSHOT_ATTR] = _key(type(instance), snapshot)
+    return snapshot
+
+
+def previous_status(instance):
+    """حالة الطلب المحفوظة قبل التعديل الحالي (None للطلب الجديد)"""
+    key = _previous_key(instance)
+    return None if key is None or key is UNKNOWN else key[2]
+
+
+def _apply(key, sign: int) -> None:
+    order_type, entity_id, status, day, *dimensions, quantity, paper = key
+    lookup = {
+        "day": day,
+        "order_type": order_type,
+        "status": status,
+        "entity_id": entity_id,
+        **dict(zip(DIMENSIONS, dimensions)),
+    }
+    delta = {
+        "count": F("count") + sign,
+        "quantity": F("quantity") + sign * quantity,
+        "paper_consumption": F("paper_consumption") + sign * paper,
+    }
+    # الاستهداف بالمعرف لأن entity وغيرها قد تكون NULL (لا يمنع القيد تكرارها)
+    stat_id = OrderDailyStat.objects.filter(**lookup).values_list("id", flat=True).first()
+    if stat_id is not None:
+        OrderDailyStat.objects.filter(id=stat_id).update(**delta)
+        return
+    if sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            OrderDailyStat.objects.create(
+                count=1, quantity=quantity, paper_consumption=paper, **lookup
+            )
+    except IntegrityError:
+        OrderDailyStat.objects.filter(**lookup).update(**delta)
+
+
+def record_change(instance, deleted: bool = False) -> None:
+    """تطبيق الفرق بين البصمة السابقة والحالية للطلب"""
+    old_key = _previous_key(instance)
+    new_key = None if deleted else stat_key(instance)
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        _apply(old_key, -1)
+    if new_key is not None:
+        _apply(new_key, 1)
+    instance.__dict__[SNAPSHOT_ATTR] = new_key
+    bump_version(REPORTS_CACHE_NAMESPACE)
+
+
+@transaction.atomic
+def rebuild_order_rollups() -> int:
+    """إعادة بناء التجميعات بالكامل من جداول الطلبات"""
+    OrderDailyStat.objects.all().delete()
+    objs = []
+    for model, order_type in ORDER_TYPES.items():
+        printed = model is PrintOrder
+        measures = {
+            "total_quantity": Sum("quantity") if printed else Value(0),
+            "total_paper": (
+                Sum(F("sides") * F("pages") * Coalesce("actual_quantity", 0))
+                if printed
+                else Value(0)
+            ),
+        }
+        dimensions = {
+            "stat_service": F("service_id") if model is Order else Value(None, UUIDField()),
+            "stat_dept": F("production_dept") if printed else Value(""),
+            "stat_print_type": F("print_type") if printed else Value(""),
+            "stat_paper_type": F("paper_type") if printed else Value(""),
+            "completed_on": TruncDate("completed_at"),
+        }
+        rows = (
+            model.objects.annotate(day=TruncDate("created_at"), **dimensions)
+            .values("day", "status", "entity_id", "priority", *dimensions)
+            .annotate(count=Count("id"), **measures)
+            .order_by()
+        )
+        objs.extend(
+            OrderDailyStat(
+                day=row["day"],
+                order_type=order_type,
+                status=row["status"],
+                entity_id=row["entity_id"],
+                service_id=row["stat_service"],
+                production_dept=row["stat_dept"] or "",
+                print_type=row["stat_print_type"] or "",
+                paper_type=row["stat_paper_type"] or "",
+                priority=row["priority"] or "",
+                completed_on=row["completed_on"],
+                count=row["count"],
+                quantity=row["total_quantity"] or 0,
+                paper_consumption=row["total_paper"] or 0,
+            )
+            for row in rows.iterator(chunk_size=2000)
+        )
+    OrderDailyStat.objects.bulk_create(objs, batch_size=1000)
+    bump_version(REPORTS_CACHE_NAMESPACE)
+    return len(objs)
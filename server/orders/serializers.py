@@ -4,7 +4,9 @@ from rest_framework import serializers
 from accounts.serializers import UserSerializer
 from catalog.models import ServiceField
 from catalog.serializers import ServiceSerializer
+from catalog.validation import get_validator
 from entities.serializers import EntityListSerializer
+from orders.costing import compute_order_costs
 from orders.models import (
     DesignAttachment,
     DesignOrder,
@@ -86,7 +88,8 @@ class OrderListSerializer(serializers.ModelSerializer):
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
-    field_values = OrderFieldValueSerializer(many=True, write_only=True)
+    # [{"field": <id>, "value": ...}]؛ يُتحقق منها بكائن التحقق المخزن للخدمة
+    field_values = serializers.ListField(child=serializers.DictField(), write_only=True)
 
     class Meta:
         model = Order
@@ -100,20 +103,14 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "requires_approval"]
 
-    def validate_field_values(self, values):
-        service = self.initial_data.get("service")
-        if not service:
-            raise serializers.ValidationError("يجب تحديد الخدمة.")
-        expected_fields = ServiceField.objects.filter(service_id=service)
-        provided_ids = {str(field.get("field")) for field in values}
-        missing = {
-            field.id
-            for field in expected_fields
-            if field.is_required and str(field.id) not in provided_ids
-        }
-        if missing:
-            raise serializers.ValidationError("بعض الحقول الإلزامية لم يتم تعبئتها.")
-        return values
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        validator = get_validator(attrs["service"].pk)
+        try:
+            attrs["field_values"] = validator.validate(attrs.get("field_values", []))
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"field_values": exc.detail})
+        return attrs
 
     def create(self, validated_data):
         field_values = validated_data.pop("field_values", [])
@@ -132,13 +129,14 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             **validated_data,
         )
 
-        for value in field_values:
-            field = value["field"]
-            OrderFieldValue.objects.create(
-                order=order,
-                field=field,
-                value=value.get("value"),
-            )
+        OrderFieldValue.objects.bulk_create(
+            [
+                OrderFieldValue(order=order, field_id=field_id, value=value)
+                for field_id, value in field_values
+            ]
+        )
+        # تثبيت التكلفة الداخلية وتكلفة السوق حسب التسعيرة السارية اليوم
+        compute_order_costs(Order.objects.filter(pk=order.pk))
 
         OrderStatusLog.objects.create(
             order=order,
@@ -1,29 +1,40 @@
 """
 Django signals لإرسال الإشعارات عند إنشاء وتحديث الطلبات
 """
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.db import transaction
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
+from kombu.exceptions import OperationalError
 
-from notifications.models import Notification, NotificationPreference
-from orders.models import Order, DesignOrder, PrintOrder
+from accounts.roles import ORDER_STAFF_ROLES, recipient_ids
+from catalog.models import ServicePricing
+from notifications.models import Notification
+from orders.models import Order, OrderCostSnapshot, DesignOrder, PrintOrder
+from orders.costing import compute_order_costs, refresh_cost_rollups, rollup_key
+from orders.rollups import previous_status, record_change, remember, resolve_unknown
 
-User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
-def get_users_with_update_permissions():
+def notify_order_staff(title: str, message: str, data: dict) -> None:
     """
-    الحصول على المستخدمين الذين لديهم صلاحيات تحديث حالة الطلب
+    إشعار المستخدمين الذين لديهم صلاحيات تحديث حالة الطلب (ممن فعّلوا إشعارات الطلبات)
+    المستلمون من فهرس الأدوار المخزن، والإشعارات تُنشأ بعملية واحدة.
     """
-    return User.objects.filter(
-        role__in=[
-            User.Role.PRINT_MANAGER,
-            User.Role.DEPT_MANAGER,
-            User.Role.DEPT_EMPLOYEE,
-            User.Role.ADMIN,  # للتوافق
-            User.Role.APPROVER,  # للتوافق
-        ],
-        is_active=True,
+    recipients = recipient_ids(*ORDER_STAFF_ROLES, preference="order_updates")
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=recipient_id,
+                title=title,
+                message=message,
+                type=Notification.Type.ORDER_STATUS,
+                data=data,
+            )
+            for recipient_id in recipients
+        ]
     )
 
 
@@ -33,28 +44,17 @@ def notify_on_order_created(sender, instance, created, **kwargs):
     إرسال إشعار عند إنشاء طلب جديد للمستخدمين الذين لديهم صلاحيات تحديث الحالة
     """
     if created and instance.status == Order.Status.PENDING:
-        # الحصول على المستخدمين الذين لديهم صلاحيات تحديث الحالة
-        managers = get_users_with_update_permissions()
-        
-        for manager in managers:
-            # التحقق من تفضيلات المستخدم
-            prefs, _ = NotificationPreference.objects.get_or_create(user=manager)
-            if not prefs.order_updates:
-                continue
-            
-            Notification.objects.create(
-                recipient=manager,
-                title="طلب جديد يحتاج مراجعة",
-                message=f"تم إنشاء طلب جديد {instance.order_code} من {instance.requester.full_name}",
-                type=Notification.Type.ORDER_STATUS,
-                data={
-                    "order_id": str(instance.id),
-                    "order_code": instance.order_code,
-                    "order_type": "order",
-                    "requester_name": instance.requester.full_name,
-                    "service_name": instance.service.name,
-                },
-            )
+        notify_order_staff(
+            title="طلب جديد يحتاج مراجعة",
+            message=f"تم إنشاء طلب جديد {instance.order_code} من {instance.requester.full_name}",
+            data={
+                "order_id": str(instance.id),
+                "order_code": instance.order_code,
+                "order_type": "order",
+                "requester_name": instance.requester.full_name,
+                "service_name": instance.service.name,
+            },
+        )
 
 
 @receiver(post_save, sender=DesignOrder)
@@ -63,26 +63,17 @@ def notify_on_design_order_created(sender, instance, created, **kwargs):
     إرسال إشعار عند إنشاء طلب تصميم جديد للمستخدمين الذين لديهم صلاحيات تحديث الحالة
     """
     if created and instance.status == DesignOrder.Status.PENDING_REVIEW:
-        managers = get_users_with_update_permissions()
-        
-        for manager in managers:
-            prefs, _ = NotificationPreference.objects.get_or_create(user=manager)
-            if not prefs.order_updates:
-                continue
-            
-            Notification.objects.create(
-                recipient=manager,
-                title="طلب تصميم جديد يحتاج مراجعة",
-                message=f"تم إنشاء طلب تصميم جديد {instance.order_code} من {instance.requester.full_name}",
-                type=Notification.Type.ORDER_STATUS,
-                data={
-                    "order_id": str(instance.id),
-                    "order_code": instance.order_code,
-                    "order_type": "design",
-                    "requester_name": instance.requester.full_name,
-                    "title": instance.title,
-                },
-            )
+        notify_order_staff(
+            title="طلب تصميم جديد يحتاج مراجعة",
+            message=f"تم إنشاء طلب تصميم جديد {instance.order_code} من {instance.requester.full_name}",
+            data={
+                "order_id": str(instance.id),
+                "order_code": instance.order_code,
+                "order_type": "design",
+                "requester_name": instance.requester.full_name,
+                "title": instance.title,
+            },
+        )
 
 
 @receiver(post_save, sender=PrintOrder)
@@ -91,24 +82,90 @@ def notify_on_print_order_created(sender, instance, created, **kwargs):
     إرسال إشعار عند إنشاء طلب طباعة جديد للمستخدمين الذين لديهم صلاحيات تحديث الحالة
     """
     if created and instance.status == PrintOrder.Status.PENDING_REVIEW:
-        managers = get_users_with_update_permissions()
-        
-        for manager in managers:
-            prefs, _ = NotificationPreference.objects.get_or_create(user=manager)
-            if not prefs.order_updates:
-                continue
-            
-            Notification.objects.create(
-                recipient=manager,
-                title="طلب طباعة جديد يحتاج مراجعة",
-                message=f"تم إنشاء طلب طباعة جديد {instance.order_code} من {instance.requester.full_name}",
-                type=Notification.Type.ORDER_STATUS,
-                data={
-                    "order_id": str(instance.id),
-                    "order_code": instance.order_code,
-                    "order_type": "print",
-                    "requester_name": instance.requester.full_name,
-                    "print_type": instance.print_type,
-                },
-            )
+        notify_order_staff(
+            title="طلب طباعة جديد يحتاج مراجعة",
+            message=f"تم إنشاء طلب طباعة جديد {instance.order_code} من {instance.requester.full_name}",
+            data={
+                "order_id": str(instance.id),
+                "order_code": instance.order_code,
+                "order_type": "print",
+                "requester_name": instance.requester.full_name,
+                "print_type": instance.print_type,
+            },
+        )
+
+
+@receiver(post_init, sender=Order)
+@receiver(post_init, sender=DesignOrder)
+@receiver(post_init, sender=PrintOrder)
+def remember_daily_stat_key(sender, instance, **kwargs):
+    remember(instance)
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=DesignOrder)
+@receiver(pre_save, sender=PrintOrder)
+@receiver(pre_delete, sender=Order)
+@receiver(pre_delete, sender=DesignOrder)
+@receiver(pre_delete, sender=PrintOrder)
+def load_daily_stat_key(sender, instance, **kwargs):
+    resolve_unknown(instance)
+
+
+def recompute_cost_on_completion(instance, created) -> None:
+    """تحديث لقطة التكلفة وتجميع العائد عند إكمال الطلب أو التراجع عن إكماله"""
+    if created or Order.Status.READY not in (previous_status(instance), instance.status):
+        return
+    order_id = instance.pk
+    transaction.on_commit(lambda: compute_order_costs(Order.objects.filter(pk=order_id)))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_save, sender=DesignOrder)
+@receiver(post_save, sender=PrintOrder)
+def update_daily_stats(sender, instance, created, **kwargs):
+    """تحديث تجميعات الطلبات اليومية بالفرق بين الحالة السابقة والحالية"""
+    if sender is Order:
+        # قبل record_change لأنها تستبدل البصمة التي تُقرأ منها الحالة السابقة
+        recompute_cost_on_completion(instance, created)
+    record_change(instance)
+
+
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=DesignOrder)
+@receiver(post_delete, sender=PrintOrder)
+def remove_from_daily_stats(sender, instance, **kwargs):
+    record_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=ServicePricing)
+@receiver(post_delete, sender=ServicePricing)
+def reprice_service_orders(sender, instance, signal, **kwargs):
+    """إعادة حساب تكاليف الطلبات المتأثرة بتعديل التسعيرة (في مهمة Celery)"""
+    from orders.tasks import reprice_pricing_orders
+
+    args = (
+        str(instance.service_id),
+        instance.effective_from.isoformat() if instance.effective_from else None,
+        instance.effective_to.isoformat() if instance.effective_to else None,
+        # عند الحذف تُفرغ لقطاتها (SET_NULL)، فتكفي مدة السريان
+        str(instance.pk) if signal is post_save else None,
+    )
+
+    def queue():
+        try:
+            reprice_pricing_orders.delay(*args)
+        except OperationalError:
+            # الوسيط غير متاح: لا يُفشل حفظ التسعيرة، وتُحسب التكاليف في العملية نفسها
+            logger.warning("Celery broker unavailable, repricing service %s in-process", args[0])
+            reprice_pricing_orders(*args)
+
+    transaction.on_commit(queue)
+
+
+@receiver(post_delete, sender=OrderCostSnapshot)
+def remove_from_cost_rollups(sender, instance, **kwargs):
+    key = rollup_key(instance.completed_on, instance.service_id, instance.entity_id)
+    if key is not None:
+        transaction.on_commit(lambda: refresh_cost_rollups([key]))
 
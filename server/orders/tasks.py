@@ -0,0 +1,18 @@
+"""
+Celery tasks لتكاليف الطلبات
+"""
+from celery import shared_task
+from django.utils.dateparse import parse_date
+
+from orders.costing import reprice_for_pricing
+
+
+@shared_task
+def reprice_pricing_orders(service_id, effective_from=None, effective_to=None, pricing_id=None):
+    """إعادة حساب لقطات التكلفة للطلبات المتأثرة بتعديل تسعيرة"""
+    return reprice_for_pricing(
+        service_id,
+        parse_date(effective_from) if effective_from else None,
+        parse_date(effective_to) if effective_to else None,
+        pricing_id,
+    )
@@ -1,8 +1,26 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from kombu.exceptions import OperationalError
+from django.utils import timezone
+from rest_framework.test import APIClient
 
 from accounts.models import User
-from catalog.models import Service
-from orders.models import Order
+from catalog.models import Service, ServiceField, ServicePricing
+from entities.models import Entity
+from orders.costing import compute_order_costs, rebuild_cost_rollups
+from orders.models import (
+    DesignOrder,
+    Order,
+    OrderCostMonthlyStat,
+    OrderCostSnapshot,
+    OrderDailyStat,
+    OrderFieldValue,
+)
+from orders.rollups import rebuild_order_rollups
+from orders.tasks import reprice_pricing_orders
 
 
 class OrderModelTests(TestCase):
@@ -36,3 +54,175 @@ class OrderModelTests(TestCase):
         self.assertNotEqual(first_order.order_code, second_order.order_code)
 
 
+
+
+class OrderDailyStatTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root = Entity.objects.create(name="وكالة", level=Entity.Level.VICE_RECTORATE)
+            self.college = Entity.objects.create(
+                name="كلية", level=Entity.Level.COLLEGE_DEANSHIP, parent=self.root
+            )
+            self.department = Entity.objects.create(
+                name="قسم", level=Entity.Level.DEPARTMENT_UNIT, parent=self.college
+            )
+        self.user = User.objects.create_user(
+            email="requester@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Requester",
+            role=User.Role.PRINT_MANAGER,
+            entity=self.department,
+        )
+        self.service = Service.objects.create(name="طباعة", description="خدمة", icon="🖨️")
+
+    def test_rollup_follows_status_changes_and_sums_subtree(self):
+        order = Order.objects.create(service=self.service, requester=self.user)
+        Order.objects.create(service=self.service, requester=self.user)
+        order = Order.objects.get(pk=order.pk)
+        order.status = Order.Status.APPROVED
+        order.save()
+
+        stats = dict(
+            OrderDailyStat.objects.filter(count__gt=0).values_list("status", "count")
+        )
+        self.assertEqual(stats, {Order.Status.PENDING: 1, Order.Status.APPROVED: 1})
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            "/api/admin/reports/orders/", {"vice_rectorate": str(self.root.id)}
+        )
+        self.assertEqual(response.data["general"]["total"], 2)
+        self.assertEqual(response.data["by_entity"][str(self.college.id)]["total"], 2)
+
+        rebuild_order_rollups()
+        self.assertEqual(
+            dict(OrderDailyStat.objects.values_list("status", "count")), stats
+        )
+
+    def test_fact_dimensions_feed_filters_and_productivity(self):
+        Order.objects.create(
+            service=self.service, requester=self.user, priority=Order.Priority.HIGH
+        )
+        design = DesignOrder.objects.create(requester=self.user, title="شعار")
+        DesignOrder.objects.create(requester=self.user, title="ملصق")
+        design = DesignOrder.objects.get(pk=design.pk)
+        design.status = DesignOrder.Status.COMPLETED
+        design.completed_at = timezone.now()
+        design.save()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(
+            "/api/admin/reports/orders/",
+            {"service": str(self.service.id), "priority": Order.Priority.HIGH},
+        )
+        self.assertEqual(response.data["summary"]["total_orders"], 1)
+
+        response = client.get("/api/admin/reports/productivity/")
+        self.assertEqual(response.data["design_completed"], 1)
+        self.assertEqual(response.data["design_pending"], 1)
+
+        columns = ("order_type", "status", "service", "priority", "completed_on", "count")
+        facts = set(OrderDailyStat.objects.values_list(*columns))
+        rebuild_order_rollups()
+        self.assertEqual(set(OrderDailyStat.objects.values_list(*columns)), facts)
+
+
+class OrderCostSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="costs@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Costs",
+            role=User.Role.ADMIN,
+        )
+        self.service = Service.objects.create(name="طباعة", description="خدمة", icon="🖨️")
+        self.quantity = ServiceField.objects.create(
+            service=self.service, key="quantity", label="الكمية", field_type="number"
+        )
+        ServicePricing.objects.create(
+            service=self.service,
+            internal_cost=Decimal("2.00"),
+            external_cost=Decimal("5.00"),
+            effective_to=date(2024, 6, 30),
+        )
+        ServicePricing.objects.create(
+            service=self.service,
+            internal_cost=Decimal("3.00"),
+            external_cost=Decimal("4.00"),
+            effective_from=date(2024, 7, 1),
+        )
+
+    def _order(self, day, quantity):
+        order = Order.objects.create(
+            service=self.service,
+            requester=self.user,
+            submitted_at=timezone.make_aware(datetime(*day, 10)),
+        )
+        OrderFieldValue.objects.create(order=order, field=self.quantity, value=quantity)
+        return order
+
+    def test_costs_follow_effective_pricing_and_quantity(self):
+        old = self._order((2024, 3, 1), 10)
+        new = self._order((2024, 8, 1), "4")
+
+        self.assertEqual(compute_order_costs(), 2)
+        old_cost = OrderCostSnapshot.objects.get(order=old)
+        new_cost = OrderCostSnapshot.objects.get(order=new)
+        self.assertEqual((old_cost.internal_cost, old_cost.external_cost), (20, 50))
+        self.assertEqual((new_cost.internal_cost, new_cost.external_cost), (12, 16))
+
+        # تعديل التسعيرة يعيد حساب الطلبات المتأثرة بها فقط في مهمة Celery
+        with mock.patch.object(reprice_pricing_orders, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                ServicePricing.objects.filter(effective_from=date(2024, 7, 1)).get().delete()
+        delay.assert_called_once_with(str(self.service.pk), "2024-07-01", None, None)
+        self.assertEqual(reprice_pricing_orders(*delay.call_args.args), 1)
+        new_cost.refresh_from_db()
+        self.assertIsNone(new_cost.pricing_id)
+        self.assertEqual(new_cost.external_cost, 0)
+
+    def test_reprice_runs_in_process_without_broker(self):
+        order = self._order((2024, 8, 1), 4)
+        compute_order_costs()
+        pricing = ServicePricing.objects.get(effective_from=date(2024, 7, 1))
+        pricing.external_cost = Decimal("6.00")
+        broker_down = OperationalError("broker unavailable")
+        # حفظ التسعيرة ينجح دون وسيط، وتُعاد الحسابات في العملية نفسها
+        with mock.patch.object(reprice_pricing_orders, "delay", side_effect=broker_down):
+            with self.captureOnCommitCallbacks(execute=True):
+                pricing.save()
+        self.assertEqual(OrderCostSnapshot.objects.get(order=order).external_cost, 24)
+
+    def test_roi_rollup_follows_completion(self):
+        order = self._order((2024, 8, 1), 4)
+        self._order((2024, 8, 2), 1)
+        compute_order_costs()
+        self.assertFalse(OrderCostMonthlyStat.objects.exists())
+
+        order = Order.objects.get(pk=order.pk)
+        order.status = Order.Status.READY
+        order.completed_at = timezone.make_aware(datetime(2024, 9, 3, 12))
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        stat = OrderCostMonthlyStat.objects.get()
+        self.assertEqual(
+            (stat.month, stat.count, stat.internal_cost, stat.external_cost),
+            (date(2024, 9, 1), 1, 12, 16),
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/admin/reports/roi/", {"start_date": "2024-01-01"})
+        self.assertEqual(response.data["summary"]["orders"], 1)
+        self.assertEqual(response.data["summary"]["savings"], 4)
+        self.assertEqual(response.data["by_month"][0]["month"], "2024-09")
+
+        rebuild_cost_rollups()
+        self.assertEqual(OrderCostMonthlyStat.objects.get().count, 1)
+        order.status = Order.Status.CANCELLED
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        self.assertFalse(OrderCostMonthlyStat.objects.exists())
+
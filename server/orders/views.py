@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from accounts.context import PermissionContextMixin
 from accounts.permissions import (
     IsApprover,
     IsDeptEmployee,
@@ -32,12 +33,20 @@ from orders.serializers import (
     PrintOrderDetailSerializer,
     PrintOrderListSerializer,
 )
+from system.exports import Column, ExportMixin
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ExportMixin, PermissionContextMixin, viewsets.ModelViewSet):
     queryset = (
-        Order.objects.select_related("service", "requester", "current_approver")
-        .prefetch_related("field_values__field", "attachments", "approvals", "status_history")
+        Order.objects.select_related(
+            "service", "entity", "requester__entity", "current_approver__entity"
+        )
+        .prefetch_related(
+            "field_values__field",
+            "attachments",
+            "approvals__approver__entity",
+            "status_history__changed_by__entity",
+        )
         .all()
     )
     permission_classes = [IsAuthenticated]
@@ -45,6 +54,20 @@ class OrderViewSet(viewsets.ModelViewSet):
     search_fields = ["order_code", "service__name", "requester__full_name", "department"]
     ordering_fields = ["submitted_at", "status", "priority"]
     ordering = ["-submitted_at"]  # Default ordering
+    export_filename = "orders"
+    export_columns = [
+        Column("رقم الطلب", "order_code"),
+        Column("الخدمة", "service__name"),
+        Column("مقدم الطلب", "requester__full_name"),
+        Column("الجهة", "entity__full_path"),
+        Column("الحالة", "status", dict(Order.Status.choices)),
+        Column("الأولوية", "priority", dict(Order.Priority.choices)),
+        Column("تاريخ التقديم", "submitted_at"),
+        Column("تاريخ الاعتماد", "approved_at"),
+        Column("تاريخ الإكمال", "completed_at"),
+        Column("التكلفة الداخلية", "cost_snapshot__internal_cost"),
+        Column("تكلفة السوق", "cost_snapshot__external_cost"),
+    ]
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -54,15 +77,12 @@ class OrderViewSet(viewsets.ModelViewSet):
         return OrderDetailSerializer
 
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_admin:
-            base_qs = qs
-        elif user.is_approver:
-            base_qs = qs.filter(current_approver_id=user.id) | qs.filter(requester_id=user.id)
-        else:
-            # Filter by requester - use user ID for exact match
-            base_qs = qs.filter(requester_id=user.id)
+        # المدير يرى الجميع، والمعتمد يرى طلباته والطلبات المحالة إليه
+        base_qs = self.scope_queryset(
+            super().get_queryset(),
+            full_access={"admin"},
+            role_lookups={"approver": ("current_approver_id",)},
+        )
         
         # Apply status filter from query params
         status_filter = self.request.query_params.get("status")
@@ -468,16 +488,28 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
 
 
-class DesignOrderViewSet(viewsets.ModelViewSet):
+class DesignOrderViewSet(ExportMixin, PermissionContextMixin, viewsets.ModelViewSet):
     """
     ViewSet لإدارة طلبات التصميم
     """
-    queryset = DesignOrder.objects.select_related("requester", "entity").prefetch_related("attachments").all()
+    queryset = DesignOrder.objects.select_related("requester__entity", "entity").prefetch_related("attachments").all()
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["order_code", "title", "requester__full_name"]
     ordering_fields = ["submitted_at", "status", "priority"]
     ordering = ["-submitted_at"]
+    export_filename = "design-orders"
+    export_columns = [
+        Column("رقم الطلب", "order_code"),
+        Column("العنوان", "title"),
+        Column("نوع التصميم", "design_type", dict(DesignOrder.DesignType.choices)),
+        Column("مقدم الطلب", "requester__full_name"),
+        Column("الجهة", "entity__full_path"),
+        Column("الحالة", "status", dict(DesignOrder.Status.choices)),
+        Column("الأولوية", "priority", dict(DesignOrder.Priority.choices)),
+        Column("تاريخ التقديم", "submitted_at"),
+        Column("تاريخ الإكمال", "completed_at"),
+    ]
     
     def get_serializer_class(self):
         if self.action == "list":
@@ -615,12 +647,7 @@ class DesignOrderViewSet(viewsets.ModelViewSet):
         return response
     
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_print_manager:
-            base_qs = qs
-        else:
-            base_qs = qs.filter(requester_id=user.id)
+        base_qs = self.scope_queryset(super().get_queryset(), full_access={"print_manager"})
         
         # Apply status filter from query params
         status_filter = self.request.query_params.get("status")
@@ -805,16 +832,33 @@ class DesignOrderViewSet(viewsets.ModelViewSet):
         return Response(DesignOrderDetailSerializer(design_order).data)
 
 
-class PrintOrderViewSet(viewsets.ModelViewSet):
+class PrintOrderViewSet(ExportMixin, PermissionContextMixin, viewsets.ModelViewSet):
     """
     ViewSet لإدارة طلبات الطباعة
     """
-    queryset = PrintOrder.objects.select_related("requester", "entity").prefetch_related("attachments").all()
+    queryset = PrintOrder.objects.select_related("requester__entity", "entity").prefetch_related("attachments").all()
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["order_code", "print_type", "requester__full_name"]
     ordering_fields = ["submitted_at", "status", "priority"]
     ordering = ["-submitted_at"]
+    export_filename = "print-orders"
+    export_columns = [
+        Column("رقم الطلب", "order_code"),
+        Column("نوع الطباعة", "print_type", dict(PrintOrder.PrintType.choices)),
+        Column("قسم الإنتاج", "production_dept", dict(PrintOrder.ProductionDept.choices)),
+        Column("مقدم الطلب", "requester__full_name"),
+        Column("الجهة", "entity__full_path"),
+        Column("الحجم", "size", dict(PrintOrder.Size.choices)),
+        Column("نوع الورق", "paper_type", dict(PrintOrder.PaperType.choices)),
+        Column("وزن الورق", "paper_weight"),
+        Column("الكمية", "quantity"),
+        Column("الكمية الفعلية", "actual_quantity"),
+        Column("الحالة", "status", dict(PrintOrder.Status.choices)),
+        Column("الأولوية", "priority", dict(PrintOrder.Priority.choices)),
+        Column("تاريخ التقديم", "submitted_at"),
+        Column("تاريخ الإكمال", "completed_at"),
+    ]
     
     def get_serializer_class(self):
         if self.action == "list":
@@ -956,12 +1000,10 @@ class PrintOrderViewSet(viewsets.ModelViewSet):
         return response
     
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_print_manager or user.is_dept_manager or user.is_dept_employee:
-            base_qs = qs
-        else:
-            base_qs = qs.filter(requester_id=user.id)
+        base_qs = self.scope_queryset(
+            super().get_queryset(),
+            full_access={"print_manager", "dept_manager", "dept_employee"},
+        )
         
         # Apply status filter from query params
         status_filter = self.request.query_params.get("status")
@@ -6,6 +6,8 @@ from datetime import timedelta
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / "subdir".
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,6 +17,8 @@ env = environ.Env(
     SECRET_KEY=(str, "change-me"),
     ALLOWED_HOSTS=(list, ["localhost", "127.0.0.1", "admin.pmstu.com"]),
     DATABASE_URL=(str, f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+    CELERY_BROKER_URL=(str, "redis://localhost:6379/0"),
+    CACHE_URL=(str, "locmemcache://"),
     CORS_ALLOWED_ORIGINS=(list, [
         "http://localhost:3000", 
         "http://127.0.0.1:3000",
@@ -73,6 +77,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "accounts.middleware.PermissionInstrumentationMiddleware",
 ]
 
 ROOT_URLCONF = "project.urls"
@@ -103,6 +108,14 @@ DATABASES = {
 }
 
 
+# Cache (يجب أن يكون مشتركاً بين العمليات في الإنتاج، مثل redis://...)
+CACHES = {
+    "default": env.cache(),
+}
+# الكاش المحلي (locmem) خاص بكل عملية، فلا يصل إليه رفع إصدار الصلاحيات من عملية أخرى
+SHARED_CACHE = CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache"
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -151,7 +164,7 @@ MEDIA_ROOT = BASE_DIR / "media"
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -179,6 +192,52 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "SIGNING_KEY": SECRET_KEY,
     "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.ClaimsTokenRefreshSerializer",
+}
+
+# حماية تسجيل الدخول: عدد المحاولات الفاشلة المسموح بها خلال النافذة (بالثواني)
+LOGIN_MAX_ACCOUNT_FAILURES = 5
+LOGIN_MAX_IP_FAILURES = 50
+LOGIN_FAILURE_WINDOW = 15 * 60
+
+# إضافة ترويسة X-Permission-Evaluations (عدد عمليات التحقق من الصلاحيات لكل طلب)
+PERMISSION_INSTRUMENTATION = env.bool("PERMISSION_INSTRUMENTATION", default=DEBUG)
+
+# كاش إحصائيات لوحة المدير: مدة الحداثة، ثم مدة تقديم القيمة القديمة أثناء إعادة الحساب (بالثواني)
+DASHBOARD_STATS_FRESH = 5
+DASHBOARD_STATS_STALE = 60
+
+# مهام التقارير غير المتزامنة: مدة الاحتفاظ بالنتيجة، ومدة صلاحية رابط التنزيل الموقّع (بالثواني)
+REPORT_JOB_RESULT_TTL = 24 * 60 * 60
+REPORT_JOB_LINK_MAX_AGE = 60 * 60
+# المهمة التي لم تبدأ أو لم تنته خلال هذه المدة تُعد عالقة وتُعلَّم فاشلة
+REPORT_JOB_STALE_AFTER = 60 * 60
+
+# بناء المستخدم من بيانات رمز الوصول (الدور والجهة) دون استعلام في كل طلب
+# يتطلب كاشاً مشتركاً: مفعل افتراضياً فقط عند ضبط CACHE_URL على كاش مشترك (redis مثلاً)
+JWT_STATELESS_AUTH = env.bool("JWT_STATELESS_AUTH", default=SHARED_CACHE)
+if JWT_STATELESS_AUTH and not SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "JWT_STATELESS_AUTH requires a shared CACHE_URL (e.g. redis://); "
+        "with locmemcache:// revoked tokens stay valid in other worker processes."
+    )
+
+# Celery
+CELERY_BROKER_URL = env("CELERY_BROKER_URL")
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "inventory-build-checkpoints": {
+        "task": "inventory.tasks.build_inventory_checkpoints",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "inventory-check-ledger": {
+        "task": "inventory.tasks.check_inventory_ledger",
+        "schedule": crontab(hour=0, minute=45),
+    },
+    "system-purge-report-jobs": {
+        "task": "system.tasks.purge_expired_report_jobs",
+        "schedule": crontab(minute=30),
+    },
 }
 
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS")
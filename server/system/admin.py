@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from system.models import ApprovalPolicy, AuditLog, SystemSetting
+from system.models import ApprovalPolicy, AuditLog, ReportJob, SystemSetting
 
 
 @admin.register(SystemSetting)
@@ -20,3 +20,8 @@ class AuditLogAdmin(admin.ModelAdmin):
     search_fields = ("action", "actor__full_name")
 
 
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "status", "processed_chunks", "total_chunks", "created_at", "expires_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("params_hash", "data_version")
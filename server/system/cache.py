@@ -0,0 +1,39 @@
+"""
+كاش بإصدارات: كل نطاق (مثل entities) له رقم إصدار في الكاش المشترك،
+وتُبنى مفاتيح القيم المخزنة عليه، فيكفي تغيير الإصدار لإبطالها جميعاً.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(namespace: str) -> str:
+    return f"version:{namespace}"
+
+
+def get_version(namespace: str) -> str:
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key) or version
+    return version
+
+
+def _set_new_version(namespace: str) -> None:
+    cache.set(_version_key(namespace), uuid.uuid4().hex, None)
+
+
+def bump_version(namespace: str) -> None:
+    """
+    تغيير الإصدار فوراً ثم مرة أخرى بعد تأكيد المعاملة، حتى لا تبقى قراءة
+    قديمة مخزنة تحت الإصدار الجديد (ولا تبقى القيم القديمة إذا أُلغيت المعاملة)
+    """
+    _set_new_version(namespace)
+    transaction.on_commit(lambda: _set_new_version(namespace))
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    return ":".join([namespace, get_version(namespace), *map(str, parts)])
@@ -0,0 +1,99 @@
+"""
+إحصائيات لوحة المدير التنفيذية
+
+تُحسب العدادات من تجميع الطلبات اليومي (OrderDailyStat) باستعلام واحد لجميع
+أنواع الطلبات، ونسبة التوفير من لقطات التكلفة. تُخزن النتيجة في الكاش مع وقت
+حسابها: خلال DASHBOARD_STATS_FRESH ثانية تُقدم كما هي، وبعدها (حتى
+DASHBOARD_STATS_STALE) تُقدم القيمة القديمة بينما يعيد طلب واحد فقط حسابها
+(قفل cache.add)، فلا يتضاعف الحمل على قاعدة البيانات بتعدد المدراء.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from inventory.models import InventoryItem
+from orders.models import DesignOrder, Order, OrderCostSnapshot, OrderDailyStat, PrintOrder
+
+STATS_KEY = "system:dashboard:stats"
+LOCK_KEY = "system:dashboard:stats:lock"
+LOCK_TIMEOUT = 30
+
+OrderType = OrderDailyStat.OrderType
+
+# الحالات المنتهية (لا تُحسب ضمن الطلبات النشطة) وحالات انتظار المراجعة لكل نوع
+CLOSED_STATUSES = {
+    OrderType.GENERAL: {Order.Status.REJECTED, Order.Status.CANCELLED},
+    OrderType.DESIGN: {DesignOrder.Status.COMPLETED, DesignOrder.Status.REJECTED},
+    OrderType.PRINT: {
+        PrintOrder.Status.REJECTED,
+        PrintOrder.Status.CANCELLED,
+        PrintOrder.Status.ARCHIVED,
+    },
+}
+PENDING_STATUSES = {
+    OrderType.GENERAL: {Order.Status.PENDING, Order.Status.IN_REVIEW},
+    OrderType.DESIGN: {DesignOrder.Status.PENDING_REVIEW},
+    OrderType.PRINT: {PrintOrder.Status.PENDING_REVIEW},
+}
+
+
+def compute_overview_stats() -> dict:
+    active_orders = pending_approvals = 0
+    rows = OrderDailyStat.objects.values("order_type", "status").annotate(
+        total=Sum("count")
+    ).order_by()
+    for row in rows:
+        total = row["total"] or 0
+        if row["status"] not in CLOSED_STATUSES[row["order_type"]]:
+            active_orders += total
+        if row["status"] in PENDING_STATUSES[row["order_type"]]:
+            pending_approvals += total
+
+    # نسبة التوفير الفعلية: (تكلفة السوق - التكلفة الداخلية) / تكلفة السوق للطلبات
+    # المسعّرة، دون الطلبات المرفوضة أو الملغاة (لقطات الطلبات العامة فقط)
+    totals = (
+        OrderCostSnapshot.objects.filter(external_cost__gt=0)
+        .exclude(order__status__in=CLOSED_STATUSES[OrderType.GENERAL])
+        .aggregate(internal=Sum("internal_cost"), external=Sum("external_cost"))
+    )
+    savings_percentage = 0
+    if totals["external"]:
+        savings_percentage = float(
+            (totals["external"] - totals["internal"]) / totals["external"] * 100
+        )
+
+    return {
+        "active_orders": active_orders,
+        "pending_approvals": pending_approvals,
+        "inventory_alerts": InventoryItem.objects.low_stock().count(),
+        "savings_percentage": round(savings_percentage, 1),
+    }
+
+
+def _refresh() -> dict:
+    stats = compute_overview_stats()
+    cache.set(
+        STATS_KEY,
+        (time.time(), stats),
+        settings.DASHBOARD_STATS_FRESH + settings.DASHBOARD_STATS_STALE,
+    )
+    return stats
+
+
+def get_overview_stats() -> dict:
+    cached = cache.get(STATS_KEY)
+    if cached is not None:
+        computed_at, stats = cached
+        if time.time() - computed_at < settings.DASHBOARD_STATS_FRESH:
+            return stats
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        # طلب آخر يعيد الحساب: تقديم القيمة القديمة إن وجدت
+        if cached is not None:
+            return cached[1]
+        return compute_overview_stats()
+    try:
+        return _refresh()
+    finally:
+        cache.delete(LOCK_KEY)
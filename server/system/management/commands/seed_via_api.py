@@ -756,10 +756,7 @@ class Command(BaseCommand):
             notifications_created += 1
         
         # إشعارات تنبيه المخزون
-        from django.db.models import F
-        low_stock_items = InventoryItem.objects.filter(
-            current_quantity__lte=F("min_quantity")
-        )[:3]
+        low_stock_items = InventoryItem.objects.low_stock()[:3]
         
         for manager_email in ["print.manager@taibahu.edu.sa", "print.manager2@taibahu.edu.sa"]:
             manager = users.get(manager_email)
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-19 01:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('orders', 'توزيع الطلبات'), ('productivity', 'الإنتاجية اليومية'), ('roi', 'التوفير (ROI)')], max_length=20, verbose_name='نوع التقرير')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='المعاملات')),
+                ('params_hash', models.CharField(max_length=64, verbose_name='بصمة المعاملات')),
+                ('data_version', models.CharField(blank=True, max_length=32, verbose_name='إصدار التقارير')),
+                ('status', models.CharField(choices=[('pending', 'بانتظار التنفيذ'), ('running', 'قيد التنفيذ'), ('completed', 'مكتمل'), ('failed', 'فشل')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('total_chunks', models.PositiveIntegerField(default=0, verbose_name='عدد الدفعات')),
+                ('processed_chunks', models.PositiveIntegerField(default=0, verbose_name='الدفعات المنجزة')),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='عدد الصفوف')),
+                ('result', models.FileField(blank=True, upload_to='reports/', verbose_name='النتيجة')),
+                ('error', models.TextField(blank=True, verbose_name='الخطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الطلب')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='بدء التنفيذ')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='انتهاء التنفيذ')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='انتهاء الصلاحية')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'مهمة تقرير',
+                'verbose_name_plural': 'مهام التقارير',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['params_hash', 'status'], name='report_job_hash_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('params_hash',), name='report_job_active_hash_unique'),
+        ),
+    ]
@@ -60,3 +60,73 @@ class AuditLog(models.Model):
         return f"{self.action} - {self.created_at:%Y-%m-%d %H:%M}"
 
 
+
+
+class ReportJob(models.Model):
+    """
+    تقرير ثقيل يُحسب في الخلفية (Celery) على دفعات شهرية، وتُحفظ نتيجته
+    مضغوطة (JSON.gz) في MEDIA حتى expires_at.
+    الطلبات المتطابقة (نوع التقرير ومعاملاته) تُدمج في مهمة نشطة واحدة، وتُعاد
+    النتيجة المكتملة ما لم يتغير إصدار التقارير (data_version).
+    """
+
+    class Kind(models.TextChoices):
+        ORDERS = "orders", "توزيع الطلبات"
+        PRODUCTIVITY = "productivity", "الإنتاجية اليومية"
+        ROI = "roi", "التوفير (ROI)"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "بانتظار التنفيذ"
+        RUNNING = "running", "قيد التنفيذ"
+        COMPLETED = "completed", "مكتمل"
+        FAILED = "failed", "فشل"
+
+    ACTIVE_STATUSES = (Status.PENDING, Status.RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField("نوع التقرير", max_length=20, choices=Kind.choices)
+    params = models.JSONField("المعاملات", default=dict, blank=True)
+    params_hash = models.CharField("بصمة المعاملات", max_length=64)
+    data_version = models.CharField("إصدار التقارير", max_length=32, blank=True)
+    status = models.CharField(
+        "الحالة", max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    total_chunks = models.PositiveIntegerField("عدد الدفعات", default=0)
+    processed_chunks = models.PositiveIntegerField("الدفعات المنجزة", default=0)
+    row_count = models.PositiveIntegerField("عدد الصفوف", default=0)
+    result = models.FileField("النتيجة", upload_to="reports/", blank=True)
+    error = models.TextField("الخطأ", blank=True)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="report_jobs"
+    )
+    created_at = models.DateTimeField("تاريخ الطلب", auto_now_add=True)
+    started_at = models.DateTimeField("بدء التنفيذ", null=True, blank=True)
+    finished_at = models.DateTimeField("انتهاء التنفيذ", null=True, blank=True)
+    expires_at = models.DateTimeField("انتهاء الصلاحية", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "مهمة تقرير"
+        verbose_name_plural = "مهام التقارير"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["params_hash", "status"], name="report_job_hash_idx"),
+        ]
+        constraints = [
+            # مهمة نشطة واحدة فقط لكل بصمة (دمج الطلبات المتزامنة)
+            models.UniqueConstraint(
+                fields=["params_hash"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="report_job_active_hash_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.get_status_display()}"
+
+    @property
+    def progress(self) -> int:
+        if self.status == self.Status.COMPLETED:
+            return 100
+        if not self.total_chunks:
+            return 0
+        return int(self.processed_chunks * 100 / self.total_chunks)
@@ -0,0 +1,204 @@
+"""
+محور تحليل الطلبات (Pivot) فوق جداول التجميع
+
+الأبعاد والمقاييس من قائمة مسموح بها فقط، ويُترجم الطلب إلى استعلام GROUP BY
+واحد على أحد جدولي التجميع:
+
+- OrderDailyStat (جدول الحقائق اليومي): العدد والكمية واستهلاك الورق، ويوم
+  الإنشاء لفلاتر التاريخ.
+- OrderCostMonthlyStat (العائد الشهري): التكاليف والتوفير للطلبات المكتملة
+  فقط (والعدد فيه عدد الطلبات المكتملة المسعّرة)، وشهر الإكمال لفلاتر التاريخ.
+
+تُخزن النتيجة في الكاش بمفتاح الاستعلام بعد توحيده (ترتيب الأبعاد والمقاييس
+والفلاتر) مع إصدار التقارير، فيبطل أي تحديث للتجميعات النتائج السابقة.
+"""
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+
+from catalog.models import Service
+from orders.models import REPORTS_CACHE_NAMESPACE, OrderCostMonthlyStat, OrderDailyStat
+from system.cache import versioned_key
+
+CACHE_TIMEOUT = 10 * 60
+MAX_DIMENSIONS = 4
+MAX_ROWS = 5000
+
+ENTITY_DIMENSIONS = {
+    "entity": F("entity_id"),
+    "college": F("entity__college_deanship_id"),
+    "vice_rectorate": F("entity__vice_rectorate_id"),
+}
+
+
+@dataclass(frozen=True)
+class PivotSource:
+    model: type
+    dimensions: dict
+    measures: dict
+    date_field: str
+
+
+FACTS = PivotSource(
+    model=OrderDailyStat,
+    dimensions={
+        **ENTITY_DIMENSIONS,
+        "service": F("service_id"),
+        "order_type": F("order_type"),
+        "status": F("status"),
+        "priority": F("priority"),
+        "production_dept": F("production_dept"),
+        "print_type": F("print_type"),
+        "paper_type": F("paper_type"),
+        "month": TruncMonth("day"),
+    },
+    measures={
+        "count": Sum("count"),
+        "quantity": Sum("quantity"),
+        "paper_consumption": Sum("paper_consumption"),
+    },
+    date_field="day",
+)
+
+COSTS = PivotSource(
+    model=OrderCostMonthlyStat,
+    dimensions={
+        **ENTITY_DIMENSIONS,
+        "service": F("service_id"),
+        "month": F("month"),
+    },
+    measures={
+        "count": Sum("count"),
+        "internal_cost": Sum("internal_cost"),
+        "external_cost": Sum("external_cost"),
+        "savings": Sum("external_cost") - Sum("internal_cost"),
+    },
+    date_field="month",
+)
+
+DIMENSIONS = sorted(set(FACTS.dimensions) | set(COSTS.dimensions))
+MEASURES = sorted(set(FACTS.measures) | set(COSTS.measures))
+FILTER_DIMENSIONS = [name for name in DIMENSIONS if name != "month"]
+UUID_DIMENSIONS = {*ENTITY_DIMENSIONS, "service"}
+
+
+def resolve_source(dimensions, measures, filters) -> PivotSource:
+    """جدول التجميع الذي يغطي الأبعاد والمقاييس والفلاتر، أو ValueError"""
+    cost_measures = set(measures) - set(FACTS.measures)
+    source = COSTS if cost_measures else FACTS
+    unsupported = (set(dimensions) | set(filters) | set(measures)) - (
+        set(source.dimensions) | set(source.measures)
+    )
+    if unsupported:
+        raise ValueError(
+            f"لا يمكن الجمع بين {', '.join(sorted(cost_measures))} و{', '.join(sorted(unsupported))}."
+        )
+    return source
+
+
+def _alias(name: str) -> str:
+    return f"dim_{name}"
+
+
+def _measure(name: str) -> str:
+    return f"measure_{name}"
+
+
+def _format(value):
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m")
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def _labels(rows, dimensions) -> dict:
+    """أسماء الجهات (من لقطة الهيكل) والخدمات للمعرفات الظاهرة في النتيجة"""
+    from entities.hierarchy import get_snapshot
+
+    labels = {}
+    entity_dims = [name for name in dimensions if name in ENTITY_DIMENSIONS]
+    if entity_dims:
+        snapshot = get_snapshot()
+        for name in entity_dims:
+            labels[name] = {
+                row[name]: node.name
+                for row in rows
+                if row[name] and (node := snapshot.get(uuid.UUID(row[name]))) is not None
+            }
+    if "service" in dimensions:
+        ids = {row["service"] for row in rows if row["service"]}
+        labels["service"] = {
+            str(pk): name
+            for pk, name in Service.objects.filter(id__in=ids).values_list("id", "name")
+        }
+    return labels
+
+
+def run_pivot(dimensions, measures, filters, start_date=None, end_date=None) -> dict:
+    source = resolve_source(dimensions, measures, filters)
+    queryset = source.model.objects.all()
+    if filters:
+        queryset = queryset.alias(
+            **{_alias(name): source.dimensions[name] for name in filters}
+        ).filter(**{_alias(name): value for name, value in filters.items()})
+    if start_date:
+        lower = start_date.replace(day=1) if source is COSTS else start_date
+        queryset = queryset.filter(**{f"{source.date_field}__gte": lower})
+    if end_date:
+        upper = end_date.replace(day=1) if source is COSTS else end_date
+        queryset = queryset.filter(**{f"{source.date_field}__lte": upper})
+
+    aggregates = {_measure(name): source.measures[name] for name in measures}
+    if dimensions:
+        aliases = [_alias(name) for name in dimensions]
+        grouped = (
+            queryset.annotate(**{_alias(name): source.dimensions[name] for name in dimensions})
+            .values(*aliases)
+            .annotate(**aggregates)
+            .order_by(*aliases)
+        )
+    else:
+        grouped = [queryset.aggregate(**aggregates)]
+    rows = []
+    for row in grouped[: MAX_ROWS + 1]:
+        rows.append(
+            {
+                **{name: _format(row[_alias(name)]) for name in dimensions},
+                **{name: row[_measure(name)] or 0 for name in measures},
+            }
+        )
+    truncated = len(rows) > MAX_ROWS
+    rows = rows[:MAX_ROWS]
+    return {
+        "source": "costs" if source is COSTS else "orders",
+        "dimensions": dimensions,
+        "measures": measures,
+        "filters": filters,
+        "rows": rows,
+        "truncated": truncated,
+        "labels": _labels(rows, dimensions),
+    }
+
+
+def get_pivot(dimensions, measures, filters, start_date=None, end_date=None) -> dict:
+    """نتيجة المحور من الكاش (بمفتاح الاستعلام الموحد وإصدار التقارير)"""
+    dimensions, measures = sorted(set(dimensions)), sorted(set(measures))
+    filters = dict(sorted(filters.items()))
+    query = json.dumps(
+        [dimensions, measures, filters, str(start_date or ""), str(end_date or "")],
+        ensure_ascii=False,
+    )
+    key = versioned_key(
+        REPORTS_CACHE_NAMESPACE, "pivot", hashlib.sha256(query.encode()).hexdigest()
+    )
+    result = cache.get(key)
+    if result is None:
+        result = run_pivot(dimensions, measures, filters, start_date, end_date)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,336 @@
+"""
+مهام التقارير الثقيلة غير المتزامنة (ReportJob)
+
+- POST ينشئ المهمة (أو يعيد مهمة قائمة مطابقة) ويُرسلها إلى Celery بعد
+  اعتماد المعاملة؛ بصمة المهمة من النوع والمعاملات، فتُدمج الطلبات المتزامنة
+  المتطابقة في مهمة نشطة واحدة (قيد فريد مشروط)، وتُعاد النتيجة المكتملة ما
+  دامت صالحة ولم يتغير إصدار التقارير منذ حسابها.
+- التنفيذ على دفعات شهرية من جداول التجميع (OrderDailyStat و
+  OrderCostMonthlyStat)، مع تحديث التقدم بعد كل دفعة، وتُكتب الصفوف مباشرة في
+  ملف JSON مضغوط (gzip) فلا تُجمع النتيجة كاملة في الذاكرة.
+- رابط التنزيل موقّع (TimestampSigner) وينتهي بعد REPORT_JOB_LINK_MAX_AGE، والملف
+  يُحذف بعد REPORT_JOB_RESULT_TTL (purge_expired_report_jobs).
+- المهمة النشطة التي تتجاوز REPORT_JOB_STALE_AFTER (عامل توقف أو رسالة فُقدت)
+  تُعلَّم فاشلة، فلا تحجز بصمتها ويُنشأ لطلب مماثل مهمة جديدة.
+"""
+import gzip
+import hashlib
+import io
+import json
+import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import partial
+from typing import Callable
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from orders.models import (
+    REPORTS_CACHE_NAMESPACE,
+    DesignOrder,
+    Order,
+    OrderCostMonthlyStat,
+    OrderDailyStat,
+    PrintOrder,
+)
+from system.cache import get_version
+from system.models import ReportJob
+from system.pivot import ENTITY_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+MAX_MONTHS = 60
+SIGNING_SALT = "system.report-job"
+
+OrderType = OrderDailyStat.OrderType
+
+# حالات الإكمال لكل نوع طلب (لتقرير الإنتاجية)
+DONE_STATUSES = {
+    OrderType.GENERAL: [Order.Status.READY],
+    OrderType.DESIGN: [DesignOrder.Status.COMPLETED],
+    OrderType.PRINT: [PrintOrder.Status.ARCHIVED, PrintOrder.Status.DELIVERY_SCHEDULED],
+}
+
+
+def _filtered(queryset, filters):
+    """فلاتر المساواة؛ أبعاد الجهة (entity/college/vice_rectorate) عبر الحقول الهرمية"""
+    entity_filters = {name: value for name, value in filters.items() if name in ENTITY_DIMENSIONS}
+    if entity_filters:
+        queryset = queryset.alias(
+            **{f"scope_{name}": ENTITY_DIMENSIONS[name] for name in entity_filters}
+        ).filter(**{f"scope_{name}": value for name, value in entity_filters.items()})
+    other = {name: value for name, value in filters.items() if name not in ENTITY_DIMENSIONS}
+    if "service" in other:
+        other["service_id"] = other.pop("service")
+    return queryset.filter(**other)
+
+
+def orders_rows(start, end, filters):
+    """الطلبات حسب الشهر ونوع الطلب والحالة والجهة"""
+    rows = (
+        _filtered(OrderDailyStat.objects.filter(day__gte=start, day__lte=end), filters)
+        .annotate(month=TruncMonth("day"))
+        .values("month", "order_type", "status", "entity_id", "entity__full_path")
+        .annotate(
+            count=Sum("count"),
+            quantity=Sum("quantity"),
+            paper_consumption=Sum("paper_consumption"),
+        )
+        .order_by("month", "order_type", "status", "entity__full_path")
+    )
+    return [
+        {
+            "month": row["month"].strftime("%Y-%m"),
+            "order_type": row["order_type"],
+            "status": row["status"],
+            "entity_id": row["entity_id"],
+            "entity": row["entity__full_path"],
+            "count": row["count"],
+            "quantity": row["quantity"],
+            "paper_consumption": row["paper_consumption"],
+        }
+        for row in rows
+    ]
+
+
+def productivity_rows(start, end, filters):
+    """الطلبات المنشأة والمكتملة لكل يوم ونوع طلب"""
+    stats = _filtered(OrderDailyStat.objects.all(), filters)
+    days = {}
+    created = (
+        stats.filter(day__gte=start, day__lte=end)
+        .values("day", "order_type")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    for row in created:
+        entry = days.setdefault((row["day"], row["order_type"]), {"created": 0, "completed": 0})
+        entry["created"] += row["total"]
+    done = Q()
+    for order_type, statuses in DONE_STATUSES.items():
+        done |= Q(order_type=order_type, status__in=statuses)
+    completed = (
+        stats.filter(done, completed_on__gte=start, completed_on__lte=end)
+        .values("completed_on", "order_type")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    for row in completed:
+        entry = days.setdefault(
+            (row["completed_on"], row["order_type"]), {"created": 0, "completed": 0}
+        )
+        entry["completed"] += row["total"]
+    return [
+        {"date": day.isoformat(), "order_type": order_type, **counts}
+        for (day, order_type), counts in sorted(days.items())
+    ]
+
+
+def roi_rows(start, end, filters):
+    """تكاليف الطلبات المكتملة حسب الشهر والخدمة والجهة"""
+    rows = (
+        _filtered(
+            OrderCostMonthlyStat.objects.filter(
+                month__gte=start.replace(day=1), month__lte=end.replace(day=1)
+            ),
+            filters,
+        )
+        .values("month", "service_id", "service__name", "entity_id", "entity__full_path")
+        .annotate(
+            orders=Sum("count"),
+            internal_cost=Sum("internal_cost"),
+            external_cost=Sum("external_cost"),
+        )
+        .order_by("month", "service__name", "entity__full_path")
+    )
+    return [
+        {
+            "month": row["month"].strftime("%Y-%m"),
+            "service_id": row["service_id"],
+            "service": row["service__name"],
+            "entity_id": row["entity_id"],
+            "entity": row["entity__full_path"],
+            "orders": row["orders"],
+            "internal_cost": row["internal_cost"],
+            "external_cost": row["external_cost"],
+            "savings": row["external_cost"] - row["internal_cost"],
+        }
+        for row in rows
+    ]
+
+
+@dataclass(frozen=True)
+class ReportKind:
+    rows: Callable[[date, date, dict], list[dict]]
+    filters: tuple
+
+
+KINDS = {
+    ReportJob.Kind.ORDERS: ReportKind(
+        orders_rows,
+        (*ENTITY_DIMENSIONS, "service", "order_type", "priority", "production_dept"),
+    ),
+    ReportJob.Kind.PRODUCTIVITY: ReportKind(productivity_rows, (*ENTITY_DIMENSIONS, "order_type")),
+    ReportJob.Kind.ROI: ReportKind(roi_rows, (*ENTITY_DIMENSIONS, "service")),
+}
+
+
+def month_windows(start: date, end: date) -> list[tuple[date, date]]:
+    """تقسيم المدة إلى دفعات شهرية [(أول يوم، آخر يوم)] مقصوصة على حدود المدة"""
+    windows = []
+    current = start
+    while current <= end:
+        next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        windows.append((current, min(end, next_month - timedelta(days=1))))
+        current = next_month
+    return windows
+
+
+def params_hash(kind: str, params: dict) -> str:
+    payload = json.dumps([kind, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def fail_stale_jobs(**filters) -> int:
+    """تعليم المهام العالقة فاشلة: بانتظار التنفيذ منذ الإنشاء أو قيد التنفيذ منذ البدء"""
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.REPORT_JOB_STALE_AFTER)
+    stale = Q(status=ReportJob.Status.PENDING, created_at__lte=cutoff) | Q(
+        status=ReportJob.Status.RUNNING, started_at__lte=cutoff
+    )
+    return ReportJob.objects.filter(stale, **filters).update(
+        status=ReportJob.Status.FAILED, error="تجاوزت المهمة المدة المسموحة.", finished_at=now
+    )
+
+
+def request_report(kind: str, params: dict, user=None) -> tuple[ReportJob, bool]:
+    """
+    مهمة التقرير للمعاملات: مهمة نشطة أو نتيجة صالحة بنفس البصمة إن وجدت،
+    وإلا مهمة جديدة تُرسل إلى Celery بعد اعتماد المعاملة. يُرجع (المهمة، أُنشئت؟).
+    """
+    from system.tasks import run_report_job
+
+    digest = params_hash(kind, params)
+    version = get_version(REPORTS_CACHE_NAMESPACE)
+    fail_stale_jobs(params_hash=digest)
+    reusable = Q(status__in=ReportJob.ACTIVE_STATUSES) | Q(
+        status=ReportJob.Status.COMPLETED, data_version=version, expires_at__gt=timezone.now()
+    )
+    existing = ReportJob.objects.filter(reusable, params_hash=digest).first()
+    if existing is not None:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                kind=kind,
+                params=params,
+                params_hash=digest,
+                data_version=version,
+                requested_by=user,
+            )
+    except IntegrityError:
+        # طلب متزامن أنشأ المهمة النشطة نفسها
+        active = ReportJob.objects.filter(status__in=ReportJob.ACTIVE_STATUSES, params_hash=digest)
+        return active.first(), False
+    transaction.on_commit(partial(run_report_job.delay, str(job.id)))
+    return job, True
+
+
+def _set_progress(job_id, **fields) -> None:
+    ReportJob.objects.filter(pk=job_id).update(**fields)
+
+
+def run_job(job_id) -> None:
+    """تنفيذ مهمة بانتظار التنفيذ (تُحجز بتحديث شرطي فلا تُنفذ مرتين)"""
+    claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.Status.PENDING).update(
+        status=ReportJob.Status.RUNNING,
+        started_at=timezone.now(),
+        # النتيجة تعكس التجميعات كما هي عند بدء التنفيذ
+        data_version=get_version(REPORTS_CACHE_NAMESPACE),
+    )
+    if not claimed:
+        return
+    job = ReportJob.objects.get(pk=job_id)
+    kind, params = KINDS[job.kind], job.params
+    windows = month_windows(
+        date.fromisoformat(params["start_date"]), date.fromisoformat(params["end_date"])
+    )
+    _set_progress(job_id, total_chunks=len(windows))
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            row_count = 0
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as archive:
+                out = io.TextIOWrapper(archive, encoding="utf-8")
+                # الترويسة ثم مصفوفة الصفوف تُكتب دفعة بعد دفعة
+                header = {"kind": job.kind, "params": params, "generated_at": timezone.now()}
+                out.write(json.dumps(header, cls=DjangoJSONEncoder, ensure_ascii=False)[:-1])
+                out.write(', "rows": [')
+                for index, (start, end) in enumerate(windows, start=1):
+                    for row in kind.rows(start, end, params.get("filters", {})):
+                        out.write("," if row_count else "")
+                        out.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+                        row_count += 1
+                    _set_progress(job_id, processed_chunks=index, row_count=row_count)
+                out.write("]}")
+                out.flush()
+                out.detach()
+            tmp.seek(0)
+            job.result.save(f"{job.kind}-{job.id}.json.gz", File(tmp), save=False)
+    except Exception as exc:
+        logger.exception("Report job %s failed", job_id)
+        _set_progress(
+            job_id, status=ReportJob.Status.FAILED, error=str(exc), finished_at=timezone.now()
+        )
+        return
+    now = timezone.now()
+    _set_progress(
+        job_id,
+        status=ReportJob.Status.COMPLETED,
+        result=job.result.name,
+        row_count=row_count,
+        processed_chunks=len(windows),
+        finished_at=now,
+        expires_at=now + timedelta(seconds=settings.REPORT_JOB_RESULT_TTL),
+    )
+
+
+def download_token(job: ReportJob) -> str:
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(job.id))
+
+
+def verify_download_token(job: ReportJob, token: str) -> bool:
+    try:
+        value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+            token, max_age=settings.REPORT_JOB_LINK_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == str(job.id)
+
+
+def purge_expired_jobs() -> int:
+    """حذف نتائج المهام المنتهية الصلاحية والمهام الفاشلة القديمة مع ملفاتها"""
+    fail_stale_jobs()
+    now = timezone.now()
+    expired = ReportJob.objects.filter(
+        Q(expires_at__lte=now)
+        | Q(
+            status=ReportJob.Status.FAILED,
+            finished_at__lte=now - timedelta(seconds=settings.REPORT_JOB_RESULT_TTL),
+        )
+    )
+    count = 0
+    for job in expired.iterator():
+        if job.result:
+            job.result.delete(save=False)
+        job.delete()
+        count += 1
+    return count
@@ -1,7 +1,9 @@
+import uuid
+
 from rest_framework import serializers
 
 from catalog.models import Service
-from system.models import ApprovalPolicy, AuditLog, SystemSetting
+from system.models import ApprovalPolicy, AuditLog, ReportJob, SystemSetting
 
 
 class SystemSettingSerializer(serializers.ModelSerializer):
@@ -48,3 +50,154 @@ class AuditLogSerializer(serializers.ModelSerializer):
             return "info"
 
 
+class FieldOptionSettingSerializer(serializers.Serializer):
+    """خيار حقل: بمعرف للتعديل، وبدونه (مع value) للإنشاء"""
+    id = serializers.UUIDField(required=False)
+    label = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    value = serializers.CharField(max_length=150, required=False)
+    is_active = serializers.BooleanField(required=False)
+    order = serializers.IntegerField(min_value=0, required=False)
+
+
+class FieldSettingSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    is_visible = serializers.BooleanField(required=False)
+    is_required = serializers.BooleanField(required=False)
+    order = serializers.IntegerField(min_value=0, required=False)
+    label = serializers.CharField(max_length=200, required=False)
+    options = FieldOptionSettingSerializer(many=True, required=False)
+
+
+class PivotQuerySerializer(serializers.Serializer):
+    """
+    معاملات محور التحليل: dimensions و measures قوائم مفصولة بفواصل من القائمة
+    المسموح بها، وأي بُعد (عدا month) يمكن تمريره كفلتر مساواة.
+    """
+    dimensions = serializers.CharField(required=False, allow_blank=True, default="")
+    measures = serializers.CharField(required=False, default="count")
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    @staticmethod
+    def _split(value, allowed, name):
+        items = [item.strip() for item in value.split(",") if item.strip()]
+        unknown = sorted(set(items) - set(allowed))
+        if unknown:
+            raise serializers.ValidationError(
+                f"قيم غير مسموح بها في {name}: {', '.join(unknown)}. المتاح: {', '.join(allowed)}"
+            )
+        return list(dict.fromkeys(items))
+
+    def validate_dimensions(self, value):
+        from system.pivot import DIMENSIONS, MAX_DIMENSIONS
+
+        dimensions = self._split(value, DIMENSIONS, "dimensions")
+        if len(dimensions) > MAX_DIMENSIONS:
+            raise serializers.ValidationError(f"الحد الأقصى {MAX_DIMENSIONS} أبعاد.")
+        return dimensions
+
+    def validate_measures(self, value):
+        from system.pivot import MEASURES
+
+        measures = self._split(value, MEASURES, "measures")
+        if not measures:
+            raise serializers.ValidationError("يجب تحديد مقياس واحد على الأقل.")
+        return measures
+
+    def validate(self, attrs):
+        from system.pivot import FILTER_DIMENSIONS, UUID_DIMENSIONS, resolve_source
+
+        filters = {}
+        for name in FILTER_DIMENSIONS:
+            value = self.initial_data.get(name)
+            if not value:
+                continue
+            if name in UUID_DIMENSIONS:
+                try:
+                    value = str(uuid.UUID(value))
+                except ValueError:
+                    raise serializers.ValidationError({name: "معرف غير صحيح."})
+            filters[name] = value
+        try:
+            resolve_source(attrs["dimensions"], attrs["measures"], filters)
+        except ValueError as exc:
+            raise serializers.ValidationError({"measures": str(exc)})
+        attrs["filters"] = filters
+        return attrs
+
+
+
+class ReportJobCreateSerializer(serializers.Serializer):
+    """
+    طلب تقرير غير متزامن: النوع والمدة (حتى MAX_MONTHS شهراً)، وفلاتر المساواة
+    المسموح بها لكل نوع تُمرر كحقول إضافية (entity, college, service, ...).
+    """
+    kind = serializers.ChoiceField(choices=ReportJob.Kind.choices)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, attrs):
+        from system.pivot import UUID_DIMENSIONS
+        from system.report_jobs import KINDS, MAX_MONTHS, month_windows
+
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError({"end_date": "تاريخ النهاية يجب أن يلي تاريخ البداية."})
+        if len(month_windows(attrs["start_date"], attrs["end_date"])) > MAX_MONTHS:
+            raise serializers.ValidationError({"end_date": f"الحد الأقصى للمدة {MAX_MONTHS} شهراً."})
+        filters = {}
+        for name in KINDS[attrs["kind"]].filters:
+            value = self.initial_data.get(name)
+            if not value:
+                continue
+            if name in UUID_DIMENSIONS:
+                try:
+                    value = str(uuid.UUID(str(value)))
+                except ValueError:
+                    raise serializers.ValidationError({name: "معرف غير صحيح."})
+            filters[name] = str(value)
+        attrs["params"] = {
+            "start_date": attrs["start_date"].isoformat(),
+            "end_date": attrs["end_date"].isoformat(),
+            "filters": filters,
+        }
+        return attrs
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            "id",
+            "kind",
+            "params",
+            "status",
+            "progress",
+            "processed_chunks",
+            "total_chunks",
+            "row_count",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "expires_at",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        """رابط تنزيل موقّع ينتهي بعد REPORT_JOB_LINK_MAX_AGE (للمهام المكتملة فقط)"""
+        from django.urls import reverse
+        from django.utils import timezone
+
+        from system.report_jobs import download_token
+
+        if obj.status != ReportJob.Status.COMPLETED or not obj.result:
+            return None
+        if obj.expires_at and obj.expires_at <= timezone.now():
+            return None
+        url = f"{reverse('api:report-job-download', args=[obj.pk])}?token={download_token(obj)}"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
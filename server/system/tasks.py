@@ -0,0 +1,18 @@
+"""
+Celery tasks للنظام (مهام التقارير)
+"""
+from celery import shared_task
+
+from system.report_jobs import purge_expired_jobs, run_job
+
+
+@shared_task
+def run_report_job(job_id):
+    """تنفيذ مهمة تقرير على دفعات وحفظ نتيجتها المضغوطة"""
+    run_job(job_id)
+
+
+@shared_task
+def purge_expired_report_jobs():
+    """حذف نتائج التقارير المنتهية الصلاحية"""
+    return purge_expired_jobs()
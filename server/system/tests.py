@@ -0,0 +1,251 @@
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import Service
+from orders.models import DesignOrder, Order, OrderCostSnapshot, PrintOrder
+from system.dashboard import LOCK_KEY, STATS_KEY, compute_overview_stats
+from system.exports import stream_csv
+from system.models import ReportJob
+from system.report_jobs import request_report
+from system.tasks import run_report_job
+
+
+class AdminOverviewStatsTests(TestCase):
+    def setUp(self):
+        cache.delete_many([STATS_KEY, LOCK_KEY])
+        self.manager = User.objects.create_user(
+            email="manager@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Manager",
+            role=User.Role.PRINT_MANAGER,
+        )
+        service = Service.objects.create(name="طباعة")
+        Order.objects.create(service=service, requester=self.manager)
+        Order.objects.create(
+            service=service, requester=self.manager, status=Order.Status.CANCELLED
+        )
+        DesignOrder.objects.create(requester=self.manager, title="شعار")
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_stats_are_served_stale_while_another_request_refreshes(self):
+        response = self.client.get("/api/admin/overview/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["active_orders"], 2)
+        self.assertEqual(response.data["pending_approvals"], 2)
+
+        # قيمة قديمة مع قفل إعادة حساب محجوز: تُقدم دون استعلامات
+        computed_at, stats = cache.get(STATS_KEY)
+        cache.set(STATS_KEY, (computed_at - 3600, stats))
+        cache.add(LOCK_KEY, 1)
+        with self.assertNumQueries(0):
+            stale = self.client.get("/api/admin/overview/stats/")
+        self.assertEqual(stale.data, response.data)
+
+        cache.delete(LOCK_KEY)
+        Order.objects.create(service=Service.objects.get(), requester=self.manager)
+        self.assertEqual(
+            self.client.get("/api/admin/overview/stats/").data["active_orders"], 3
+        )
+
+    def test_closed_orders_are_excluded_from_active_and_savings(self):
+        DesignOrder.objects.create(
+            requester=self.manager, title="هوية", status=DesignOrder.Status.COMPLETED
+        )
+        costs = {Order.Status.PENDING: (20, 40), Order.Status.CANCELLED: (90, 100)}
+        for order in Order.objects.all():
+            internal, external = costs[order.status]
+            OrderCostSnapshot.objects.create(
+                order=order,
+                service=order.service,
+                priced_on=timezone.localdate(),
+                internal_cost=internal,
+                external_cost=external,
+            )
+        stats = compute_overview_stats()
+        self.assertEqual(stats["active_orders"], 2)
+        # لقطة الطلب الملغي لا تدخل في نسبة التوفير
+        self.assertEqual(stats["savings_percentage"], 50.0)
+
+
+class PivotReportTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="analyst@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Analyst",
+            role=User.Role.PRINT_MANAGER,
+        )
+        for paper_type, quantity in (("normal", 10), ("normal", 5), ("coated", 7)):
+            PrintOrder.objects.create(
+                requester=self.manager,
+                print_type="business_cards",
+                production_dept="digital",
+                size="A4",
+                paper_type=paper_type,
+                paper_weight=80,
+                quantity=quantity,
+                actual_quantity=quantity,
+                sides=2,
+                delivery_method="self_pickup",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_pivot_groups_whitelisted_dimensions_and_caches(self):
+        params = {
+            "dimensions": "paper_type",
+            "measures": "count,quantity,paper_consumption",
+            "order_type": "print",
+        }
+        response = self.client.get("/api/admin/reports/pivot/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["rows"],
+            [
+                {"paper_type": "coated", "count": 1, "quantity": 7, "paper_consumption": 14},
+                {"paper_type": "normal", "count": 2, "quantity": 15, "paper_consumption": 30},
+            ],
+        )
+        with self.assertNumQueries(0):
+            self.client.get(
+                "/api/admin/reports/pivot/",
+                {**params, "measures": "paper_consumption,quantity,count"},
+            )
+
+        invalid = self.client.get("/api/admin/reports/pivot/", {"dimensions": "requester"})
+        self.assertEqual(invalid.status_code, 400)
+        mixed = self.client.get(
+            "/api/admin/reports/pivot/", {"dimensions": "paper_type", "measures": "savings"}
+        )
+        self.assertEqual(mixed.status_code, 400)
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email="exports@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="مدير المطبعة",
+            role=User.Role.PRINT_MANAGER,
+        )
+        service = Service.objects.create(name="طباعة")
+        for _ in range(3):
+            Order.objects.create(service=service, requester=self.manager)
+        Order.objects.create(service=service, requester=self.manager, status=Order.Status.READY)
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_orders_export_streams_filtered_csv_and_xlsx(self):
+        response = self.client.get(
+            "/api/orders/export/", {"file_format": "csv", "status": Order.Status.PENDING}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn(".csv", response["Content-Disposition"])
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(content.startswith("\ufeff"))
+        rows = list(csv.reader(io.StringIO(content.lstrip("\ufeff"))))
+        self.assertEqual(rows[0][0], "رقم الطلب")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][4], dict(Order.Status.choices)[Order.Status.PENDING])
+
+        response = self.client.get("/api/orders/export/", {"file_format": "xlsx"})
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(sheet.count("<row>"), 5)
+        self.assertIn("مدير المطبعة", sheet)
+
+        response = self.client.get("/api/orders/export/", {"file_format": "pdf"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_csv_cells_starting_with_formula_characters_are_neutralized(self):
+        cells = ["=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "\tx", "\rx", "a=b", -3]
+        content = b"".join(stream_csv(["h"] * len(cells), [cells])).decode("utf-8")
+        row = list(csv.reader(io.StringIO(content.lstrip("\ufeff"))))[1]
+        self.assertEqual(
+            row,
+            ["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "'\tx", "'\rx", "a=b", "-3"],
+        )
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.manager = User.objects.create_user(
+            email="reports@taibahu.edu.sa",
+            password="StrongPass123",
+            full_name="Reports",
+            role=User.Role.PRINT_MANAGER,
+        )
+        service = Service.objects.create(name="طباعة")
+        for _ in range(2):
+            Order.objects.create(service=service, requester=self.manager)
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_identical_requests_share_one_job_with_signed_download(self):
+        today = timezone.localdate()
+        payload = {
+            "kind": "orders",
+            "start_date": today.replace(month=1, day=1).isoformat(),
+            "end_date": today.isoformat(),
+            "order_type": "general",
+        }
+        with override_settings(MEDIA_ROOT=self.media_root), mock.patch.object(
+            run_report_job, "delay"
+        ) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = self.client.post("/api/admin/report-jobs/", payload, format="json")
+                second = self.client.post("/api/admin/report-jobs/", payload, format="json")
+            self.assertEqual(first.status_code, 202)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(first.data["id"], second.data["id"])
+            delay.assert_called_once_with(str(first.data["id"]))
+
+            run_report_job(first.data["id"])
+            job = self.client.get(f"/api/admin/report-jobs/{first.data['id']}/").data
+            self.assertEqual(job["status"], ReportJob.Status.COMPLETED)
+            self.assertEqual(job["progress"], 100)
+            self.assertEqual(job["total_chunks"], today.month)
+
+            anonymous = APIClient()
+            response = anonymous.get(job["download_url"])
+            self.assertEqual(response.status_code, 200)
+            result = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+            self.assertEqual(result["kind"], "orders")
+            self.assertEqual(sum(row["count"] for row in result["rows"]), 2)
+
+            tampered = job["download_url"].replace("token=", "token=x")
+            self.assertEqual(anonymous.get(tampered).status_code, 403)
+
+    def test_stale_active_job_is_failed_and_replaced(self):
+        today = timezone.localdate().isoformat()
+        params = {"start_date": today, "end_date": today, "filters": {}}
+        with mock.patch.object(run_report_job, "delay"):
+            stuck, created = request_report(ReportJob.Kind.ORDERS, params)
+            self.assertTrue(created)
+            ReportJob.objects.filter(pk=stuck.pk).update(
+                created_at=timezone.now() - timedelta(seconds=settings.REPORT_JOB_STALE_AFTER + 1)
+            )
+            job, created = request_report(ReportJob.Kind.ORDERS, params)
+        self.assertTrue(created)
+        self.assertNotEqual(job.pk, stuck.pk)
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, ReportJob.Status.FAILED)
@@ -6,6 +6,7 @@ from system.views import (
     ApprovalPolicyViewSet,
     AuditLogViewSet,
     FieldSettingsViewSet,
+    ReportJobViewSet,
     ReportsViewSet,
     ServiceSettingsViewSet,
     SystemSettingViewSet,
@@ -19,6 +20,7 @@ router.register(r"system/field-settings", FieldSettingsViewSet, basename="field-
 router.register(r"system/service-settings", ServiceSettingsViewSet, basename="service-settings")
 router.register(r"admin/reports", ReportsViewSet, basename="reports")
 router.register(r"admin/overview", AdminOverviewViewSet, basename="admin-overview")
+router.register(r"admin/report-jobs", ReportJobViewSet, basename="report-job")
 
 urlpatterns = router.urls
 
@@ -1,16 +1,23 @@
 from django.db import models
+from django.http import FileResponse, Http404
 from django.utils import timezone
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from accounts.permissions import IsPrintManager, IsSystemAdmin
-from catalog.models import Service, ServiceField, ServiceFieldOption
-from system.models import ApprovalPolicy, AuditLog, SystemSetting
+from catalog.field_settings import apply_field_settings, list_field_settings
+from catalog.models import Service, ServiceField
+from system.exports import Column, ExportMixin
+from system.models import ApprovalPolicy, AuditLog, ReportJob, SystemSetting
 from system.serializers import (
     ApprovalPolicySerializer,
     AuditLogSerializer,
+    FieldSettingSerializer,
+    PivotQuerySerializer,
+    ReportJobCreateSerializer,
+    ReportJobSerializer,
     SystemSettingSerializer,
 )
 
@@ -53,10 +60,18 @@ class ApprovalPolicyViewSet(
             return Response(serializer.data)
 
 
-class AuditLogViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class AuditLogViewSet(ExportMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = AuditLog.objects.select_related("actor").all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated & IsSystemAdmin]
+    export_filename = "audit-log"
+    export_columns = [
+        Column("التاريخ", "created_at"),
+        Column("المستخدم", "actor__full_name"),
+        Column("البريد الإلكتروني", "actor__email"),
+        Column("الحدث", "action"),
+        Column("بيانات إضافية", "metadata"),
+    ]
     
     def get_queryset(self):
         queryset = AuditLog.objects.select_related("actor").all()
@@ -100,84 +115,33 @@ class FieldSettingsViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=["get"], url_path="list")
     def list_fields(self, request):
-        """إرجاع جميع إعدادات الحقول"""
-        fields = ServiceField.objects.select_related("service").prefetch_related("options").all()
-        result = []
-        for field in fields:
-            result.append({
-                "id": str(field.id),
-                "service_id": str(field.service.id),
-                "service_name": field.service.name,
-                "key": field.key,
-                "label": field.label,
-                "field_type": field.field_type,
-                "order": field.order,
-                "is_required": field.is_required,
-                "is_visible": field.is_visible,
-                "options": [
-                    {
-                        "id": str(opt.id),
-                        "label": opt.label,
-                        "value": opt.value,
-                        "is_active": opt.is_active,
-                        "order": opt.order,
-                    }
-                    for opt in field.options.all()
-                ],
-            })
-        return Response(result)
+        """إرجاع جميع إعدادات الحقول (من كاش الكتالوج)"""
+        return Response(list_field_settings())
     
     @action(detail=False, methods=["put"], url_path="update/(?P<field_id>[^/.]+)")
     def update_field(self, request, field_id=None):
         """تحديث إعدادات حقل معين"""
-        try:
-            field = ServiceField.objects.get(id=field_id)
-        except ServiceField.DoesNotExist:
+        data = request.data.copy()
+        data["id"] = field_id
+        serializer = FieldSettingSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        if not ServiceField.objects.filter(id=serializer.validated_data["id"]).exists():
             return Response(
                 {"detail": "الحقل غير موجود."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        
-        # تحديث الإعدادات الأساسية
-        if "is_visible" in request.data:
-            field.is_visible = request.data["is_visible"]
-        if "is_required" in request.data:
-            field.is_required = request.data["is_required"]
-        if "order" in request.data:
-            field.order = request.data["order"]
-        if "label" in request.data:
-            field.label = request.data["label"]
-        
-        field.save()
-        
-        # تحديث الخيارات (لحقول radio)
-        if "options" in request.data and field.field_type == ServiceField.FieldType.RADIO:
-            options_data = request.data["options"]
-            for opt_data in options_data:
-                if "id" in opt_data:
-                    # تحديث خيار موجود
-                    try:
-                        option = ServiceFieldOption.objects.get(id=opt_data["id"], field=field)
-                        if "is_active" in opt_data:
-                            option.is_active = opt_data["is_active"]
-                        if "label" in opt_data:
-                            option.label = opt_data["label"]
-                        if "order" in opt_data:
-                            option.order = opt_data["order"]
-                        option.save()
-                    except ServiceFieldOption.DoesNotExist:
-                        pass
-                else:
-                    # إنشاء خيار جديد
-                    ServiceFieldOption.objects.create(
-                        field=field,
-                        label=opt_data.get("label", ""),
-                        value=opt_data.get("value", ""),
-                        is_active=opt_data.get("is_active", True),
-                        order=opt_data.get("order", 1),
-                    )
-        
+        apply_field_settings([serializer.validated_data])
         return Response({"detail": "تم التحديث بنجاح."})
+    
+    @action(detail=False, methods=["put"], url_path="bulk-update")
+    def bulk_update(self, request):
+        """
+        تحديث إعدادات عدة حقول وخياراتها دفعة واحدة (معاملة واحدة)
+        المدخل: قائمة [{"id", "is_visible", "is_required", "order", "label", "options"}]
+        """
+        serializer = FieldSettingSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return Response(apply_field_settings(serializer.validated_data))
 
 
 class ServiceSettingsViewSet(viewsets.ViewSet):
@@ -232,63 +196,10 @@ class AdminOverviewViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=["get"])
     def stats(self, request):
-        """إحصائيات شاملة للمدير"""
-        from orders.models import Order, DesignOrder, PrintOrder
-        from inventory.models import InventoryItem
-        from catalog.models import ServicePricing
-        from django.db.models import Q, Count, Sum
-        from decimal import Decimal
-        
-        # إحصائيات الطلبات
-        all_orders = Order.objects.all()
-        all_design_orders = DesignOrder.objects.all()
-        all_print_orders = PrintOrder.objects.all()
-        
-        # الطلبات النشطة (كل الطلبات ما عدا المرفوضة والملغاة والمؤرشفة)
-        active_orders = (
-            all_orders.exclude(status__in=[Order.Status.REJECTED, Order.Status.CANCELLED, Order.Status.ARCHIVED]).count() +
-            all_design_orders.exclude(status__in=[DesignOrder.Status.REJECTED, DesignOrder.Status.CANCELLED, DesignOrder.Status.ARCHIVED]).count() +
-            all_print_orders.exclude(status__in=[PrintOrder.Status.REJECTED, PrintOrder.Status.CANCELLED, PrintOrder.Status.ARCHIVED]).count()
-        )
-        
-        # طلبات بانتظار الاعتماد
-        pending_approvals = (
-            all_orders.filter(status__in=[Order.Status.PENDING, Order.Status.IN_REVIEW]).count() +
-            all_design_orders.filter(status__in=[DesignOrder.Status.PENDING, DesignOrder.Status.IN_REVIEW]).count() +
-            all_print_orders.filter(status__in=[PrintOrder.Status.PENDING, PrintOrder.Status.IN_REVIEW]).count()
-        )
-        
-        # تنبيهات المخزون (عناصر منخفضة المخزون)
-        inventory_alerts = InventoryItem.objects.filter(
-            current_quantity__lte=models.F("min_quantity")
-        ).count()
-        
-        # حساب نسبة التوفير من ServicePricing
-        savings_percentage = 0
-        try:
-            pricing_items = ServicePricing.objects.filter(
-                internal_cost__gt=0,
-                external_cost__gt=0
-            )
-            if pricing_items.exists():
-                total_savings = Decimal(0)
-                total_external = Decimal(0)
-                for item in pricing_items:
-                    if item.external_cost > item.internal_cost:
-                        savings = item.external_cost - item.internal_cost
-                        total_savings += savings
-                        total_external += item.external_cost
-                if total_external > 0:
-                    savings_percentage = float((total_savings / total_external) * 100)
-        except Exception:
-            savings_percentage = 0
-        
-        return Response({
-            "active_orders": active_orders,
-            "pending_approvals": pending_approvals,
-            "inventory_alerts": inventory_alerts,
-            "savings_percentage": round(savings_percentage, 1),
-        })
+        """إحصائيات شاملة للمدير (من الكاش، تُحدّث كل بضع ثوانٍ)"""
+        from system.dashboard import get_overview_stats
+
+        return Response(get_overview_stats())
 
 
 class ReportsViewSet(viewsets.ViewSet):
@@ -300,10 +211,10 @@ class ReportsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def orders(self, request):
         """تقرير الطلبات مع فلترة متقدمة"""
-        from orders.models import Order, DesignOrder, PrintOrder
+        from orders.models import OrderDailyStat
         from entities.models import Entity
-        from django.db.models import Count, Sum, Q
-        from datetime import datetime, timedelta
+        from django.db.models import Sum, Subquery
+        from datetime import datetime
         
         # الفلاتر
         entity_id = request.query_params.get("entity")
@@ -312,38 +223,41 @@ class ReportsViewSet(viewsets.ViewSet):
         start_date = request.query_params.get("start_date")
         end_date = request.query_params.get("end_date")
         order_type = request.query_params.get("order_type")  # design, print, general
+        # أبعاد إضافية في جدول الحقائق: الخدمة (للطلبات العامة)، الأولوية، قسم الإنتاج (للطباعة)
+        dimensions = {
+            param: request.query_params[param]
+            for param in ("service", "priority", "production_dept")
+            if request.query_params.get(param)
+        }
         
-        # بناء الاستعلام
-        filters = Q()
+        # الاستعلام من التجميع اليومي (OrderDailyStat) بدل جداول الطلبات
+        stats = OrderDailyStat.objects.all()
+        scope_id = None
         
         # فلترة حسب الجهة
         if entity_id:
-            filters &= Q(entity_id=entity_id)
-        elif college_id:
-            # جميع الأقسام التابعة للكلية
-            college = Entity.objects.get(id=college_id)
-            department_ids = [dept.id for dept in college.get_all_children()]
-            filters &= Q(entity_id__in=department_ids)
-        elif vice_rectorate_id:
-            # جميع الجهات التابعة للوكالة
-            vice_rectorate = Entity.objects.get(id=vice_rectorate_id)
-            all_entities = [vice_rectorate.id] + [e.id for e in vice_rectorate.get_all_children()]
-            filters &= Q(entity_id__in=all_entities)
-        
-        # فلترة حسب التاريخ (مع timezone)
+            stats = stats.filter(entity_id=entity_id)
+        elif college_id or vice_rectorate_id:
+            # جميع الجهات التابعة للكلية أو الوكالة (استعلام واحد على المسار الهرمي)
+            scope_id = college_id or vice_rectorate_id
+            root_path = Entity.objects.filter(id=scope_id).values("path")[:1]
+            stats = stats.filter(entity__path__startswith=Subquery(root_path))
+        
+        # فلترة حسب التاريخ (يوم الإنشاء بالتوقيت المحلي)
         if start_date:
             try:
-                start_dt = timezone.make_aware(datetime.strptime(start_date, "%Y-%m-%d"))
-                filters &= Q(created_at__gte=start_dt)
+                stats = stats.filter(day__gte=datetime.strptime(start_date, "%Y-%m-%d").date())
             except ValueError:
                 pass
         if end_date:
             try:
-                # إضافة 23:59:59 لليوم الأخير
-                end_dt = timezone.make_aware(datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) - timedelta(seconds=1))
-                filters &= Q(created_at__lte=end_dt)
+                stats = stats.filter(day__lte=datetime.strptime(end_date, "%Y-%m-%d").date())
             except ValueError:
                 pass
+        if order_type:
+            stats = stats.filter(order_type=order_type)
+        if dimensions:
+            stats = stats.filter(**dimensions)
         
         result = {
             "summary": {},
@@ -351,27 +265,21 @@ class ReportsViewSet(viewsets.ViewSet):
             "by_entity": {},
         }
         
-        # تقارير حسب النوع
-        if not order_type or order_type == "design":
-            design_orders = DesignOrder.objects.filter(filters)
-            result["design"] = {
-                "total": design_orders.count(),
-                "by_status": dict(design_orders.values("status").annotate(count=Count("id")).values_list("status", "count")),
-            }
-        
-        if not order_type or order_type == "print":
-            print_orders = PrintOrder.objects.filter(filters)
-            result["print"] = {
-                "total": print_orders.count(),
-                "by_status": dict(print_orders.values("status").annotate(count=Count("id")).values_list("status", "count")),
-            }
-        
-        if not order_type or order_type == "general":
-            general_orders = Order.objects.filter(filters)
-            result["general"] = {
-                "total": general_orders.count(),
-                "by_status": dict(general_orders.values("status").annotate(count=Count("id")).values_list("status", "count")),
-            }
+        grouped = stats.values("order_type", "status").annotate(count=Sum("count")).order_by()
+        for row in grouped:
+            if not row["count"]:
+                continue
+            section = result.setdefault(row["order_type"], {"total": 0, "by_status": {}})
+            section["total"] += row["count"]
+            section["by_status"][row["status"]] = row["count"]
+            result["by_status"][row["status"]] = result["by_status"].get(row["status"], 0) + row["count"]
+        for section_type in OrderDailyStat.OrderType.values:
+            if not order_type or order_type == section_type:
+                result.setdefault(section_type, {"total": 0, "by_status": {}})
+        
+        # توزيع الطلبات على الجهات التابعة مباشرة لنطاق التقرير (أو الوكالات عند عدم التحديد)
+        if not entity_id:
+            result["by_entity"] = self._orders_by_child_entity(stats, scope_id)
         
         # إحصائيات إضافية
         total_all = sum([
@@ -381,64 +289,94 @@ class ReportsViewSet(viewsets.ViewSet):
         ])
         result["summary"] = {
             "total_orders": total_all,
-            "filter_applied": bool(entity_id or start_date or end_date or order_type),
+            "filter_applied": bool(entity_id or start_date or end_date or order_type or dimensions),
         }
         
         return Response(result)
+
+    @staticmethod
+    def _orders_by_child_entity(stats, scope_id, measures=None):
+        """
+        جمع أعداد الطلبات لكل شجرة فرعية تحت النطاق باستخدام لقطة الهيكل
+        measures: {اسم المخرج: حقل التجميع}، افتراضياً {"total": "count"}
+        """
+        import uuid
+        from django.db.models import Sum
+        from entities.hierarchy import get_snapshot
+        from entities.models import PATH_SEPARATOR
+
+        snapshot = get_snapshot()
+        try:
+            scope = snapshot.get(uuid.UUID(str(scope_id))) if scope_id else None
+        except ValueError:
+            scope = None
+        if scope is not None:
+            heads = snapshot.children(scope.id, active_only=False)
+            head_depth = scope.path.count(PATH_SEPARATOR)
+        else:
+            heads = [node for node in snapshot.nodes.values() if node.parent_id is None]
+            head_depth = 0
+        heads_by_hex = {node.id.hex: node for node in heads}
+
+        measures = measures or {"total": "count"}
+        totals = {}
+        per_entity = stats.filter(entity__isnull=False).values("entity_id").annotate(
+            **{name: Sum(field) for name, field in measures.items()}
+        ).order_by()
+        for row in per_entity:
+            node = snapshot.get(row["entity_id"])
+            if node is None:
+                continue
+            # الجهة الرئيسية هي الجزء المقابل لعمقها في المسار الهرمي
+            segments = node.path.split(PATH_SEPARATOR)
+            head = heads_by_hex.get(segments[head_depth]) if len(segments) > head_depth else None
+            if head is None:
+                continue
+            entry = totals.setdefault(
+                str(head.id), {"name": head.name, **dict.fromkeys(measures, 0)}
+            )
+            for name in measures:
+                entry[name] += row[name]
+        return totals
     
     @action(detail=False, methods=["get"])
     def productivity(self, request):
-        """تقرير الإنتاجية اليومية"""
-        from orders.models import DesignOrder, PrintOrder
-        from django.db.models import Count
-        from datetime import datetime, timedelta
+        """تقرير الإنتاجية اليومية (من جدول الحقائق OrderDailyStat)"""
+        from orders.models import DesignOrder, OrderDailyStat, PrintOrder
+        from django.db.models import Q, Sum
+        from datetime import datetime
         
         date_str = request.query_params.get("date")
         if not date_str:
-            target_date = timezone.now().date()
+            target_date = timezone.localdate()
         else:
             try:
                 target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
             except ValueError:
-                target_date = timezone.now().date()
-        
-        # استخدام timezone-aware datetime
-        start_of_day = timezone.make_aware(datetime.combine(target_date, datetime.min.time()))
-        end_of_day = timezone.make_aware(datetime.combine(target_date, datetime.max.time()))
-        
-        # طلبات التصميم المكتملة في هذا اليوم
-        design_completed = DesignOrder.objects.filter(
-            completed_at__gte=start_of_day,
-            completed_at__lte=end_of_day,
-            status=DesignOrder.Status.COMPLETED,
-        ).count()
-        
-        # طلبات الطباعة المكتملة في هذا اليوم
-        print_completed = PrintOrder.objects.filter(
-            completed_at__gte=start_of_day,
-            completed_at__lte=end_of_day,
-            status__in=[PrintOrder.Status.ARCHIVED, PrintOrder.Status.DELIVERY_SCHEDULED],
-        ).count()
-        
-        # إحصائيات إضافية
-        design_pending = DesignOrder.objects.filter(
-            created_at__gte=start_of_day,
-            created_at__lte=end_of_day,
-        ).exclude(status=DesignOrder.Status.COMPLETED).count()
-        
-        print_pending = PrintOrder.objects.filter(
-            created_at__gte=start_of_day,
-            created_at__lte=end_of_day,
-        ).exclude(status__in=[PrintOrder.Status.ARCHIVED, PrintOrder.Status.DELIVERY_SCHEDULED]).count()
+                target_date = timezone.localdate()
+        
+        design = Q(order_type=OrderDailyStat.OrderType.DESIGN)
+        printed = Q(order_type=OrderDailyStat.OrderType.PRINT)
+        design_done = Q(status=DesignOrder.Status.COMPLETED)
+        print_done = Q(status__in=[PrintOrder.Status.ARCHIVED, PrintOrder.Status.DELIVERY_SCHEDULED])
+        completed = Q(completed_on=target_date)
+        created = Q(day=target_date)
+        
+        totals = OrderDailyStat.objects.filter(completed | created).aggregate(
+            # الطلبات المكتملة في هذا اليوم
+            design_completed=Sum("count", filter=design & design_done & completed),
+            print_completed=Sum("count", filter=printed & print_done & completed),
+            # الطلبات المنشأة في هذا اليوم ولم تكتمل بعد
+            design_pending=Sum("count", filter=design & created & ~design_done),
+            print_pending=Sum("count", filter=printed & created & ~print_done),
+        )
+        totals = {name: value or 0 for name, value in totals.items()}
         
         return Response({
             "date": target_date.isoformat(),
-            "design_completed": design_completed,
-            "print_completed": print_completed,
-            "design_pending": design_pending,
-            "print_pending": print_pending,
-            "total_completed": design_completed + print_completed,
-            "total_pending": design_pending + print_pending,
+            **totals,
+            "total_completed": totals["design_completed"] + totals["print_completed"],
+            "total_pending": totals["design_pending"] + totals["print_pending"],
         })
     
     @action(detail=False, methods=["get"])
@@ -448,8 +386,17 @@ class ReportsViewSet(viewsets.ViewSet):
         from django.db.models import Sum
         
         # العناصر منخفضة المخزون
-        low_stock = InventoryItem.objects.filter(
-            current_quantity__lte=models.F("min_quantity")
+        low_stock = (
+            InventoryItem.objects.low_stock()
+            .with_status()
+            .order_by("status_rank", "current_quantity")
+            .only("id", "name", "current_quantity", "min_quantity")
+        )
+        status_counts = dict(
+            InventoryItem.objects.with_status()
+            .order_by()
+            .values_list("stock_status")
+            .annotate(count=models.Count("id"))
         )
         
         # حركة المخزون (آخر 30 يوم)
@@ -466,25 +413,271 @@ class ReportsViewSet(viewsets.ViewSet):
                     "name": item.name,
                     "current_quantity": item.current_quantity,
                     "min_quantity": item.min_quantity,
+                    "status": item.stock_status,
                 }
                 for item in low_stock
             ],
+            "status_counts": {
+                choice: status_counts.get(choice, 0)
+                for choice in InventoryItem.StockStatus.values
+            },
             "movement_last_30_days": dict(inventory_movement),
         })
     
-    @action(detail=False, methods=["get"])
-    def roi(self, request):
-        """تقرير التوفير (ROI)"""
-        from catalog.models import ServicePricing
-        from orders.models import Order, DesignOrder, PrintOrder
+    @action(detail=False, methods=["get"], url_path="inventory-movement")
+    def inventory_movement(self, request):
+        """
+        سلاسل زمنية لحركة المخزون (إضافة/صرف/تعديل) لكل مادة أو تصنيف
+        مجمعة حسب اليوم أو الأسبوع أو الشهر، من جدول التجميع اليومي.
+        """
+        from datetime import timedelta
+        import uuid
         from django.db.models import Sum
-        
-        # TODO: حساب ROI بناءً على ServicePricing
-        # هذا مثال بسيط - يحتاج تطوير أكثر
-        
+        from django.db.models.functions import TruncMonth, TruncWeek
+        from django.utils.dateparse import parse_date
+        from inventory.models import InventoryLog, InventoryMovementDaily
+
+        bucket = request.query_params.get("bucket", "day")
+        group_by = request.query_params.get("group_by", "item")
+        if bucket not in ("day", "week", "month") or group_by not in ("item", "category"):
+            return Response(
+                {"detail": "bucket يجب أن يكون day أو week أو month، و group_by يجب أن يكون item أو category."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        today = timezone.localdate()
+        try:
+            start = parse_date(request.query_params.get("start_date", "")) or today - timedelta(days=29)
+            end = parse_date(request.query_params.get("end_date", "")) or today
+        except ValueError:
+            return Response(
+                {"detail": "صيغة التاريخ غير صحيحة."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end:
+            return Response(
+                {"detail": "تاريخ البداية يجب أن يسبق تاريخ النهاية."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = InventoryMovementDaily.objects.filter(day__gte=start, day__lte=end)
+        if request.query_params.get("category"):
+            rows = rows.filter(category=request.query_params["category"])
+        if request.query_params.get("item"):
+            try:
+                item_id = uuid.UUID(request.query_params["item"])
+            except ValueError:
+                return Response(
+                    {"detail": "معرف المادة غير صحيح."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            rows = rows.filter(item_id=item_id)
+
+        if bucket == "week":
+            rows = rows.annotate(bucket=TruncWeek("day"))
+        elif bucket == "month":
+            rows = rows.annotate(bucket=TruncMonth("day"))
+        else:
+            rows = rows.annotate(bucket=models.F("day"))
+
+        group_fields = ["item_id", "item__name", "item__sku"] if group_by == "item" else ["category"]
+        rows = (
+            rows.values(*group_fields, "bucket", "operation")
+            .annotate(quantity=Sum("quantity"), movements=Sum("movements"))
+            .order_by(*group_fields, "bucket")
+        )
+
+        operations = InventoryLog.Operation.values
+        series = {}
+        for row in rows:
+            key = str(row["item_id"]) if group_by == "item" else row["category"]
+            entry = series.get(key)
+            if entry is None:
+                entry = series[key] = {"key": key, "points": {}}
+                if group_by == "item":
+                    entry.update(name=row["item__name"], sku=row["item__sku"])
+            point = entry["points"].get(row["bucket"])
+            if point is None:
+                point = entry["points"][row["bucket"]] = {"bucket": row["bucket"]}
+                point.update({op: 0 for op in operations})
+                point["movements"] = 0
+            point[row["operation"]] += row["quantity"]
+            point["movements"] += row["movements"]
+
         return Response({
-            "message": "تقرير ROI - قيد التطوير",
+            "bucket": bucket,
+            "group_by": group_by,
+            "start_date": start,
+            "end_date": end,
+            "series": [
+                {**entry, "points": list(entry["points"].values())}
+                for entry in series.values()
+            ],
         })
 
+    @action(detail=False, methods=["get"])
+    def pivot(self, request):
+        """
+        محور تحليل الطلبات: ?dimensions=month,service&measures=count,quantity&status=...
+        الأبعاد: vice_rectorate, college, entity, service, order_type, status, priority,
+        production_dept, print_type, paper_type, month
+        المقاييس: count, quantity, paper_consumption, internal_cost, external_cost, savings
+        """
+        from system.pivot import get_pivot
+
+        serializer = PivotQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response(
+            get_pivot(
+                data["dimensions"],
+                data["measures"],
+                data["filters"],
+                data.get("start_date"),
+                data.get("end_date"),
+            )
+        )
+
+    @action(detail=False, methods=["get"])
+    def roi(self, request):
+        """
+        تقرير التوفير (ROI) للطلبات المكتملة: التكلفة الداخلية مقابل تكلفة السوق
+        من التجميع الشهري (OrderCostMonthlyStat)، حسب الخدمة والجهة والشهر.
+        فلاتر التاريخ بدقة الشهر (شهر الإكمال).
+        """
+        from orders.models import OrderCostMonthlyStat
+        from entities.models import Entity
+        from django.db.models import Subquery, Sum
+        from datetime import datetime
+
+        entity_id = request.query_params.get("entity")
+        college_id = request.query_params.get("college")
+        vice_rectorate_id = request.query_params.get("vice_rectorate")
+        service_id = request.query_params.get("service")
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date")
+
+        stats = OrderCostMonthlyStat.objects.all()
+        scope_id = None
+        if entity_id:
+            stats = stats.filter(entity_id=entity_id)
+        elif college_id or vice_rectorate_id:
+            scope_id = college_id or vice_rectorate_id
+            root_path = Entity.objects.filter(id=scope_id).values("path")[:1]
+            stats = stats.filter(entity__path__startswith=Subquery(root_path))
+        if service_id:
+            stats = stats.filter(service_id=service_id)
+        if start_date:
+            try:
+                start = datetime.strptime(start_date, "%Y-%m-%d").date()
+                stats = stats.filter(month__gte=start.replace(day=1))
+            except ValueError:
+                pass
+        if end_date:
+            try:
+                end = datetime.strptime(end_date, "%Y-%m-%d").date()
+                stats = stats.filter(month__lte=end.replace(day=1))
+            except ValueError:
+                pass
+
+        measures = {
+            "orders": Sum("count"),
+            "internal_cost": Sum("internal_cost"),
+            "external_cost": Sum("external_cost"),
+        }
+
+        def with_savings(entry):
+            internal = entry["internal_cost"] or 0
+            external = entry["external_cost"] or 0
+            entry["orders"] = entry["orders"] or 0
+            entry["internal_cost"] = internal
+            entry["external_cost"] = external
+            entry["savings"] = external - internal
+            entry["savings_percentage"] = (
+                round(float((external - internal) / external * 100), 2) if external else 0
+            )
+            return entry
+
+        by_service = [
+            with_savings({
+                "service_id": str(row.pop("service_id")),
+                "service_name": row.pop("service__name"),
+                **row,
+            })
+            for row in stats.values("service_id", "service__name").annotate(**measures).order_by(
+                "service__name"
+            )
+        ]
+        by_month = [
+            with_savings({"month": row.pop("month").strftime("%Y-%m"), **row})
+            for row in stats.values("month").annotate(**measures).order_by("month")
+        ]
+        result = {
+            "summary": with_savings(stats.aggregate(**measures)),
+            "by_service": by_service,
+            "by_month": by_month,
+            "by_entity": {},
+        }
+        if not entity_id:
+            by_entity = self._orders_by_child_entity(
+                stats,
+                scope_id,
+                {"orders": "count", "internal_cost": "internal_cost", "external_cost": "external_cost"},
+            )
+            result["by_entity"] = {key: with_savings(entry) for key, entry in by_entity.items()}
+        return Response(result)
+
+
+class ReportJobViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    مهام التقارير الثقيلة: POST ينشئ المهمة (أو يعيد مهمة مطابقة قائمة)،
+    ويُتابع التقدم بـ GET، وتُنزل النتيجة من download_url الموقّع.
+    """
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated & (IsPrintManager | IsSystemAdmin)]
+
+    def create(self, request):
+        from system.report_jobs import request_report
+
+        serializer = ReportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job, created = request_report(data["kind"], data["params"], request.user)
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
 
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+    )
+    def download(self, request, pk=None):
+        """تنزيل النتيجة المضغوطة برابط موقّع (لا يتطلب رمز الدخول)"""
+        from system.report_jobs import verify_download_token
 
+        job = self.get_object()
+        if not verify_download_token(job, request.query_params.get("token", "")):
+            return Response(
+                {"detail": "رابط التنزيل غير صالح أو منتهي الصلاحية."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        if (
+            job.status != ReportJob.Status.COMPLETED
+            or not job.result
+            or (job.expires_at and job.expires_at <= timezone.now())
+        ):
+            raise Http404
+        return FileResponse(
+            job.result.open("rb"),
+            as_attachment=True,
+            filename=f"{job.kind}-{job.created_at:%Y%m%d}.json.gz",
+            content_type="application/gzip",
+        )
@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from accounts.context import PermissionContextMixin
 from accounts.permissions import IsTrainingSupervisor
 from .models import TrainingEvaluation, TrainingRequest
 from .serializers import (
@@ -15,12 +16,12 @@ from .serializers import (
 )
 
 
-class TrainingRequestViewSet(viewsets.ModelViewSet):
+class TrainingRequestViewSet(PermissionContextMixin, viewsets.ModelViewSet):
     """
     ViewSet لإدارة طلبات التدريب
     """
     queryset = TrainingRequest.objects.select_related(
-        "requester", "entity", "supervisor"
+        "requester__entity", "entity", "supervisor__entity"
     ).prefetch_related("evaluations").all()
     permission_classes = [IsAuthenticated]
     
@@ -32,11 +33,9 @@ class TrainingRequestViewSet(viewsets.ModelViewSet):
         return TrainingRequestDetailSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_training_supervisor or user.is_print_manager:
-            return qs
-        return qs.filter(requester=user)
+        return self.scope_queryset(
+            super().get_queryset(), full_access={"training_supervisor", "print_manager"}
+        )
     
     def perform_create(self, serializer):
         serializer.save(requester=self.request.user)
@@ -83,7 +82,7 @@ class TrainingEvaluationViewSet(viewsets.ModelViewSet):
     ViewSet لإدارة تقييمات التدريب
     """
     queryset = TrainingEvaluation.objects.select_related(
-        "training_request", "evaluated_by"
+        "training_request", "evaluated_by__entity"
     ).all()
     permission_classes = [IsAuthenticated & IsTrainingSupervisor]
     serializer_class = TrainingEvaluationSerializer
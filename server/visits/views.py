@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from accounts.context import PermissionContextMixin
 from accounts.permissions import IsPrintManager
 from accounts.models import User
 from .models import VisitBooking, VisitRequest, VisitSchedule
@@ -17,11 +18,11 @@ from .serializers import (
 )
 
 
-class VisitRequestViewSet(viewsets.ModelViewSet):
+class VisitRequestViewSet(PermissionContextMixin, viewsets.ModelViewSet):
     """
     ViewSet لإدارة طلبات الزيارات
     """
-    queryset = VisitRequest.objects.select_related("requester", "entity").prefetch_related("booking").all()
+    queryset = VisitRequest.objects.select_related("requester__entity", "entity").prefetch_related("booking").all()
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
@@ -32,12 +33,10 @@ class VisitRequestViewSet(viewsets.ModelViewSet):
         return VisitRequestDetailSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
         # المديرون وموظفو المطبعة يمكنهم متابعة جميع الزيارات
-        if user.is_print_manager or user.is_dept_employee:
-            return qs
-        return qs.filter(requester=user)
+        return self.scope_queryset(
+            super().get_queryset(), full_access={"print_manager", "dept_employee"}
+        )
     
     def perform_create(self, serializer):
         serializer.save(requester=self.request.user)
@@ -191,7 +190,7 @@ class VisitScheduleViewSet(viewsets.ModelViewSet):
         return Response({"available_dates": available_dates})
 
 
-class VisitBookingViewSet(viewsets.ModelViewSet):
+class VisitBookingViewSet(PermissionContextMixin, viewsets.ModelViewSet):
     """
     ViewSet لإدارة حجوزات المواعيد
     """
@@ -200,11 +199,11 @@ class VisitBookingViewSet(viewsets.ModelViewSet):
     serializer_class = VisitBookingSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        qs = super().get_queryset()
-        if user.is_print_manager:
-            return qs
-        return qs.filter(visit_request__requester=user)
+        return self.scope_queryset(
+            super().get_queryset(),
+            full_access={"print_manager"},
+            owner_lookups=("visit_request__requester_id",),
+        )
     
     @transaction.atomic
     @action(